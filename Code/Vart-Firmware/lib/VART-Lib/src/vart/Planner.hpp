@@ -1,5 +1,8 @@
 #pragma once
 
+#include <algorithm>
+#include <cmath>
+
 #include "vart/PositionController.hpp"
 #include "vart/util/Range.hpp"
 
@@ -43,6 +46,8 @@ namespace vart {
         double speed_set{settings.default_speed};
         /// Заданное ускорение
         double accel_set{settings.default_accel};
+        /// Скорость в конце предыдущего перемещения (Начальная скорость следующего)
+        double junction_speed{0};
         /// Контроллер позиции
         PositionController controller;
 
@@ -71,6 +76,7 @@ namespace vart {
 
         /// Перейти в позицию
         void moveTo(Vector2D position) {
+            junction_speed = 0;
 
             switch (mode) {
                 case Mode::Position:
@@ -85,6 +91,16 @@ namespace vart {
             }
         }
 
+        /// Перейти в позицию, закончив перемещение с заданной скоростью (Скорость рассчитана с упреждением)
+        void moveTo(Vector2D position, double exit_speed) {
+            if (mode != Mode::Accel) {
+                moveTo(position);
+                return;
+            }
+
+            goPlanned(position, exit_speed);
+        }
+
     private:
 
         void goPosition(Vector2D target) {
@@ -149,5 +165,32 @@ namespace vart {
 
             controller.setTargetPosition(target);
         }
+
+        void goPlanned(Vector2D target, double exit_speed) {
+            const double delta_time = 0.001;
+            const double min_speed = 0.5;
+
+            Vector2D begin = controller.getCurrentPosition();
+            double path_len = target.distance(begin);
+            double velocity = junction_speed;
+            double passed = 0;
+
+            exit_speed = std::min(exit_speed, speed_set);
+
+            while (passed < path_len) {
+                // тормозной путь учитывает перемещение за текущий шаг
+                double step = accel_set * delta_time;
+                double braking_speed = std::sqrt(step * step + exit_speed * exit_speed + 2.0 * accel_set * (path_len - passed)) - step;
+
+                velocity = std::max(std::min({velocity + accel_set * delta_time, speed_set, braking_speed}), min_speed);
+                passed += velocity * delta_time;
+
+                controller.setTargetPosition(Vector2D::interpolate(begin, target, std::min(passed / path_len, 1.0)));
+                delay(1);
+            }
+
+            controller.setTargetPosition(target);
+            junction_speed = std::min(velocity, exit_speed);
+        }
     };
 }
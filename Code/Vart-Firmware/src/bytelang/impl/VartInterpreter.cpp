@@ -90,6 +90,19 @@ static Result set_active_tool(Reader &reader) {
     return Result::Ok;
 }
 
+//  8: [6B] vart::set_position_speed@8(std::i16, std::i16, std::u8)
+static Result set_position_speed(Reader &reader) {
+    i16 x, y;
+    u8 exit_speed;
+    if (isFail(reader.read(x))) { return Result::InstructionArgumentReadError; }
+    if (isFail(reader.read(y))) { return Result::InstructionArgumentReadError; }
+    if (isFail(reader.read(exit_speed))) { return Result::InstructionArgumentReadError; }
+
+    Device::getInstance().planner.moveTo({double(x), double(y)}, exit_speed);
+
+    return Result::Ok;
+}
+
 VartInterpreter &VartInterpreter::getInstance() {
     static VartInterpreter::Instruction instructions[] = {
         quit,
@@ -99,8 +112,9 @@ VartInterpreter &VartInterpreter::getInstance() {
         set_planner_mode,
         set_position,
         set_progress,
-        set_active_tool
+        set_active_tool,
+        set_position_speed
     };
-    static VartInterpreter instance(8, instructions);
+    static VartInterpreter instance(9, instructions);
     return instance;
 }
@@ -12,10 +12,20 @@ from dearpygui import dearpygui as dpg
 from figure.abc import Canvas
 from figure.impl.workarea import WorkAreaFigure
 from figure.registry import FigureRegistry
+from gen.agents import RecordingAgent
 from gen.enums import PlannerMode
 from gen.movementprofile import MovementProfile
+from gen.overlap import OverlapRemover
+from gen.partition import JobPartitioner
+from gen.scheduling import ToolScheduler
 from gen.settings import GeneratorSettings
+from gen.simulator import JobProgram
+from gen.simulator import JobSimulator
+from gen.trajectory import Trajectory
+from gen.welding import StrokeWelder
 from gen.writer import CodeWriter
+from loader.cache import MeshCache
+from loader.mesh import ContourMeshFigure
 from loader.mesh import LegacyMeshFigure
 from ui.application import Application
 from ui.widgets.custom.logger import LoggerWidget
@@ -34,8 +44,14 @@ class VARTApplication(Application):
         self._res_path = resources_path
 
         self._image_file_dialog = FileDialog(
-            "Укажите файл obj для вставки", self.onObjFileSelected,
-            (("obj", "Object"),),
+            "Укажите файл сетки для вставки", self.onObjFileSelected,
+            (("obj", "Object"), ("stl", "STL")),
+            resources_path / "res/obj"
+        )
+
+        self._contour_file_dialog = FileDialog(
+            "Укажите файл сетки для вставки сечениями", self.onContourFileSelected,
+            (("obj", "Object"), ("stl", "STL")),
             resources_path / "res/obj"
         )
 
@@ -45,6 +61,8 @@ class VARTApplication(Application):
             default_path=(resources_path / "res/out")
         )
 
+        self._mesh_cache = MeshCache(resources_path / "res/cache/mesh")
+
         self._work_area = WorkAreaFigure("Рабочая область")
 
         self._figure_registry = FigureRegistry(Canvas())
@@ -70,25 +88,72 @@ class VARTApplication(Application):
         # print(paths)
 
         for path in paths:
-            obj_figures = LegacyMeshFigure.load(path, self._figure_registry.onFigureDelete, self._figure_registry.onFigureClone)
+            obj_figures = LegacyMeshFigure.load(path, self._figure_registry.onFigureDelete, self._figure_registry.onFigureClone, self._mesh_cache)
 
             for obj in obj_figures:
                 self._figure_registry.add(obj)
 
+    def onContourFileSelected(self, paths: Sequence[Path]) -> None:
+        """Callback при открытии файла для вставки контурами сечений"""
+        for path in paths:
+            for figure in ContourMeshFigure.load(path, self._figure_registry.onFigureDelete, self._figure_registry.onFigureClone, self._mesh_cache):
+                self._figure_registry.add(figure)
+
     def _printTrajectories(self) -> None:
         self._logger.write("\n".join(map(str, self._figure_registry.getTrajectories())))
 
+    def _getExportTrajectories(self) -> list[Trajectory]:
+        """Траектории для экспорта (Без повторно рисуемых линий, сваренные в непрерывные штрихи)"""
+        trajectories, overlap_report = OverlapRemover(self._generator_settings.overlap_tolerance_um / 1000).remove(list(self._figure_registry.getTrajectories()))
+        self._logger.write(overlap_report.getMessage())
+
+        trajectories, weld_report = StrokeWelder(self._generator_settings.weld_tolerance).weld(trajectories)
+        self._logger.write(weld_report.getMessage())
+        return trajectories
+
     def _onWriteBytecode(self, output_path: Path) -> None:
+        if self._generator_settings.plotter_count > 1:
+            self._onWritePartitionedBytecode(output_path)
+            return
+
         with open(output_path, "wb") as bytecode_stream:
-            trajectories = self._figure_registry.getTrajectories()
+            scheduler = ToolScheduler(self._generator_settings)
+            trajectories, report = scheduler.schedule(self._getExportTrajectories())
+            self._logger.write(report.getMessage())
 
-            with open(Path(output_path).with_suffix(".txt"), "wt") as ir_stream:
-                result = self._bytecode_writer.run(ir_stream, trajectories, bytecode_stream)
+            # оценка времени печати по инструкциям, записанным во время экспорта
+            recorder = RecordingAgent()
+
+            if self._generator_settings.write_ir_text:
+                with open(Path(output_path).with_suffix(".txt"), "wt") as ir_stream:
+                    result = self._bytecode_writer.run(ir_stream, trajectories, bytecode_stream, recorder=recorder)
+
+            else:
+                result = self._bytecode_writer.run(None, trajectories, bytecode_stream, recorder=recorder)
 
             self._logger.write(result.getMessage())
 
+            if result.isOK():
+                self._logger.write(JobSimulator.simulate(JobProgram.fromRecording(recorder, trajectories)).getMessage())
+
+    def _onWritePartitionedBytecode(self, output_path: Path) -> None:
+        partitioner = JobPartitioner(self._generator_settings, self._generator_settings.plotter_count, self._generator_settings.getPlotterTools())
+
+        try:
+            jobs, report = partitioner.partition(self._getExportTrajectories())
+
+        except ValueError as e:
+            self._logger.write(f"Partition failed : {e}")
+            return
+
+        self._logger.write(report.getMessage())
+
+        for message in partitioner.write(jobs, output_path, self._res_path / "res/bytelang"):
+            self._logger.write(message)
+
     def build(self) -> None:
         self._image_file_dialog.build()
+        self._contour_file_dialog.build()
         self._export_file_dialog.build()
 
         self._buildMenuBar()
@@ -120,6 +185,7 @@ class VARTApplication(Application):
             (
                 Menu("Файл").place()
                 .add(Button("Открыть", self._image_file_dialog.show))
+                .add(Button("Открыть сечениями", self._contour_file_dialog.show))
                 .add(Button("Экспорт", self._export_file_dialog.show))
             )
 
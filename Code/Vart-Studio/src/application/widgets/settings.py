@@ -2,9 +2,11 @@ from gen.movementprofile import MovementProfile
 from gen.settings import GeneratorSettings
 from ui.widgets.abc import ItemID
 from ui.widgets.custom.input2d import InputInt2D
+from ui.widgets.dpg.impl import Checkbox
 from ui.widgets.dpg.impl import CollapsingHeader
 from ui.widgets.dpg.impl import InputInt
 from ui.widgets.dpg.impl import SliderInt
+from ui.widgets.dpg.impl import TextInput
 
 
 class ProfileWidget(CollapsingHeader):
@@ -44,6 +46,45 @@ class CodeGeneratorSettngsWidget(CollapsingHeader):
     def _updateEpilogueEndPosition(self, x: tuple[int, int]):
         self.settings.epilogue_end_position = x
 
+    def _updatePenLiftTimeout(self, x: int):
+        self.settings.pen_lift_timeout_ms = x
+
+    def _updatePenLowerTimeout(self, x: int):
+        self.settings.pen_lower_timeout_ms = x
+
+    def _updatePenDownMaxGap(self, x: int):
+        self.settings.pen_down_max_gap = max(x, 0)
+
+    def _updatePenDownMaxRetrace(self, x: int):
+        self.settings.pen_down_max_retrace = max(x, 0)
+
+    def _updateAutoLongLineLength(self, x: int):
+        self.settings.auto_long_line_length = max(x, 1)
+
+    def _updateAutoMicroLength(self, x: int):
+        self.settings.auto_micro_length = max(x, 0)
+
+    def _updateJunctionDeviation(self, x: int):
+        self.settings.junction_deviation_um = max(x, 0)
+
+    def _updateOrderingTimeBudget(self, x: int):
+        self.settings.ordering_time_budget_ms = max(x, 0)
+
+    def _updateOverlapTolerance(self, x: int):
+        self.settings.overlap_tolerance_um = max(x, 0)
+
+    def _updateWeldTolerance(self, x: int):
+        self.settings.weld_tolerance = max(x, 0)
+
+    def _updatePlotterCount(self, x: int):
+        self.settings.plotter_count = max(x, 1)
+
+    def _updatePlotterTools(self, x: str):
+        self.settings.plotter_tools = tuple(int(part) for part in x.replace(",", " ").split() if part.isdigit())
+
+    def _updateWriteIrText(self, x: bool):
+        self.settings.write_ir_text = x
+
     def placeRaw(self, parent_id: ItemID) -> None:
         super().placeRaw(parent_id)
         self.add(ProfileWidget(self.settings.free_move_profile))
@@ -65,12 +106,89 @@ class CodeGeneratorSettngsWidget(CollapsingHeader):
             width=w, step=50, step_fast=100,
             default_value=self.settings.tool_change_end_timeout_ms
         ))
+        self.add(InputInt(
+            "Тайм-аут после подъёма пера",
+            self._updatePenLiftTimeout,
+            width=w, step=50, step_fast=100,
+            default_value=self.settings.pen_lift_timeout_ms
+        ))
+        self.add(InputInt(
+            "Тайм-аут после опускания пера",
+            self._updatePenLowerTimeout,
+            width=w, step=50, step_fast=100,
+            default_value=self.settings.pen_lower_timeout_ms
+        ))
+        self.add(InputInt(
+            "Разрыв без подъёма пера",
+            self._updatePenDownMaxGap,
+            width=w, step=1, step_fast=5,
+            default_value=self.settings.pen_down_max_gap
+        ))
+        self.add(InputInt(
+            "Переход по линии без подъёма пера",
+            self._updatePenDownMaxRetrace,
+            width=w, step=5, step_fast=20,
+            default_value=self.settings.pen_down_max_retrace
+        ))
         self.add(InputInt(
             "Тайм-аут Перед завершением рисования",
             self._updateEpilogueStopDuration,
             width=w, step=50, step_fast=100,
             default_value=self.settings.epilogue_stop_duration_ms
         ))
+        self.add(InputInt(
+            "Авто профиль: длина длинной линии",
+            self._updateAutoLongLineLength,
+            width=w, step=1, step_fast=10,
+            default_value=self.settings.auto_long_line_length
+        ))
+        self.add(InputInt(
+            "Авто профиль: длина малого отрезка",
+            self._updateAutoMicroLength,
+            width=w, step=1, step_fast=5,
+            default_value=self.settings.auto_micro_length
+        ))
+        self.add(InputInt(
+            "Отклонение на стыке отрезков (мкм)",
+            self._updateJunctionDeviation,
+            width=w, step=10, step_fast=50,
+            default_value=self.settings.junction_deviation_um
+        ))
+        self.add(InputInt(
+            "Бюджет оптимизации порядка (мс)",
+            self._updateOrderingTimeBudget,
+            width=w, step=100, step_fast=1000,
+            default_value=self.settings.ordering_time_budget_ms
+        ))
+        self.add(InputInt(
+            "Допуск совпадения линий (мкм)",
+            self._updateOverlapTolerance,
+            width=w, step=100, step_fast=500,
+            default_value=self.settings.overlap_tolerance_um
+        ))
+        self.add(InputInt(
+            "Допуск сварки концов траекторий",
+            self._updateWeldTolerance,
+            width=w, step=1, step_fast=5,
+            default_value=self.settings.weld_tolerance
+        ))
+        self.add(InputInt(
+            "Количество плоттеров",
+            self._updatePlotterCount,
+            width=w, step=1, step_fast=1,
+            default_value=self.settings.plotter_count
+        ))
+        self.add(TextInput(
+            on_change=self._updatePlotterTools,
+            label="Инструменты плоттеров (1 - левый, 2 - правый, 3 - оба)",
+            width=w,
+            default_value=", ".join(map(str, self.settings.plotter_tools))
+        ))
+        self.add(Checkbox(
+            self._updateWriteIrText,
+            label="Записывать текстовое представление (.txt)",
+            default_value=self.settings.write_ir_text
+        ))
         self.add(InputInt2D(
             "Конечная позиция",
             self._updateEpilogueEndPosition,
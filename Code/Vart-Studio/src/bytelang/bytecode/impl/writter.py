@@ -25,6 +25,23 @@ class ByteCodeWriter:
         self.__checkProgram(out, profile)
         return out.getBytesWritten()
 
+    def runPacked(self, instructions: bytes, program_data: ProgramData, bytecode_output_stream: BinaryIO) -> int:
+        """
+        Записать программу из уже запакованных инструкций
+        :param instructions: Блок инструкций (Индекс инструкции и аргументы каждой инструкции подряд)
+        :param program_data: Данные программы
+        :param bytecode_output_stream: Выход байт-кода
+        :return: Размер программы в байтах
+        """
+        out = CountingStream(bytecode_output_stream)
+
+        self.__writeStartBlock(out, program_data)
+        self.__writeVariablesBlock(out, program_data)
+        out.write(instructions)
+
+        self.__checkProgram(out, program_data.environment.profile)
+        return out.getBytesWritten()
+
     def __writeStartBlock(self, out: CountingStream, program_data: ProgramData) -> None:
         try:
             program_start_data = program_data.environment.profile.pointer_heap.write(program_data.start_address)
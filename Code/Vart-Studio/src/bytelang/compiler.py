@@ -5,8 +5,10 @@ from pathlib import Path
 from typing import BinaryIO
 from typing import TextIO
 
+from bytelang.bytecode.abc import ProgramData
 from bytelang.bytecode.impl.gen import CodeGenerator
 from bytelang.bytecode.impl.writter import ByteCodeWriter
+from bytelang.content.impl.environments import Environment
 from bytelang.content.impl.environments import EnvironmentsRegistry
 from bytelang.content.impl.packages import PackageRegistry
 from bytelang.content.impl.primitives import PrimitivesRegistry
@@ -44,6 +46,14 @@ class ByteLangCompiler:
         self.__primitives_registry = primitives_registry
         self.__environment_registry = environment_registry
 
+    def getEnvironment(self, name: str) -> Environment:
+        """
+        Получить окружение
+        :param name: Имя окружения
+        :return: Окружение (Инструкции и профиль виртуальной машины)
+        """
+        return self.__environment_registry.get(name)
+
     def compile(self, source_input_stream: TextIO, bytecode_output_stream: BinaryIO, log_flags: LogFlag = LogFlag.ALL) -> CompileResult:
         """
         Скомпилировать исходный код из источника в байт-код на выходе
@@ -77,3 +87,25 @@ class ByteLangCompiler:
         compilation_time_seconds = time.time() - start_time
 
         return CompileResultOK(source_input_stream, bytecode_output_stream, log_flags, statements, instructions, program_data, program_size, compilation_time_seconds)
+
+    def compilePacked(self, environment: Environment, instructions: bytes, bytecode_output_stream: BinaryIO, log_flags: LogFlag = LogFlag.ALL) -> CompileResult:
+        """
+        Записать байт-код из уже запакованных инструкций (Без разбора исходного кода)
+        :param environment: Окружение, инструкциями которого запакован блок
+        :param instructions: Блок инструкций
+        :param bytecode_output_stream: Выход байт-кода
+        :param log_flags: Уровень отображения сообщения компиляции
+        :return: Результат компиляции
+        """
+        start_time = time.time()
+
+        errors_handler = ErrorHandler()
+        program_data = ProgramData(environment=environment, start_address=environment.profile.pointer_heap.size, variables=(), constants={}, marks={})
+        program_size = ByteCodeWriter(errors_handler).runPacked(instructions, program_data, bytecode_output_stream)
+
+        if not errors_handler.isSuccess():
+            return CompileResultError(None, bytecode_output_stream, errors_handler)
+
+        compilation_time_seconds = time.time() - start_time
+
+        return CompileResultOK(None, bytecode_output_stream, log_flags, (), (), program_data, program_size, compilation_time_seconds)
@@ -1,8 +1,6 @@
 from __future__ import annotations
-from __future__ import annotations
 
 import re
-from dataclasses import dataclass
 from typing import Callable
 from typing import ClassVar
 from typing import Optional
@@ -10,61 +8,118 @@ from typing import Optional
 from bytelang.bytecode.abc import Regex
 from bytelang.bytecode.abc import Statement
 from bytelang.bytecode.abc import StatementType
-
 from bytelang.bytecode.abc import UniversalArgument
 from bytelang.core.handlers.errors import BasicErrorHandler
 from bytelang.core.parsers.abc import Parser
 
 
-@dataclass(frozen=True)
-class Matcher:
-    __pattern: str
-    __handler: Callable[[str], UniversalArgument]
+def _alternative(patterns: dict[str, str]) -> re.Pattern:
+    """Скомпилировать альтернативу именованных групп из выражений лексем (Якоря ^ и $ снимаются, порядок групп - приоритет)"""
+    return re.compile("|".join(
+        f"(?P<{name}>{'|'.join(branch.removeprefix('^').removesuffix('$') for branch in pattern.split('|'))})"
+        for name, pattern in patterns.items()
+    ))
+
+
+class Lexer:
+    """
+    Лексер выражения
+    Вид лексемы определяется одним сопоставлением с заранее скомпилированной альтернативой
+    именованных групп вместо перебора выражений, значения аргументов кэшируются
+    """
+
+    ARGUMENTS_CACHE_SIZE: ClassVar[int] = 1 << 16
+    """Наибольшее количество кэшируемых значений аргументов (И отдельно - видов выражения)"""
+
+    __ARGUMENT: ClassVar[re.Pattern] = _alternative({
+        "integer": Regex.INTEGER,
+        "bin": Regex.BIN_VALUE,
+        "oct": Regex.OCT_VALUE,
+        "hex": Regex.HEX_VALUE,
+        "exponent": Regex.EXPONENT,
+        "char": Regex.CHAR,
+        "identifier": Regex.IDENTIFIER,
+    })
+    """Альтернатива видов аргумента"""
+
+    __CONVERTERS: ClassVar[dict[str, Callable[[str], UniversalArgument]]] = {
+        "integer": lambda s: UniversalArgument.fromInteger(int(s, 10)),
+        "bin": lambda s: UniversalArgument.fromInteger(int(s, 2)),
+        "oct": lambda s: UniversalArgument.fromInteger(int(s, 8)),
+        "hex": lambda s: UniversalArgument.fromInteger(int(s, 16)),
+        "exponent": lambda s: UniversalArgument.fromExponent(float(s)),
+        "char": lambda s: UniversalArgument.fromExponent(ord(s[1])),
+        "identifier": lambda s: UniversalArgument.fromName(s),
+    }
+    """Преобразование лексемы в значение по виду аргумента"""
+
+    __HEAD: ClassVar[re.Pattern] = _alternative({
+        statement_type.name: statement_type.value.replace(Regex.NAME, f"(?P<{statement_type.name}_NAME>{Regex.NAME})", 1)
+        for statement_type in StatementType
+    })
+    """Альтернатива видов выражения (Имя выделено группой <Вид>_NAME)"""
+
+    def __init__(self) -> None:
+        self.__arguments = dict[str, UniversalArgument]()
+        self.__heads = dict[str, tuple[StatementType, str]]()
+
+    def head(self, lexeme: str) -> tuple[StatementType, str] | tuple[None, None]:
+        """
+        Определить вид выражения по первой лексеме
+        :return: Вид выражения и имя (Директивы, метки или инструкции)
+        """
+        if (ret := self.__heads.get(lexeme)) is not None:
+            return ret
+
+        if (m := self.__HEAD.fullmatch(lexeme)) is None:
+            return None, None
 
-    def process(self, lexeme: str) -> Optional[UniversalArgument]:
-        if re.match(self.__pattern, lexeme):
-            return self.__handler(lexeme)
+        statement_type = StatementType[m.lastgroup]
+        ret = statement_type, m.group(f"{statement_type.name}_NAME")
+
+        if len(self.__heads) < self.ARGUMENTS_CACHE_SIZE:
+            self.__heads[lexeme] = ret
+
+        return ret
+
+    def argument(self, lexeme: str) -> Optional[UniversalArgument]:
+        """Получить значение аргумента (None - запись не распознана)"""
+        if (ret := self.__arguments.get(lexeme)) is not None:
+            return ret
+
+        if (m := self.__ARGUMENT.fullmatch(lexeme)) is None:
+            return None
+
+        ret = self.__CONVERTERS[m.lastgroup](lexeme)
+
+        if len(self.__arguments) < self.ARGUMENTS_CACHE_SIZE:
+            self.__arguments[lexeme] = ret
+
+        return ret
 
 
 class StatementParser(Parser[Statement]):
-    __MATCHERS: ClassVar[tuple[Matcher, ...]] = (
-        Matcher(Regex.INTEGER, lambda s: UniversalArgument.fromInteger(int(s, 10))),
-        Matcher(Regex.BIN_VALUE, lambda s: UniversalArgument.fromInteger(int(s, 2))),
-        Matcher(Regex.OCT_VALUE, lambda s: UniversalArgument.fromInteger(int(s, 8))),
-        Matcher(Regex.HEX_VALUE, lambda s: UniversalArgument.fromInteger(int(s, 16))),
-        Matcher(Regex.EXPONENT, lambda s: UniversalArgument.fromExponent(float(s))),
-        Matcher(Regex.CHAR, lambda s: UniversalArgument.fromExponent(ord(s[1]))),
-        Matcher(Regex.IDENTIFIER, lambda s: UniversalArgument.fromName(s)),
-    )
 
     def __init__(self, error_handler: BasicErrorHandler):
         self.__err = error_handler.getChild(self.__class__.__name__)
+        self.__lexer = Lexer()
 
     def _parseLine(self, index: int, line: str) -> Optional[Statement]:
         first, *lexemes = line.split()
 
-        self.__err.begin()
-
-        args = tuple(self.__matchStatementArg(lexeme, i, index, line) for i, lexeme in enumerate(lexemes))
-        _type, head = self.__matchStatementType(first, index, line)
+        args = tuple(map(self.__lexer.argument, lexemes))
+        _type, head = self.__lexer.head(first)
 
-        if self.__err.isFailed():
+        if _type is None or any(arg is None for arg in args):
+            self.__writeErrors(index, line, first, lexemes, args)
             return
 
         return Statement(type=_type, line=line, index=index, head=head, arguments=args)
 
-    def __matchStatementType(self, lexeme: str, index: int, line_source: str) -> tuple[StatementType, str] | tuple[None, None]:
-        for statement_type in StatementType:
-            if m := re.fullmatch(statement_type.value, lexeme):
-                w = re.search(Regex.NAME, m.string)
-                return statement_type, w.string[w.start():w.end()]
-
-        self.__err.writeLineAt(line_source, index, f"Не удалось определить тип выражения: '{lexeme}'")
-        return None, None
-
-    def __matchStatementArg(self, lexeme: str, i: int, line_index: int, line_source: str) -> Optional[UniversalArgument]:
-        for matcher in self.__MATCHERS:
-            if ret := matcher.process(lexeme):
-                return ret
+    def __writeErrors(self, index: int, line: str, first: str, lexemes: list[str], args: tuple[Optional[UniversalArgument], ...]) -> None:
+        for i, (lexeme, arg) in enumerate(zip(lexemes, args)):
+            if arg is None:
+                self.__err.writeLineAt(line, index, f"Запись Аргумента ({i}) '{lexeme}' не распознана")
 
-        self.__err.writeLineAt(line_source, line_index, f"Запись Аргумента ({i}) '{lexeme}' не распознана")
+        if self.__lexer.head(first)[0] is None:
+            self.__err.writeLineAt(line, index, f"Не удалось определить тип выражения: '{first}'")
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from typing import BinaryIO
+from typing import Optional
 from typing import TextIO
 
 
@@ -9,7 +10,8 @@ from typing import TextIO
 class CompileResult:
     """Результат работы компилятора ByteLang"""
 
-    source_stream: TextIO
+    source_stream: Optional[TextIO]
+    """Источник исходного кода (None - программа записана из запакованных инструкций)"""
     bytecode_stream: BinaryIO
 
     def isOK(self) -> bool:
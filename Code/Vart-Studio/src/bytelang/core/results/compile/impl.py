@@ -36,7 +36,7 @@ class CompileResultOK(CompileResult):
         if LogFlag.PROFILE in self.flags:
             sb.append(ReprTool.title(f"profile : {env.profile.name}")).append(ReprTool.strDict(env.profile.__dict__, _repr=True))
 
-        if LogFlag.STATEMENTS in self.flags:
+        if LogFlag.STATEMENTS in self.flags and self.source_stream is not None:
             sb.append(ReprTool.headed(f"statements : {self.source_stream.name}", self.statements))
 
         if LogFlag.CONSTANTS in self.flags:
@@ -45,7 +45,7 @@ class CompileResultOK(CompileResult):
         if LogFlag.VARIABLES in self.flags:
             sb.append(ReprTool.headed("variables", self.program_data.variables))
 
-        if LogFlag.CODE_INSTRUCTIONS in self.flags:
+        if LogFlag.CODE_INSTRUCTIONS in self.flags and self.source_stream is not None:
             sb.append(ReprTool.headed(f"code instructions : {self.source_stream.name}", self.instructions))
 
         if LogFlag.BYTECODE in self.flags:
@@ -7,7 +7,9 @@ from abc import abstractmethod
 from typing import Callable
 from typing import ClassVar
 from typing import Iterable
-from typing import Optional
+from typing import Sequence
+
+import numpy as np
 
 from figure.abc import Canvas
 from figure.abc import Figure
@@ -55,7 +57,7 @@ class TransformableFigure[T: "TransformableFigure"](Figure):
         self._on_delete = on_delete
         self._on_clone = on_clone
 
-        self._planner_mode_input = InputInt("Режим планировщика", value_range=(0, 2), default_value=2)
+        self._planner_mode_input = InputInt("Режим планировщика (3 - авто)", value_range=(0, Trajectory.AUTO_PLANNER_MODE), default_value=2)
 
         self._tool_id_input = InputInt("Инструмент", self.__updateDisplayColor, value_range=(1, 2), default_value=1, width=self.INPUT_WIDTH)
 
@@ -129,43 +131,61 @@ class TransformableFigure[T: "TransformableFigure"](Figure):
         position_x, position_y = self.getPosition()
         self._size_point.setValue((position_x + size_x, position_y + size_y))
 
-    def toTrajectory(self) -> Optional[Trajectory]:
-        """Конвертировать фигуру в траекторию"""
+    def toTrajectories(self) -> Sequence[Trajectory]:
+        """Конвертировать фигуру в траектории (По одной на каждый штрих)"""
 
         if not self._export_checkbox.getValue():
-            return
-
-        x, y = self.getTransformedVertices()
-        return Trajectory(
-            name=self._name,
-            x_positions=x,
-            y_positions=y,
-            tool=self._tool_id_input.getValue(),
-            planner_mode=self._planner_mode_input.getValue()
+            return ()
+
+        strokes = VertexGenerator.splitStrokes(*self.getTransformedVertices())
+
+        return tuple(
+            Trajectory(
+                name=self._name if len(strokes) == 1 else f"{self._name} [{index}]",
+                x_positions=x,
+                y_positions=y,
+                tool=self._tool_id_input.getValue(),
+                planner_mode=self._planner_mode_input.getValue()
+            )
+            for index, (x, y) in enumerate(strokes)
         )
 
     def _getTransformedVertices(self, in_v: tuple[Iterable[float], Iterable[float]]):
-        transformed_x = list[int]()
-        transformed_y = list[int]()
+        x = np.asarray(in_v[0], dtype=np.float64)
+        y = np.asarray(in_v[1], dtype=np.float64)
 
         size_x, size_y = self.getSize()
         position_x, position_y = self.getPosition()
 
-        sin_angle = self.__sin_angle
-        cos_angle = self.__cos_angle
+        x = x * size_x
+        y = y * size_y
+
+        new_x = np.trunc(self.__cos_angle * x - self.__sin_angle * y + position_x)
+        new_y = np.trunc(self.__sin_angle * x + self.__cos_angle * y + position_y)
+
+        # разрывы штрихов: без повторов и без разрыва в начале
+        is_break = np.isnan(new_x)
+        previous_break = np.concatenate(((True,), is_break[:-1]))
+        leading = np.cumsum(~is_break) == 0
+
+        # совпадающие подряд точки
+        repeated = np.zeros(len(new_x), dtype=bool)
+        repeated[1:] = (new_x[1:] == new_x[:-1]) & (new_y[1:] == new_y[:-1])
 
-        for x, y in zip(*in_v):
-            x *= size_x
-            y *= size_y
+        keep = ~(repeated | (is_break & (previous_break | leading)))
+        new_x = new_x[keep]
+        new_y = new_y[keep]
+        breaks = np.flatnonzero(is_break[keep]).tolist()
 
-            new_x = int(cos_angle * x - sin_angle * y + position_x)
-            new_y = int(sin_angle * x + cos_angle * y + position_y)
+        new_x[breaks] = 0
+        new_y[breaks] = 0
 
-            if len(transformed_x) > 0 and (new_x == transformed_x[-1]) and (new_y == transformed_y[-1]):
-                continue
+        transformed_x = new_x.astype(np.int64).tolist()
+        transformed_y = new_y.astype(np.int64).tolist()
 
-            transformed_x.append(new_x)
-            transformed_y.append(new_y)
+        for index in breaks:
+            transformed_x[index] = VertexGenerator.STROKE_BREAK
+            transformed_y[index] = VertexGenerator.STROKE_BREAK
 
         return transformed_x, transformed_y
 
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from math import hypot
+from itertools import chain
 from typing import Iterable
 from typing import Sequence
 
@@ -11,8 +11,8 @@ from figure.impl.generative import PolygonFigure
 from figure.impl.generative import RectFigure
 from figure.impl.generative import SpiralFigure
 from figure.impl.transformable import TransformableFigure
+from gen.ordering import EndpointSequencer
 from gen.trajectory import Trajectory
-from tools import greedySort
 
 
 class FigureRegistry:
@@ -73,9 +73,4 @@ class FigureRegistry:
 
     def getTrajectories(self) -> Iterable[Trajectory]:
         """Получить все траектории"""
-        def _k(t1: Trajectory, t2: Trajectory) -> float:
-            x1, y1 = t1.centroid()
-            x2, y2 = t2.centroid()
-            return hypot(x1 - x2, y1 - y2)
-
-        return greedySort(list(filter(None.__ne__, (figure.toTrajectory() for figure in self.getFigures()))), _k)
+        return EndpointSequencer.sequence(list(chain.from_iterable(figure.toTrajectories() for figure in self.getFigures())))
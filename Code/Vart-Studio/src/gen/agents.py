@@ -1,69 +1,209 @@
+from abc import ABC
+from abc import abstractmethod
 from dataclasses import dataclass
-from math import hypot
+from dataclasses import field
+from struct import Struct
+from struct import error
+from typing import ClassVar
 from typing import Optional
 from typing import TextIO
 
+import numpy as np
+
+from bytelang.content.impl.environments import Environment
 from gen.enums import MarkerTool
 from gen.enums import PlannerMode
+from gen.enums import VartInstruction
 from gen.movementprofile import MovementProfile
+from gen.penlift import PenLiftPolicy
 from gen.settings import GeneratorSettings
 
 
-@dataclass(frozen=True)
-class LowLevelAgent:
+class LowLevelAgent(ABC):
     """Низкоуровневый агент"""
 
-    _stream: TextIO
-    """Используемый поток для вывода"""
+    ENVIRONMENT: ClassVar[str] = "vart_esp32"
+    """Окружение bytelang, для которого генерируются инструкции"""
 
     def prelude(self) -> None:
         """Записать прелюдию"""
-        self._write(".env vart_esp32")
 
     def comment(self, message: str) -> None:
         """Добавить информативный коментарий"""
-        self._write(f"# {f"<<< {message} >>>":-^80} #")
 
     def note(self, message: str) -> None:
         """Добавить заметку"""
-        self._write(f"# Note: {message}")
 
     def quit(self) -> None:
         """завершить работу"""
-        self._write("quit")
+        self._instruction(VartInstruction.QUIT)
 
     def delay_ms(self, ms: int) -> None:
         """Временная задержка"""
-        self._write(f"delay_ms {ms}")
+        self._instruction(VartInstruction.DELAY_MS, ms)
 
     def set_speed(self, speed: int) -> None:
         """Установить скорость перемещения"""
-        self._write(f"set_speed {speed}")
+        self._instruction(VartInstruction.SET_SPEED, speed)
 
     def set_accel(self, accel: int) -> None:
         """Установить ускорение"""
-        self._write(f"set_accel {accel}")
+        self._instruction(VartInstruction.SET_ACCEL, accel)
 
     def set_planner_mode(self, mode: PlannerMode) -> None:
         """Установить режим планировщика"""
-        self._write(f"set_planner_mode {int(mode)}")
+        self._instruction(VartInstruction.SET_PLANNER_MODE, int(mode))
 
     def set_position(self, x: int, y: int) -> None:
         """Установить (Переместиться) позицию"""
-        self._write(f"set_position {x} {y}")
+        self._instruction(VartInstruction.SET_POSITION, x, y)
+
+    def set_position_speed(self, x: int, y: int, speed: int) -> None:
+        """Переместиться в позицию, закончив перемещение с заданной скоростью"""
+        self._instruction(VartInstruction.SET_POSITION_SPEED, x, y, speed)
 
     def set_progress(self, progress: int) -> None:
         """Установить значение прогресса"""
-        self._write(f"set_progress {progress}")
+        self._instruction(VartInstruction.SET_PROGRESS, progress)
 
     def set_active_tool(self, tool: MarkerTool) -> None:
         """Установить активный инструмент"""
-        self._write(f"set_active_tool {int(tool)}")
+        self._instruction(VartInstruction.SET_ACTIVE_TOOL, int(tool))
+
+    @abstractmethod
+    def _instruction(self, instruction: VartInstruction, *arguments: int) -> None:
+        """Записать инструкцию"""
+
+
+@dataclass(frozen=True)
+class TextAgent(LowLevelAgent):
+    """Агент текстового промежуточного представления"""
+
+    _stream: TextIO
+    """Используемый поток для вывода"""
+
+    def prelude(self) -> None:
+        self._write(f".env {self.ENVIRONMENT}")
+
+    def comment(self, message: str) -> None:
+        self._write(f"# {f"<<< {message} >>>":-^80} #")
+
+    def note(self, message: str) -> None:
+        self._write(f"# Note: {message}")
+
+    def _instruction(self, instruction: VartInstruction, *arguments: int) -> None:
+        self._write(" ".join((instruction.name.lower(), *map(str, arguments))))
 
     def _write(self, ins: str) -> None:
         self._stream.write(f"{ins}\n")
 
 
+class BinaryAgent(LowLevelAgent):
+    """
+    Агент, упаковывающий инструкции сразу в байт-код
+    Инструкции окружения разрешаются один раз при создании: каждая инструкция пакуется одной структурой
+    (Индекс и аргументы) в буфер, без текстового представления и его разбора
+    """
+
+    def __init__(self, environment: Environment) -> None:
+        """
+        :param environment: Окружение, инструкциями которого пакуется байт-код
+        """
+        self._buffer = bytearray()
+        self._packers = tuple(self.__packer(environment, instruction) for instruction in VartInstruction)
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def bytecode(self) -> bytes:
+        """Блок запакованных инструкций"""
+        return bytes(self._buffer)
+
+    def _instruction(self, instruction: VartInstruction, *arguments: int) -> None:
+        index, packer = self._packers[instruction]
+
+        try:
+            self._buffer += packer.pack(index, *arguments)
+
+        except error as e:
+            raise ValueError(f"Cannot pack {instruction.name.lower()}{arguments}: {e}") from e
+
+    @staticmethod
+    def __packer(environment: Environment, instruction: VartInstruction) -> tuple[int, Struct]:
+        """Индекс инструкции в окружении и структура упаковки инструкции"""
+        name = instruction.name.lower()
+
+        if (env_instruction := environment.instructions.get(name)) is None:
+            raise ValueError(f"Environment {environment.name} has no instruction {name}")
+
+        if any(argument.pointing_type is not None for argument in env_instruction.arguments):
+            raise ValueError(f"Pointer arguments are not supported: {env_instruction}")
+
+        # "=": порядок байт и размеры как у отдельных примитивов, без выравнивания между полями
+        formats = (environment.profile.instruction_index.packer.format, *(argument.primitive_type.packer.format for argument in env_instruction.arguments))
+        return env_instruction.index, Struct("=" + "".join(formats))
+
+
+@dataclass(frozen=True)
+class TeeAgent(LowLevelAgent):
+    """Агент, передающий вывод нескольким агентам"""
+
+    _agents: tuple[LowLevelAgent, ...]
+    """Агенты, получающие вывод"""
+
+    def prelude(self) -> None:
+        for agent in self._agents:
+            agent.prelude()
+
+    def comment(self, message: str) -> None:
+        for agent in self._agents:
+            agent.comment(message)
+
+    def note(self, message: str) -> None:
+        for agent in self._agents:
+            agent.note(message)
+
+    def _instruction(self, instruction: VartInstruction, *arguments: int) -> None:
+        for agent in self._agents:
+            agent._instruction(instruction, *arguments)
+
+
+class RecordingAgent(LowLevelAgent):
+    """Агент, записывающий инструкции в таблицу (Для моделирования задания без компиляции)"""
+
+    ARGUMENTS_MAX: ClassVar[int] = 3
+    """Наибольшее количество аргументов инструкции"""
+
+    def __init__(self) -> None:
+        self._opcodes = list[int]()
+        self._arguments = list[int]()
+        self._trajectory_bounds = list[int]()
+
+    def __len__(self) -> int:
+        return len(self._opcodes)
+
+    def markTrajectory(self) -> None:
+        """Отметить начало следующей траектории (После последней - конец последней)"""
+        self._trajectory_bounds.append(len(self._opcodes))
+
+    def trajectoryBounds(self) -> np.ndarray:
+        """Индексы первых инструкций отмеченных траекторий и конец последней"""
+        return np.array(self._trajectory_bounds, dtype=np.int64)
+
+    def opcodes(self) -> np.ndarray:
+        """Коды записанных инструкций (N,)"""
+        return np.array(self._opcodes, dtype=np.int8)
+
+    def arguments(self) -> np.ndarray:
+        """Аргументы записанных инструкций (N, ARGUMENTS_MAX), недостающие заполнены нулями"""
+        return np.array(self._arguments, dtype=np.float64).reshape(-1, self.ARGUMENTS_MAX)
+
+    def _instruction(self, instruction: VartInstruction, *arguments: int) -> None:
+        self._opcodes.append(instruction)
+        self._arguments.extend(arguments)
+        self._arguments.extend((0,) * (self.ARGUMENTS_MAX - len(arguments)))
+
+
 @dataclass
 class MacroAgent:
     """Макро Агент"""
@@ -89,6 +229,18 @@ class MacroAgent:
     _last_tool: Optional[MarkerTool] = None
     """Предыдущий цвет маркера"""
 
+    _last_marker: Optional[MarkerTool] = None
+    """Последний опускавшийся маркер"""
+
+    _position: Optional[tuple[int, int]] = None
+    """Текущая позиция"""
+
+    _pen_policy: PenLiftPolicy = field(init=False)
+    """Политика подъёма пера между траекториями"""
+
+    def __post_init__(self) -> None:
+        self._pen_policy = PenLiftPolicy(self._settings.pen_down_max_gap, self._settings.pen_down_max_retrace)
+
     def note(self, message: str) -> None:
         """Заметка"""
         self._agent.note(message)
@@ -113,22 +265,59 @@ class MacroAgent:
         self._agent.set_planner_mode(profile.mode)
 
     def setTool(self, tool: MarkerTool) -> None:
-        """Установить инструмент для печати"""
+        """
+        Установить инструмент для печати
+        Подъём и опускание того же маркера ждут свои (Более короткие) паузы, смена маркера - полные
+        """
         self._agent.comment(f"Set Tool: {tool}")
 
         if self._last_tool == tool:
             self._agent.note("Skip (Same color already active)")
             return
 
+        if tool == MarkerTool.NONE:
+            self._agent.set_active_tool(tool)
+            self._agent.delay_ms(self._settings.pen_lift_timeout_ms)
+
+        elif self._last_tool == MarkerTool.NONE and self._last_marker == tool:
+            self._agent.set_active_tool(tool)
+            self._agent.delay_ms(self._settings.pen_lower_timeout_ms)
+
+        else:
+            self._agent.delay_ms(self._settings.tool_change_begin_timeout_ms)
+            self._agent.set_active_tool(tool)
+            self._agent.delay_ms(self._settings.tool_change_end_timeout_ms)
+
+        if tool != MarkerTool.NONE:
+            self._last_marker = tool
+
         self._last_tool = tool
-        self._agent.delay_ms(self._settings.tool_change_begin_timeout_ms)
-        self._agent.set_active_tool(tool)
-        self._agent.delay_ms(self._settings.tool_change_end_timeout_ms)
 
-    def step(self, x: int, y: int) -> None:
-        """Сделать шаг (Перейти в позицию)"""
+    def travel(self, x: int, y: int, tool: MarkerTool) -> None:
+        """Перейти к началу следующей траектории (Перо поднимается, если политика не позволяет перейти с опущенным пером)"""
+        if self._position is not None and tool != MarkerTool.NONE and self._last_tool == tool and self._pen_policy.keepDown(self._position, (x, y)):
+            self._agent.note("Pen stays down")
+
+        else:
+            self.setProfile(self._settings.free_move_profile)
+            self.setTool(MarkerTool.NONE)
+
+        self.step(x, y)
+
+    def step(self, x: int, y: int, exit_speed: Optional[int] = None) -> None:
+        """Сделать шаг (Перейти в позицию, в режиме ускорения - с заданной скоростью в конце шага)"""
         self._current_step += 1
-        self._agent.set_position(x, y)
+
+        if exit_speed is None:
+            self._agent.set_position(x, y)
+
+        else:
+            self._agent.set_position_speed(x, y, exit_speed)
+
+        if self._position is not None and self._last_tool not in (None, MarkerTool.NONE):
+            self._pen_policy.draw(self._position, (x, y))
+
+        self._position = x, y
 
         current_progress = self._current_step * 100 // self._steps_total
         if current_progress != self._last_progress:
@@ -139,6 +328,8 @@ class MacroAgent:
     def epilogue(self) -> None:
         """Сгенерировать эпилог"""
         self._agent.comment("Epilogue - Begin")
+        self.setProfile(self._settings.free_move_profile)
+        self.setTool(MarkerTool.NONE)
         self._agent.delay_ms(self._settings.epilogue_stop_duration_ms)
         x, y = self._settings.epilogue_end_position
         self._agent.set_position(x, y)
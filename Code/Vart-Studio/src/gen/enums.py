@@ -26,3 +26,34 @@ class PlannerMode(IntEnum):
 
     ACCEL = 0x02
     """2 порядок (Со скоростью и ускорением)"""
+
+
+class VartInstruction(IntEnum):
+    """Инструкции пакета vart (Индекс совпадает с порядком объявления в пакете)"""
+
+    QUIT = 0x00
+    """Завершить работу"""
+
+    DELAY_MS = 0x01
+    """Временная задержка"""
+
+    SET_SPEED = 0x02
+    """Установить скорость перемещения"""
+
+    SET_ACCEL = 0x03
+    """Установить ускорение"""
+
+    SET_PLANNER_MODE = 0x04
+    """Установить режим планировщика"""
+
+    SET_POSITION = 0x05
+    """Установить (Переместиться) позицию"""
+
+    SET_PROGRESS = 0x06
+    """Установить значение прогресса"""
+
+    SET_ACTIVE_TOOL = 0x07
+    """Установить активный инструмент"""
+
+    SET_POSITION_SPEED = 0x08
+    """Переместиться в позицию, закончив перемещение с заданной скоростью"""
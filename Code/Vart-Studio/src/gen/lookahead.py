@@ -0,0 +1,175 @@
+"""Планирование скорости с упреждением"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from math import floor
+from math import hypot
+from math import sqrt
+from typing import ClassVar
+from typing import Sequence
+
+import numpy as np
+
+
+class LookAheadPlanner:
+    """
+    Планировщик скоростей на стыках отрезков
+    Предел скорости на стыке рассчитывается по отклонению от угла (Junction deviation),
+    затем ограничивается прямым проходом (Разгон от предыдущего стыка) и обратным (Торможение до следующего).
+    Скорости округляются вниз, а торможение рассчитывается по шагу устройства (PlannerModel.brakingSpeed):
+    устройство успевает затормозить до каждой заданной скорости
+    """
+
+    MAX_SPEED: ClassVar[int] = 255
+    """Наибольшая скорость, передаваемая инструкцией"""
+
+    def __init__(self, junction_deviation: float) -> None:
+        """
+        :param junction_deviation: Допустимое отклонение от вершины на стыке
+        """
+        self._junction_deviation = junction_deviation
+
+    def junctionLimits(self, x_positions: Sequence[int], y_positions: Sequence[int], speeds: Sequence[float], accels: Sequence[float]) -> np.ndarray:
+        """
+        Пределы скорости на концах отрезков без учёта разгона и торможения
+        :param x_positions: Позиции X вершин
+        :param y_positions: Позиции Y вершин
+        :param speeds: Предел скорости каждого отрезка
+        :param accels: Ускорение каждого отрезка
+        :return: Предел скорости в конце каждого отрезка (В конце последнего - остановка)
+        """
+        dx = np.diff(np.asarray(x_positions, dtype=np.float64))
+        dy = np.diff(np.asarray(y_positions, dtype=np.float64))
+        lengths = np.hypot(dx, dy)
+        speeds = np.asarray(speeds, dtype=np.float64)
+        accels = np.asarray(accels, dtype=np.float64)
+
+        ret = np.zeros(len(lengths))
+
+        if len(lengths) < 2:
+            return ret
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ux = dx / lengths
+            uy = dy / lengths
+
+            # cos угла между входящим и выходящим направлениями (1 - разворот, -1 - прямая)
+            cos_theta = np.clip(-(ux[:-1] * ux[1:] + uy[:-1] * uy[1:]), -1.0, 1.0)
+            sin_half = np.sqrt((1.0 - cos_theta) / 2)
+            accel = np.minimum(accels[:-1], accels[1:])
+            limits = np.sqrt(accel * self._junction_deviation * sin_half / (1.0 - sin_half))
+
+        limits = np.where(sin_half >= 1.0, np.inf, limits)
+        limits = np.minimum(limits, np.minimum(speeds[:-1], speeds[1:]))
+        valid = (lengths[:-1] > 0) & (lengths[1:] > 0)
+        ret[:-1] = np.where(valid, np.nan_to_num(limits, nan=0.0), 0.0)
+        return ret
+
+    def plan(self, x_positions: Sequence[int], y_positions: Sequence[int], speeds: Sequence[float], accels: Sequence[float]) -> list[int]:
+        """
+        Рассчитать скорости на концах отрезков
+        Траектория начинается и заканчивается остановкой
+        :return: Скорость в конце каждого отрезка
+        """
+        limits = self.junctionLimits(x_positions, y_positions, speeds, accels).tolist()
+        lengths = np.hypot(np.diff(np.asarray(x_positions, dtype=np.float64)), np.diff(np.asarray(y_positions, dtype=np.float64))).tolist()
+
+        velocity = 0.0
+
+        for i, (length, accel) in enumerate(zip(lengths, accels)):
+            velocity = min(limits[i], sqrt(velocity * velocity + 2 * accel * length))
+            limits[i] = velocity
+
+        ret = [0] * len(lengths)
+        velocity = 0
+
+        # обратный проход с уже округлёнными скоростями: округление не нарушает торможение
+        for i in range(len(lengths) - 1, -1, -1):
+            velocity = min(floor(limits[i]), self.MAX_SPEED, velocity)
+            ret[i] = velocity
+
+            velocity = floor(PlannerModel.brakingSpeed(velocity, accels[i], lengths[i]))
+
+        return ret
+
+
+@dataclass(frozen=True)
+class MotionTrace:
+    """Результат моделирования движения по отрезкам"""
+
+    duration_seconds: float
+    """Длительность движения"""
+
+    junction_speeds: tuple[float, ...]
+    """Достигнутая скорость в конце каждого отрезка"""
+
+    speed_excess: float
+    """Наибольшее превышение предела скорости"""
+
+    accel_excess: float
+    """Наибольшее превышение ускорения при разгоне или торможении"""
+
+    def isValid(self, tolerance: float = 1e-6) -> bool:
+        """Движение не превышает пределов скорости и ускорения"""
+        return self.speed_excess <= tolerance and self.accel_excess <= tolerance
+
+
+class PlannerModel:
+    """
+    Эталонная модель планировщика устройства в режиме ускорения (Planner::goPlanned)
+    Повторяет шаг интегрирования прошивки, чтобы проверить рассчитанный профиль скоростей
+    """
+
+    DELTA_TIME: ClassVar[float] = 0.001
+    """Шаг интегрирования (с)"""
+
+    MIN_SPEED: ClassVar[float] = 0.5
+    """Наименьшая скорость, с которой устройство доходит до цели"""
+
+    @classmethod
+    def brakingSpeed(cls, exit_speed: float, accel: float, distance: float) -> float:
+        """
+        Наибольшая скорость, с которой устройство успевает затормозить до exit_speed на пути distance
+        Учитывает путь, пройденный за текущий шаг: торможение по шагам не превышает заданного ускорения
+        """
+        step = accel * cls.DELTA_TIME
+        return sqrt(step * step + exit_speed * exit_speed + 2.0 * accel * max(distance, 0.0)) - step
+
+    @classmethod
+    def run(cls, x_positions: Sequence[int], y_positions: Sequence[int], exit_speeds: Sequence[float], speeds: Sequence[float], accels: Sequence[float]) -> MotionTrace:
+        """
+        Смоделировать движение по отрезкам
+        :param x_positions: Позиции X вершин
+        :param y_positions: Позиции Y вершин
+        :param exit_speeds: Заданная скорость в конце каждого отрезка
+        :param speeds: Предел скорости каждого отрезка
+        :param accels: Ускорение каждого отрезка
+        """
+        dt = cls.DELTA_TIME
+        velocity = 0.0
+        ticks = 0
+        speed_excess = 0.0
+        accel_excess = 0.0
+        reached = list[float]()
+
+        for i, (exit_speed, speed, accel) in enumerate(zip(exit_speeds, speeds, accels)):
+            length = hypot(x_positions[i + 1] - x_positions[i], y_positions[i + 1] - y_positions[i])
+            exit_speed = min(exit_speed, speed)
+            passed = 0.0
+
+            while passed < length:
+                new_velocity = max(min(velocity + accel * dt, speed, cls.brakingSpeed(exit_speed, accel, length - passed)), cls.MIN_SPEED)
+
+                # резкое торможение: тормозной путь оказался короче заданного профилем
+                if new_velocity > cls.MIN_SPEED:
+                    accel_excess = max(accel_excess, (velocity - new_velocity) / dt - accel)
+
+                speed_excess = max(speed_excess, new_velocity - speed)
+                velocity = new_velocity
+                passed += velocity * dt
+                ticks += 1
+
+            velocity = min(velocity, exit_speed)
+            reached.append(velocity)
+
+        return MotionTrace(ticks * dt, tuple(reached), speed_excess, accel_excess)
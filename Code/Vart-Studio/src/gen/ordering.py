@@ -0,0 +1,419 @@
+"""Упорядочивание траекторий"""
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from dataclasses import replace
+from math import hypot
+from random import Random
+from time import perf_counter
+from typing import ClassVar
+from typing import Optional
+from typing import Sequence
+
+import numpy as np
+
+from gen.spatial import SpatialGrid
+from gen.spatial import nearestNeighbours
+from gen.trajectory import Trajectory
+
+
+def travelLength(trajectories: Sequence[Trajectory]) -> float:
+    """Длина холостых перемещений между траекториями"""
+    return sum(hypot(a.end()[0] - b.start()[0], a.end()[1] - b.start()[1]) for a, b in zip(trajectories, trajectories[1:]))
+
+
+class EndpointSequencer:
+    """
+    Жадное упорядочивание траекторий по точкам входа
+    Незамкнутая траектория может быть пройдена в любом направлении, замкнутая - начата с любой вершины.
+    Каждый раз выбирается траектория с ближайшей к перу точкой входа, перо переходит в её точку выхода
+    """
+
+    LOOP_ENTRIES: ClassVar[int] = 32
+    """Наибольшее количество точек входа замкнутой траектории в индексе (Вершина выбирается точно после выбора траектории)"""
+
+    @classmethod
+    def sequence(cls, trajectories: Sequence[Trajectory], origin: tuple[float, float] = (0.0, 0.0)) -> list[Trajectory]:
+        """
+        Упорядочить и ориентировать траектории
+        :param trajectories: Траектории
+        :param origin: Начальная позиция пера
+        """
+        points = list[tuple[float, float]]()
+        owners = list[int]()
+        reverse = list[bool]()
+        entries = list[range]()
+
+        for index, trajectory in enumerate(trajectories):
+            first = len(points)
+
+            if trajectory.isClosed():
+                count = len(trajectory.x_positions) - 1
+                vertices = range(0, count, max(count // cls.LOOP_ENTRIES, 1))
+                points.extend((trajectory.x_positions[v], trajectory.y_positions[v]) for v in vertices)
+                reverse.extend(False for _ in vertices)
+
+            else:
+                points.extend((trajectory.start(), trajectory.end()))
+                reverse.extend((False, True))
+
+            owners.extend(index for _ in range(len(points) - first))
+            entries.append(range(first, len(points)))
+
+        grid = SpatialGrid(points)
+        pen = origin
+        ret = list[Trajectory]()
+
+        while len(grid):
+            entry = grid.nearest(*pen)
+            index = owners[entry]
+
+            for other in entries[index]:
+                grid.remove(other)
+
+            trajectory = trajectories[index]
+
+            if trajectory.isClosed():
+                trajectory = cls.rotateToward(trajectory, pen)
+
+            elif reverse[entry]:
+                trajectory = trajectory.reversed()
+
+            ret.append(trajectory)
+            pen = trajectory.end()
+
+        return ret
+
+    @staticmethod
+    def rotateToward(trajectory: Trajectory, before: Optional[tuple[float, float]], after: Optional[tuple[float, float]] = None) -> Trajectory:
+        """
+        Начать замкнутую траекторию с вершины, ближайшей к соседним позициям пера
+        :param trajectory: Замкнутая траектория
+        :param before: Позиция пера до траектории
+        :param after: Позиция, куда перо перейдёт после траектории
+        """
+        x = np.asarray(trajectory.x_positions[:-1], dtype=np.float64)
+        y = np.asarray(trajectory.y_positions[:-1], dtype=np.float64)
+        cost = np.zeros(len(x))
+
+        for point in (before, after):
+            if point is not None:
+                cost += np.hypot(x - point[0], y - point[1])
+
+        best = int(cost.argmin())
+        return trajectory if best == 0 else trajectory.rotated(best)
+
+    @classmethod
+    def rotateLoops(cls, trajectories: Sequence[Trajectory]) -> list[Trajectory]:
+        """Повернуть замкнутые траектории к соседям в заданном порядке"""
+        ret = list(trajectories)
+
+        for index, trajectory in enumerate(ret):
+            if trajectory.isClosed():
+                before = ret[index - 1].end() if index > 0 else None
+                after = ret[index + 1].start() if index + 1 < len(ret) else None
+                ret[index] = cls.rotateToward(trajectory, before, after)
+
+        return ret
+
+
+@dataclass(frozen=True)
+class TravelReport:
+    """Отчёт оптимизации порядка траекторий"""
+
+    travel_before: float
+    """Длина холостых перемещений до оптимизации"""
+
+    travel_after: float
+    """Длина холостых перемещений после оптимизации"""
+
+    moves: int
+    """Количество принятых улучшений"""
+
+    elapsed_seconds: float
+    """Затраченное время"""
+
+    converged: bool
+    """Достигнут локальный минимум (Иначе оптимизация остановлена по бюджету времени)"""
+
+    def getMessage(self) -> str:
+        """Получить сообщение отчёта"""
+        saved = self.travel_before - self.travel_after
+        percent = 100 * saved / self.travel_before if self.travel_before > 0 else 0.0
+        status = "converged" if self.converged else "time budget exhausted"
+        return (
+            f"Travel : {self.travel_before:.0f} -> {self.travel_after:.0f} (-{percent:.1f}%) "
+            f": {self.moves} moves in {self.elapsed_seconds:.2f} seconds ({status})"
+        )
+
+
+class _Tour:
+    """
+    Порядок обхода с префиксными суммами перемещений в прямом и обратном направлении
+    Данные хранятся по позициям обхода: для каждой позиции - текущие начало и конец элемента и они же
+    после разворота (Для неразворачиваемых элементов совпадают), поэтому разворот участка - перестановка срезов
+    """
+
+    def __init__(self, heads: np.ndarray, tails: np.ndarray, reversible: np.ndarray) -> None:
+        self.size = len(heads)
+        self.order = np.arange(self.size)
+        self.position = np.arange(self.size)
+        self.flipped = [False] * self.size
+
+        alternate_heads = np.where(reversible[:, None], tails, heads)
+        alternate_tails = np.where(reversible[:, None], heads, tails)
+
+        self._hx, self._hy = heads.T.tolist()
+        self._tx, self._ty = tails.T.tolist()
+        self._ahx, self._ahy = alternate_heads.T.tolist()
+        self._atx, self._aty = alternate_tails.T.tolist()
+        self._alternate_flipped = reversible.tolist()
+
+        self._forward = np.zeros(max(self.size, 1))
+        self._backward = np.zeros(max(self.size, 1))
+        self._refresh(0, self.size - 1)
+
+    def _lists(self) -> tuple[tuple[list, list], ...]:
+        """Пары списков по позициям: текущее значение и значение после разворота"""
+        return (
+            (self._hx, self._ahx), (self._hy, self._ahy),
+            (self._tx, self._atx), (self._ty, self._aty),
+            (self.flipped, self._alternate_flipped)
+        )
+
+    def _refresh(self, low: int, high: int) -> None:
+        """Пересчитать перемещения, затрагивающие позиции low..high, и префиксные суммы после них"""
+        low = max(low - 1, 0)
+        high = min(high + 1, self.size - 1)
+
+        if high <= low:
+            return
+
+        tx, ty = np.array(self._tx[low:high]), np.array(self._ty[low:high])
+        hx, hy = np.array(self._hx[low + 1:high + 1]), np.array(self._hy[low + 1:high + 1])
+        atx, aty = np.array(self._atx[low + 1:high + 1]), np.array(self._aty[low + 1:high + 1])
+        ahx, ahy = np.array(self._ahx[low:high]), np.array(self._ahy[low:high])
+
+        forward = self._forward[low] + np.cumsum(np.hypot(tx - hx, ty - hy))
+        backward = self._backward[low] + np.cumsum(np.hypot(atx - ahx, aty - ahy))
+
+        # суммы после изменённого участка сдвигаются на разность длин участка
+        self._forward[high + 1:] += forward[-1] - self._forward[high]
+        self._backward[high + 1:] += backward[-1] - self._backward[high]
+        self._forward[low + 1:high + 1] = forward
+        self._backward[low + 1:high + 1] = backward
+
+    def total(self) -> float:
+        """Суммарная длина перемещений"""
+        return float(self._forward[-1])
+
+    def at(self, index: int) -> int:
+        """Элемент на позиции (-1 за пределами обхода)"""
+        return int(self.order[index]) if 0 <= index < self.size else -1
+
+    def _cost(self, p: int, q: int, p_alternate: bool = False, q_alternate: bool = False) -> float:
+        """Перемещение от конца элемента на позиции p к началу элемента на позиции q (Граница обхода ничего не стоит)"""
+        if p < 0 or q < 0 or p >= self.size or q >= self.size:
+            return 0.0
+
+        tx, ty = (self._atx[p], self._aty[p]) if p_alternate else (self._tx[p], self._ty[p])
+        hx, hy = (self._ahx[q], self._ahy[q]) if q_alternate else (self._hx[q], self._hy[q])
+        return hypot(tx - hx, ty - hy)
+
+    def reverseDelta(self, i: int, j: int) -> float:
+        """Изменение длины при развороте позиций i..j"""
+        old = self._cost(i - 1, i) + float(self._forward[j] - self._forward[i]) + self._cost(j, j + 1)
+        new = self._cost(i - 1, j, q_alternate=True) + float(self._backward[j] - self._backward[i]) + self._cost(i, j + 1, p_alternate=True)
+        return new - old
+
+    def reverse(self, i: int, j: int) -> None:
+        """Развернуть позиции i..j"""
+        for current, alternate in self._lists():
+            current[i:j + 1], alternate[i:j + 1] = alternate[i:j + 1][::-1], current[i:j + 1][::-1]
+
+        self.order[i:j + 1] = self.order[i:j + 1][::-1].copy()
+        self.position[self.order[i:j + 1]] = np.arange(i, j + 1)
+        self._refresh(i, j)
+
+    def detachDelta(self, i: int, length: int) -> float:
+        """Изменение длины при удалении отрезка позиций [i, i + length) из обхода"""
+        last = i + length - 1
+        return self._cost(i - 1, last + 1) - self._cost(i - 1, i) - self._cost(last, last + 1)
+
+    def insertDelta(self, i: int, length: int, p: int, reverse: bool) -> float:
+        """Изменение длины при вставке отрезка позиций [i, i + length) за позицию p (С разворотом отрезка или без)"""
+        last = i + length - 1
+        gap = self._cost(p, p + 1)
+
+        if not reverse:
+            return self._cost(p, i) + self._cost(last, p + 1) - gap
+
+        inner = float(self._backward[last] - self._backward[i] - self._forward[last] + self._forward[i])
+        return self._cost(p, last, q_alternate=True) + self._cost(i, p + 1, p_alternate=True) - gap + inner
+
+    def move(self, i: int, length: int, p: int, reverse: bool) -> None:
+        """Перенести отрезок позиций [i, i + length) за позицию p"""
+        if reverse:
+            self.reverse(i, i + length - 1)
+
+        if p < i:
+            low, high = p + 1, i + length
+
+            for values in (v for pair in self._lists() for v in pair):
+                values[low:high] = values[i:i + length] + values[low:i]
+
+            self.order[low:high] = np.concatenate((self.order[i:i + length], self.order[low:i]))
+
+        else:
+            low, high = i, p + 1
+
+            for values in (v for pair in self._lists() for v in pair):
+                values[low:high] = values[i + length:high] + values[i:i + length]
+
+            self.order[low:high] = np.concatenate((self.order[i + length:high], self.order[i:i + length]))
+
+        self.position[self.order[low:high]] = np.arange(low, high)
+        self._refresh(low, high - 1)
+
+
+class TravelOptimizer:
+    """
+    Локальная оптимизация порядка и направления траекторий по длине холостых перемещений (2-opt и Or-opt)
+    Холостое перемещение ведёт от конца траектории к началу следующей. Незамкнутые траектории при
+    развороте участка проходятся в обратном направлении, замкнутые после оптимизации поворачиваются к соседям.
+    Ходы ищутся только среди ближайших соседей концов траекторий, улучшенные участки проверяются повторно.
+    При одинаковом зерне результат детерминирован, если оптимизация сошлась до исчерпания бюджета времени
+    """
+
+    NEIGHBOURS: ClassVar[int] = 8
+    """Размер списка ближайших соседей"""
+
+    SEGMENT_LENGTHS: ClassVar[tuple[int, ...]] = (1, 2, 3)
+    """Длины цепочек, переносимых ходом Or-opt"""
+
+    EPSILON: ClassVar[float] = 1e-9
+    """Наименьшее принимаемое улучшение"""
+
+    def __init__(self, time_budget_seconds: float, seed: int = 0) -> None:
+        """
+        :param time_budget_seconds: Бюджет времени
+        :param seed: Зерно порядка просмотра траекторий
+        """
+        self._time_budget_seconds = time_budget_seconds
+        self._seed = seed
+
+    def optimize(self, trajectories: Sequence[Trajectory]) -> tuple[list[Trajectory], TravelReport]:
+        """Улучшить порядок траекторий, начиная с заданного"""
+        heads = np.array([t.start() for t in trajectories], dtype=np.float64).reshape(-1, 2)
+        tails = np.array([t.end() for t in trajectories], dtype=np.float64).reshape(-1, 2)
+        reversible = np.array([not t.isClosed() for t in trajectories], dtype=bool)
+
+        order, flipped, report = self.optimizeOrder(heads, tails, reversible)
+        ret = EndpointSequencer.rotateLoops([trajectories[i].reversed() if f else trajectories[i] for i, f in zip(order, flipped)])
+        return ret, replace(report, travel_after=travelLength(ret))
+
+    def optimizeOrder(self, heads: np.ndarray, tails: np.ndarray, reversible: np.ndarray) -> tuple[list[int], list[bool], TravelReport]:
+        """
+        Улучшить порядок обхода
+        :param heads: Начала элементов (N, 2)
+        :param tails: Концы элементов (N, 2)
+        :param reversible: Маска элементов, которые можно проходить в обратном направлении (N,)
+        :return: Порядок индексов, признаки разворота по позициям и отчёт
+        """
+        begin = perf_counter()
+        deadline = begin + self._time_budget_seconds
+
+        tour = _Tour(heads, tails, reversible)
+        travel_before = tour.total()
+        moves = 0
+        converged = True
+
+        if tour.size > 1:
+            neighbours = self.__neighbours(heads, tails)
+
+            pending = list(range(tour.size))
+            Random(self._seed).shuffle(pending)
+            queue = deque(pending)
+            queued = [True] * tour.size
+
+            while queue:
+                if perf_counter() > deadline:
+                    converged = False
+                    break
+
+                node = queue.popleft()
+                queued[node] = False
+                touched = self.__improveNode(tour, node, neighbours)
+
+                if touched:
+                    moves += 1
+
+                    for item in touched:
+                        if item >= 0 and not queued[item]:
+                            queued[item] = True
+                            queue.append(item)
+
+        report = TravelReport(travel_before, tour.total(), moves, perf_counter() - begin, converged)
+        return tour.order.tolist(), tour.flipped, report
+
+    @classmethod
+    def __neighbours(cls, heads: np.ndarray, tails: np.ndarray) -> list[list[int]]:
+        """Элементы, любой конец которых близок к любому концу элемента (Без самого элемента)"""
+        endpoints = np.concatenate((heads, tails))
+        owners = np.tile(np.arange(len(heads)), 2)
+        nearest = nearestNeighbours(endpoints, endpoints, cls.NEIGHBOURS + 2)
+        nearest = np.where(nearest >= 0, owners[nearest], -1)
+        rows = np.concatenate((nearest[:len(heads)], nearest[len(heads):]), axis=1).tolist()
+        return [list(dict.fromkeys(j for j in row if j != i and j >= 0))[:cls.NEIGHBOURS] for i, row in enumerate(rows)]
+
+    @classmethod
+    def __improveNode(cls, tour: _Tour, node: int, neighbours: list[list[int]]) -> tuple[int, ...]:
+        """
+        Применить лучший ход, связывающий элемент с одним из соседей
+        :return: Элементы на изменённых границах (Пусто, если улучшения нет)
+        """
+        i = int(tour.position[node])
+        best_delta = -cls.EPSILON
+        best_move = None
+
+        # 2-opt: разворот участка между элементом и соседом соединяет их концы
+        for b in neighbours[node]:
+            j = int(tour.position[b])
+            first, last = (i, j) if i < j else (j, i)
+
+            for low, high in ((first + 1, last), (first, last - 1)):
+                if low <= high and (delta := tour.reverseDelta(low, high)) < best_delta:
+                    best_delta, best_move = delta, (low, high)
+
+        # Or-opt: цепочка, начинающаяся с элемента, переносится к соседу
+        for length in cls.SEGMENT_LENGTHS:
+            if i + length > tour.size:
+                break
+
+            detached = tour.detachDelta(i, length)
+
+            for b in neighbours[node]:
+                j = int(tour.position[b])
+
+                for p in (j - 1, j):
+                    if i - 1 <= p < i + length:
+                        continue
+
+                    for reverse in (False, True):
+                        if (delta := detached + tour.insertDelta(i, length, p, reverse)) < best_delta:
+                            best_delta, best_move = delta, (i, length, p, reverse)
+
+        if best_move is None:
+            return ()
+
+        if len(best_move) == 2:
+            low, high = best_move
+            touched = (tour.at(low - 1), tour.at(low), tour.at(high), tour.at(high + 1))
+            tour.reverse(low, high)
+            return touched
+
+        first, length, p, reverse = best_move
+        touched = (tour.at(first - 1), tour.at(first), tour.at(first + length - 1), tour.at(first + length), tour.at(p), tour.at(p + 1))
+        tour.move(first, length, p, reverse)
+        return touched
@@ -0,0 +1,312 @@
+"""Удаление перекрывающихся отрезков"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from dataclasses import replace
+from math import hypot
+from math import pi
+from typing import ClassVar
+from typing import Sequence
+
+import numpy as np
+
+from gen.enums import MarkerTool
+from gen.trajectory import Trajectory
+from tools import raggedRange
+
+
+@dataclass(frozen=True)
+class OverlapReport:
+    """Отчёт удаления перекрытий"""
+
+    drawn_length: float
+    """Длина рисуемых линий до удаления"""
+
+    removed_length: float
+    """Длина удалённых перекрытий"""
+
+    trajectories_before: int
+    """Количество траекторий до удаления"""
+
+    trajectories_after: int
+    """Количество траекторий после удаления (Траектории делятся в местах удалённых участков)"""
+
+    def getMessage(self) -> str:
+        """Получить сообщение отчёта"""
+        percent = self.removed_length / self.drawn_length * 100 if self.drawn_length > 0 else 0.0
+        return (
+            f"Overlaps : removed {self.removed_length:.0f} mm of {self.drawn_length:.0f} mm drawn ({percent:.1f}%) "
+            f": {self.trajectories_before} -> {self.trajectories_after} trajectories"
+        )
+
+
+class OverlapRemover:
+    """
+    Удаление участков, уже нарисованных тем же инструментом
+    Отрезки хешируются по направлению (Ячейка - допустимый угол), смещению поперёк и положению вдоль направления ячейки:
+    отрезок попадает во все пересекаемые ячейки, а также в соседнюю по углу ячейку,
+    поэтому перекрывающиеся почти коллинеарные отрезки всегда делят ячейку. Пары отрезков из общих ячеек
+    проверяются векторно, покрытые интервалы объединяются только для отрезков с найденным перекрытием.
+    Покрытые участки удаляются из более поздних траекторий, траектории делятся в местах удаления
+    """
+
+    ANGLE_TOLERANCE: ClassVar[float] = 1.0
+    """Наибольшее отклонение направления (градусы), при котором отрезки считаются коллинеарными"""
+
+    def __init__(self, tolerance: float) -> None:
+        """
+        :param tolerance: Наибольшее расстояние между коллинеарными линиями, считающимися одной линией
+        """
+        self._tolerance = tolerance
+        self._bins = int(np.ceil(180 / self.ANGLE_TOLERANCE))
+
+    def remove(self, trajectories: Sequence[Trajectory]) -> tuple[list[Trajectory], OverlapReport]:
+        """
+        Удалить перекрытия
+        :param trajectories: Траектории в порядке приоритета (Участок остаётся в более ранней траектории)
+        :return: Траектории без перекрытий и отчёт
+        """
+        owners, x0, y0, x1, y1 = self.__segments(trajectories)
+        lengths = np.hypot(x1 - x0, y1 - y0)
+        tools = np.array([int(t.tool) for t in trajectories], dtype=np.int64)[owners] if len(owners) else np.zeros(0, dtype=np.int64)
+        drawn = tools != MarkerTool.NONE
+
+        covered = self.__coveredIntervals(owners, tools, x0, y0, x1, y1, lengths, drawn)
+
+        ret = list[Trajectory]()
+        removed = 0.0
+        first_segment = 0
+
+        for index, trajectory in enumerate(trajectories):
+            count = len(trajectory.x_positions) - 1
+            intervals = {s - first_segment: covered[s] for s in range(first_segment, first_segment + count) if s in covered}
+            first_segment += count
+
+            if not intervals:
+                ret.append(trajectory)
+                continue
+
+            parts, length = self.__split(trajectory, intervals)
+            removed += length
+            ret.extend(parts)
+
+        return ret, OverlapReport(float(lengths[drawn].sum()), removed, len(trajectories), len(ret))
+
+    @staticmethod
+    def __segments(trajectories: Sequence[Trajectory]) -> tuple[np.ndarray, ...]:
+        """Отрезки всех траекторий: индекс траектории и координаты концов"""
+        xs = [np.asarray(t.x_positions, dtype=np.float64) for t in trajectories]
+        ys = [np.asarray(t.y_positions, dtype=np.float64) for t in trajectories]
+
+        if not xs:
+            empty = np.zeros(0)
+            return np.zeros(0, dtype=np.int64), empty, empty, empty, empty
+
+        owners = np.repeat(np.arange(len(trajectories)), [max(len(x) - 1, 0) for x in xs])
+        x0 = np.concatenate([x[:-1] for x in xs])
+        y0 = np.concatenate([y[:-1] for y in ys])
+        x1 = np.concatenate([x[1:] for x in xs])
+        y1 = np.concatenate([y[1:] for y in ys])
+        return owners, x0, y0, x1, y1
+
+    def __coveredIntervals(
+            self, owners: np.ndarray, tools: np.ndarray,
+            x0: np.ndarray, y0: np.ndarray, x1: np.ndarray, y1: np.ndarray,
+            lengths: np.ndarray, drawn: np.ndarray
+    ) -> dict[int, list[tuple[float, float]]]:
+        """
+        Покрытые более ранними траекториями интервалы отрезков
+        :return: Индекс отрезка -> объединённые интервалы (Расстояния от начала отрезка)
+        """
+        segments = np.flatnonzero(drawn & (lengths > 0))
+
+        if len(segments) == 0:
+            return {}
+
+        angles = np.mod(np.arctan2(y1 - y0, x1 - x0), pi)[segments]
+        bin_width = pi / self._bins
+        position = angles / bin_width
+        own_bin = np.minimum(position.astype(np.int64), self._bins - 1)
+        # соседняя по углу ячейка - ближайшая к направлению отрезка
+        near_bin = np.where(position - own_bin < 0.5, own_bin - 1, own_bin + 1) % self._bins
+
+        entry_segments = np.concatenate((segments, segments))
+        entry_bins = np.concatenate((own_bin, near_bin))
+        entry_own = np.concatenate((np.ones(len(segments), dtype=bool), np.zeros(len(segments), dtype=bool)))
+
+        # координаты концов в системе центра ячейки угла: поперёк (смещение) и вдоль направления
+        centers = (entry_bins + 0.5) * bin_width
+        cos_c = np.cos(centers)
+        sin_c = np.sin(centers)
+        ax = x0[entry_segments]
+        ay = y0[entry_segments]
+        bx = x1[entry_segments]
+        by = y1[entry_segments]
+
+        offset_cell = max(self._tolerance, 1.0)
+        along_cell = max(float(np.median(lengths[segments])), offset_cell)
+
+        offset_low, offset_spans = self.__cellSpans(cos_c * ay - sin_c * ax, cos_c * by - sin_c * bx, offset_cell)
+        along_low, along_spans = self.__cellSpans(cos_c * ax + sin_c * ay, cos_c * bx + sin_c * by, along_cell)
+
+        # запись в каждую пару пересекаемых ячеек смещения и длины
+        spans = offset_spans * along_spans
+        local = raggedRange(spans)
+        repeated_along_spans = np.repeat(along_spans, spans)
+        offset_bins = np.repeat(offset_low, spans) + local // repeated_along_spans
+        along_bins = np.repeat(along_low, spans) + local % repeated_along_spans
+        entry_segments = np.repeat(entry_segments, spans)
+        entry_own = np.repeat(entry_own, spans)
+        angle_bins = np.repeat(entry_bins, spans)
+
+        # ячейка (Инструмент, угол, смещение, длина) упаковывается в одно целое
+        columns = [tools[entry_segments], angle_bins, offset_bins - offset_bins.min(), along_bins - along_bins.min()]
+        _, keys = np.unique(np.ravel_multi_index(columns, [int(c.max()) + 1 for c in columns]), return_inverse=True)
+
+        # кандидат: собственная ячейка содержит отрезок более ранней траектории
+        entry_owners = owners[entry_segments]
+        earliest = np.full(int(keys.max()) + 1, np.iinfo(np.int64).max)
+        np.minimum.at(earliest, keys, entry_owners)
+        candidates = np.flatnonzero(entry_own & (earliest[keys] < entry_owners))
+
+        if len(candidates) == 0:
+            return {}
+
+        # пары (Отрезок, Отрезок более ранней траектории в той же ячейке)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        starts = np.searchsorted(sorted_keys, keys[candidates], "left")
+        counts = np.searchsorted(sorted_keys, keys[candidates], "right") - starts
+
+        left = np.repeat(entry_segments[candidates], counts)
+        right = entry_segments[order[np.repeat(starts, counts) + raggedRange(counts)]]
+        earlier = owners[right] < owners[left]
+        pairs = np.unique(left[earlier] * len(lengths) + right[earlier])
+        left = pairs // len(lengths)
+        right = pairs % len(lengths)
+
+        begin, end, valid = self.__overlaps(x0, y0, x1, y1, lengths, left, right)
+
+        ret = dict[int, list[tuple[float, float]]]()
+
+        for segment, b, e in zip(left[valid].tolist(), begin[valid].tolist(), end[valid].tolist()):
+            ret.setdefault(segment, []).append((b, e))
+
+        return {segment: self.__merge(intervals) for segment, intervals in ret.items()}
+
+    def __cellSpans(self, a: np.ndarray, b: np.ndarray, cell: float) -> tuple[np.ndarray, np.ndarray]:
+        """Первая ячейка и количество ячеек, пересекаемых интервалом [a, b], расширенным на допуск"""
+        low = np.floor((np.minimum(a, b) - self._tolerance) / cell).astype(np.int64)
+        high = np.floor((np.maximum(a, b) + self._tolerance) / cell).astype(np.int64)
+        return low, high - low + 1
+
+    def __overlaps(
+            self, x0: np.ndarray, y0: np.ndarray, x1: np.ndarray, y1: np.ndarray,
+            lengths: np.ndarray, segments: np.ndarray, others: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Интервалы отрезков, покрытые другими отрезками
+        :return: Начало и конец интервала (Расстояния от начала отрезка), признак перекрытия
+        """
+        length = lengths[segments]
+        ux = (x1[segments] - x0[segments]) / length
+        uy = (y1[segments] - y0[segments]) / length
+
+        cx = x0[others] - x0[segments]
+        cy = y0[others] - y0[segments]
+        dx = x1[others] - x0[segments]
+        dy = y1[others] - y0[segments]
+
+        # координаты концов другого отрезка: вдоль отрезка (u) и поперёк (v)
+        u_c = ux * cx + uy * cy
+        u_d = ux * dx + uy * dy
+        v_c = ux * cy - uy * cx
+        v_d = ux * dy - uy * dx
+
+        begin = np.maximum(np.minimum(u_c, u_d), 0.0)
+        end = np.minimum(np.maximum(u_c, u_d), length)
+        parallel = np.abs(v_d - v_c) <= np.sin(np.radians(self.ANGLE_TOLERANCE)) * lengths[others]
+
+        # расстояние до линии отрезка на концах общего участка
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = (v_d - v_c) / (u_d - u_c)
+            near = (np.abs(v_c + slope * (begin - u_c)) <= self._tolerance) & (np.abs(v_c + slope * (end - u_c)) <= self._tolerance)
+
+        return begin, end, parallel & near & (end > begin) & (u_c != u_d)
+
+    def __merge(self, intervals: list[tuple[float, float]]) -> list[tuple[float, float]]:
+        """Объединить интервалы (Промежутки не длиннее допуска тоже считаются покрытыми)"""
+        intervals.sort()
+        ret = [intervals[0]]
+
+        for begin, end in intervals[1:]:
+            if begin <= ret[-1][1] + self._tolerance:
+                ret[-1] = ret[-1][0], max(ret[-1][1], end)
+
+            else:
+                ret.append((begin, end))
+
+        return ret
+
+    def __split(self, trajectory: Trajectory, covered: dict[int, list[tuple[float, float]]]) -> tuple[list[Trajectory], float]:
+        """
+        Разделить траекторию, удалив покрытые участки
+        :return: Оставшиеся части и удалённая длина
+        """
+        xs = list(trajectory.x_positions)
+        ys = list(trajectory.y_positions)
+        chains = list[tuple[list[int], list[int]]]()
+        removed = 0.0
+        open_chain = False
+
+        for segment in range(len(xs) - 1):
+            length = hypot(xs[segment + 1] - xs[segment], ys[segment + 1] - ys[segment])
+            kept = self.__complement(covered.get(segment, []), length)
+            removed += length - sum(end - begin for begin, end in kept)
+
+            for begin, end in kept:
+                start_point = self.__pointAt(xs, ys, segment, begin / length if length > 0 else 0.0)
+                end_point = self.__pointAt(xs, ys, segment, end / length if length > 0 else 1.0)
+
+                if start_point == end_point:
+                    continue
+
+                if not (open_chain and begin == 0.0):
+                    chains.append(([start_point[0]], [start_point[1]]))
+
+                chains[-1][0].append(end_point[0])
+                chains[-1][1].append(end_point[1])
+
+            open_chain = bool(kept) and kept[-1][1] == length
+
+        # замкнутая траектория: последняя часть продолжается первой
+        if trajectory.isClosed() and len(chains) > 1 and open_chain and chains[0][0][0] == xs[0] and chains[0][1][0] == ys[0] and 0 not in covered:
+            last_x, last_y = chains.pop()
+            chains[0] = last_x + chains[0][0][1:], last_y + chains[0][1][1:]
+
+        parts = [
+            replace(trajectory, name=trajectory.name if len(chains) == 1 else f"{trajectory.name} [{k}]", x_positions=x, y_positions=y)
+            for k, (x, y) in enumerate(chains)
+        ]
+        return parts, removed
+
+    def __complement(self, covered: list[tuple[float, float]], length: float) -> list[tuple[float, float]]:
+        """Непокрытые интервалы отрезка длиннее допуска"""
+        ret = list[tuple[float, float]]()
+        position = 0.0
+
+        for begin, end in covered + [(length, length)]:
+            if begin - position > self._tolerance or (begin == length and position == 0.0 and length > 0):
+                ret.append((position, begin))
+
+            position = max(position, end)
+
+        return ret
+
+    @staticmethod
+    def __pointAt(xs: list[int], ys: list[int], segment: int, t: float) -> tuple[int, int]:
+        """Точка отрезка с параметром t, округлённая до сетки позиций"""
+        return (
+            round(xs[segment] + (xs[segment + 1] - xs[segment]) * t),
+            round(ys[segment] + (ys[segment + 1] - ys[segment]) * t)
+        )
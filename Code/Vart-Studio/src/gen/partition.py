@@ -0,0 +1,204 @@
+"""Разделение задания между несколькими плоттерами"""
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from dataclasses import replace
+from pathlib import Path
+from typing import ClassVar
+from typing import Collection
+from typing import Optional
+from typing import Sequence
+
+import numpy as np
+
+from bytelang.compiler import ByteLangCompiler
+from bytelang.utils import LogFlag
+from gen.enums import MarkerTool
+from gen.scheduling import ToolScheduler
+from gen.settings import GeneratorSettings
+from gen.simulator import JobProgram
+from gen.simulator import JobSimulator
+from gen.trajectory import Trajectory
+from gen.writer import CodeWriter
+
+
+@dataclass(frozen=True)
+class PartitionReport:
+    """Отчёт разделения задания"""
+
+    machine_seconds: tuple[float, ...]
+    """Оценка времени печати каждого плоттера"""
+
+    machine_trajectories: tuple[int, ...]
+    """Количество траекторий каждого плоттера"""
+
+    def makespan(self) -> float:
+        """Время печати всего задания (По самому долгому плоттеру)"""
+        return max(self.machine_seconds, default=0.0)
+
+    def getMessage(self) -> str:
+        """Получить сообщение отчёта"""
+        mean = sum(self.machine_seconds) / max(len(self.machine_seconds), 1)
+        imbalance = (self.makespan() / mean - 1) * 100 if mean > 0 else 0.0
+
+        lines = [f"Partition : {len(self.machine_seconds)} machines : makespan {self.makespan():.0f} s (+{imbalance:.1f}% over mean)"]
+        lines.extend(
+            f"Machine {i + 1} : {count} trajectories : {seconds:.0f} s"
+            for i, (seconds, count) in enumerate(zip(self.machine_seconds, self.machine_trajectories))
+        )
+        return "\n".join(lines)
+
+
+class JobPartitioner:
+    """
+    Разделение задания на независимые задания для нескольких плоттеров
+    Траектории взвешиваются оценкой времени печати (JobSimulator). Траектории инструмента достаются
+    только плоттерам с этим инструментом: сначала время каждой группы распределяется между её плоттерами
+    для равной нагрузки, затем группа делится рекурсивной бисекцией по более протяжённой оси центров траекторий,
+    и каждый плоттер получает компактную область со своей долей времени
+    """
+
+    ALLOCATION_QUANTA: ClassVar[int] = 256
+    """Количество порций, на которые делится время группы траекторий при распределении по плоттерам"""
+
+    def __init__(self, settings: GeneratorSettings, machines: int, machine_tools: Optional[Sequence[Collection[MarkerTool]]] = None) -> None:
+        """
+        :param settings: Настройки генератора
+        :param machines: Количество плоттеров
+        :param machine_tools: Инструменты каждого плоттера (None - все плоттеры со всеми инструментами)
+        """
+        if machines < 1:
+            raise ValueError(f"Machines count must be positive: {machines}")
+
+        if machine_tools is not None and len(machine_tools) != machines:
+            raise ValueError(f"Tools are given for {len(machine_tools)} machines, expected {machines}")
+
+        self._settings = settings
+        self._machines = machines
+        self._machine_tools = machine_tools
+
+    def partition(self, trajectories: Sequence[Trajectory]) -> tuple[list[list[Trajectory]], PartitionReport]:
+        """
+        Разделить задание
+        :param trajectories: Траектории задания
+        :return: Траектории каждого плоттера в порядке печати и отчёт
+        """
+        weights = np.array([t.duration_seconds for t in JobSimulator.simulate(JobProgram.fromTrajectories(trajectories, self._settings)).trajectories])
+        centroids = np.array([t.centroid() for t in trajectories], dtype=np.float64).reshape(-1, 2)
+
+        assignment = np.zeros(len(trajectories), dtype=np.int64)
+        groups = self.__groupByMachines(trajectories)
+
+        for (machines, members), targets in zip(groups, self.__allocate(groups, weights)):
+            self.__bisect(members, centroids, weights, machines, targets if targets.sum() > 0 else np.ones(len(machines)), assignment)
+
+        # бюджет оптимизации порядка делится между плоттерами
+        settings = replace(self._settings, ordering_time_budget_ms=self._settings.ordering_time_budget_ms // self._machines)
+        scheduler = ToolScheduler(settings)
+        jobs = list[list[Trajectory]]()
+
+        for machine in range(self._machines):
+            job, _ = scheduler.schedule([trajectories[i] for i in np.flatnonzero(assignment == machine)])
+            jobs.append(job)
+
+        report = PartitionReport(
+            tuple(JobSimulator.simulate(JobProgram.fromTrajectories(job, self._settings)).duration_seconds for job in jobs),
+            tuple(len(job) for job in jobs)
+        )
+
+        return jobs, report
+
+    def write(self, jobs: Sequence[Sequence[Trajectory]], output_path: Path, bytelang_path: Path) -> list[str]:
+        """
+        Скомпилировать задания плоттеров параллельно
+        :param jobs: Траектории каждого плоттера
+        :param output_path: Путь экспорта: задание плоттера k записывается в <имя>_<k>.blc (И <имя>_<k>.txt, если включено текстовое представление)
+        :param bytelang_path: Путь к ресурсам bytelang
+        :return: Сообщения результатов компиляции
+        """
+        output_path = Path(output_path)
+        paths = [output_path.with_stem(f"{output_path.stem}_{k + 1}") for k in range(len(jobs))]
+
+        with ProcessPoolExecutor(max_workers=len(jobs)) as executor:
+            return list(executor.map(_writeJob, [self._settings] * len(jobs), [list(job) for job in jobs], paths, [Path(bytelang_path)] * len(jobs)))
+
+    def __allocate(self, groups: Sequence[tuple[list[int], np.ndarray]], weights: np.ndarray) -> list[np.ndarray]:
+        """
+        Доли времени каждой группы по её плоттерам
+        Время групп делится на равные порции, порции групп по очереди достаются наименее загруженному допустимому плоттеру
+        """
+        loads = np.zeros(self._machines)
+        ret = [np.zeros(len(machines)) for machines, _ in groups]
+
+        for _ in range(self.ALLOCATION_QUANTA):
+            for (machines, members), shares in zip(groups, ret):
+                portion = weights[members].sum() / self.ALLOCATION_QUANTA
+                best = int(np.argmin(loads[machines]))
+                shares[best] += portion
+                loads[machines[best]] += portion
+
+        return ret
+
+    def __groupByMachines(self, trajectories: Sequence[Trajectory]) -> list[tuple[list[int], np.ndarray]]:
+        """Группы траекторий с одинаковым набором допустимых плоттеров (Наиболее ограниченные - первыми)"""
+        groups = dict[tuple[int, ...], list[int]]()
+
+        for index, trajectory in enumerate(trajectories):
+            groups.setdefault(self.__machinesFor(trajectory.tool), []).append(index)
+
+        return [(list(machines), np.array(members, dtype=np.int64)) for machines, members in sorted(groups.items(), key=lambda item: len(item[0]))]
+
+    def __machinesFor(self, tool: MarkerTool) -> tuple[int, ...]:
+        """Плоттеры, способные напечатать траекторию инструмента"""
+        if self._machine_tools is None or tool == MarkerTool.NONE:
+            return tuple(range(self._machines))
+
+        ret = tuple(i for i, tools in enumerate(self._machine_tools) if tool in tools)
+
+        if not ret:
+            raise ValueError(f"No machine carries tool {tool!r}")
+
+        return ret
+
+    @classmethod
+    def __bisect(cls, members: np.ndarray, centroids: np.ndarray, weights: np.ndarray, machines: list[int], targets: np.ndarray, assignment: np.ndarray) -> None:
+        """Рекурсивно разделить траектории между плоттерами пропорционально целевым долям"""
+        if len(machines) == 1 or len(members) == 0:
+            assignment[members] = machines[0]
+            return
+
+        half = len(machines) // 2
+        fraction = targets[:half].sum() / targets.sum()
+
+        points = centroids[members]
+        axis = int(np.argmax(np.ptp(points, axis=0)))
+        ordered = members[np.argsort(points[:, axis], kind="stable")]
+
+        cumulative = np.cumsum(weights[ordered])
+        goal = fraction * cumulative[-1]
+        cut = int(np.searchsorted(cumulative, goal))
+
+        # траектория на границе уходит в ту часть, где отклонение от цели меньше
+        if cut < len(ordered) and cumulative[cut] - goal < goal - (cumulative[cut - 1] if cut > 0 else 0.0):
+            cut += 1
+
+        cls.__bisect(ordered[:cut], centroids, weights, machines[:half], targets[:half], assignment)
+        cls.__bisect(ordered[cut:], centroids, weights, machines[half:], targets[half:], assignment)
+
+
+def _writeJob(settings: GeneratorSettings, trajectories: list[Trajectory], output_path: Path, bytelang_path: Path) -> str:
+    """Скомпилировать задание одного плоттера (Выполняется в отдельном процессе)"""
+    writer = CodeWriter(settings, ByteLangCompiler.simpleSetup(bytelang_path))
+
+    log_flag = LogFlag.PROGRAM_SIZE | LogFlag.COMPILATION_TIME
+
+    with open(output_path, "wb") as bytecode_stream:
+        if settings.write_ir_text:
+            with open(output_path.with_suffix(".txt"), "wt") as ir_stream:
+                result = writer.run(ir_stream, trajectories, bytecode_stream, log_flag)
+
+        else:
+            result = writer.run(None, trajectories, bytecode_stream, log_flag)
+
+    return f"{output_path.name} : {result.getMessage()}"
@@ -0,0 +1,84 @@
+"""Политика подъёма пера"""
+from __future__ import annotations
+
+from math import ceil
+from math import floor
+from math import hypot
+from typing import ClassVar
+
+
+class PenLiftPolicy:
+    """
+    Политика подъёма пера между траекториями одного маркера
+    Перо остаётся опущенным, если разрыв не больше допустимого или переход проходит по уже нарисованному отрезку.
+    Нарисованные отрезки индексируются сеткой с ячейкой, равной наибольшей длине такого перехода
+    """
+
+    RETRACE_TOLERANCE: ClassVar[float] = 0.5
+    """Допустимое отклонение перехода от нарисованного отрезка"""
+
+    def __init__(self, max_gap: float, max_retrace: float) -> None:
+        """
+        :param max_gap: Наибольший разрыв, преодолеваемый с опущенным пером
+        :param max_retrace: Наибольшая длина перехода по нарисованному отрезку (0 - не искать такие переходы)
+        """
+        self._max_gap = max_gap
+        self._max_retrace = max_retrace
+        self._cell = max(max_retrace, 4 * self.RETRACE_TOLERANCE)
+        self._cells = dict[tuple[int, int], list[int]]()
+        self._segments = list[tuple[float, float, float, float]]()
+
+    def _cellOf(self, x: float, y: float) -> tuple[int, int]:
+        return floor(x / self._cell), floor(y / self._cell)
+
+    def draw(self, begin: tuple[float, float], end: tuple[float, float]) -> None:
+        """Отметить нарисованный отрезок"""
+        if self._max_retrace <= 0:
+            return
+
+        index = len(self._segments)
+        self._segments.append((*begin, *end))
+
+        # отметки вдоль отрезка не реже размера ячейки: ближайшая к любой точке отметка попадёт в соседнюю ячейку
+        samples = max(ceil(hypot(end[0] - begin[0], end[1] - begin[1]) / self._cell), 1)
+        cells = {
+            self._cellOf(begin[0] + (end[0] - begin[0]) * k / samples, begin[1] + (end[1] - begin[1]) * k / samples)
+            for k in range(samples + 1)
+        }
+
+        for cell in cells:
+            self._cells.setdefault(cell, []).append(index)
+
+    def keepDown(self, begin: tuple[float, float], end: tuple[float, float]) -> bool:
+        """Можно ли перейти от begin к end, не поднимая перо"""
+        length = hypot(end[0] - begin[0], end[1] - begin[1])
+
+        if length <= self._max_gap:
+            return True
+
+        if length > self._max_retrace:
+            return False
+
+        cx, cy = self._cellOf(*begin)
+        tolerance = self.RETRACE_TOLERANCE
+
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for index in self._cells.get((cx + dx, cy + dy), ()):
+                    segment = self._segments[index]
+
+                    if self._distance(begin, segment) <= tolerance and self._distance(end, segment) <= tolerance:
+                        return True
+
+        return False
+
+    @staticmethod
+    def _distance(point: tuple[float, float], segment: tuple[float, float, float, float]) -> float:
+        """Расстояние от точки до отрезка"""
+        x, y = point
+        x1, y1, x2, y2 = segment
+        dx = x2 - x1
+        dy = y2 - y1
+        length_squared = dx * dx + dy * dy
+        t = 0.0 if length_squared == 0 else min(max(((x - x1) * dx + (y - y1) * dy) / length_squared, 0.0), 1.0)
+        return hypot(x - x1 - t * dx, y - y1 - t * dy)
@@ -0,0 +1,109 @@
+"""Автоматический выбор профиля перемещения"""
+from __future__ import annotations
+
+from typing import ClassVar
+from typing import Sequence
+
+import numpy as np
+
+
+class ProfileSelector:
+    """
+    Выбор профиля перемещения по участкам траектории
+    Отрезок относится к длинным линиям, если он длиннее порога или продолжает длинный участок почти по прямой,
+    к малым отрезкам - если короче порога, иначе к кривым. Пороги выхода из текущего класса мягче порогов входа,
+    а слишком короткие участки присоединяются к соседнему, чтобы профиль не переключался на каждом отрезке.
+    Участок присоединяется только к соседу, профиль которого рассчитан на более короткие отрезки и потому медленнее
+    (Индексы профилей упорядочены от малых отрезков к длинным линиям)
+    """
+
+    MICRO: ClassVar[int] = 0
+    """Индекс профиля малых отрезков"""
+
+    CURVE: ClassVar[int] = 1
+    """Индекс профиля кривых"""
+
+    LONG: ClassVar[int] = 2
+    """Индекс профиля длинных линий"""
+
+    HYSTERESIS_RATIO: ClassVar[float] = 0.5
+    """Во сколько раз порог выхода из класса мягче порога входа"""
+
+    STRAIGHT_ANGLE: ClassVar[float] = 10.0
+    """Наибольший поворот (градусы), при котором отрезок продолжает длинный участок"""
+
+    MIN_RUN: ClassVar[int] = 3
+    """Наименьшее количество отрезков участка с собственным профилем"""
+
+    def __init__(self, long_line_length: float, micro_length: float) -> None:
+        """
+        :param long_line_length: Длина, начиная с которой отрезок считается длинной линией
+        :param micro_length: Длина, меньше которой отрезок считается малым
+        """
+        self._long_line_length = long_line_length
+        self._micro_length = micro_length
+
+    def classify(self, x_positions: Sequence[int], y_positions: Sequence[int]) -> list[int]:
+        """Индекс профиля каждого отрезка (С учётом гистерезиса порогов)"""
+        dx = np.diff(np.asarray(x_positions, dtype=np.float64))
+        dy = np.diff(np.asarray(y_positions, dtype=np.float64))
+        lengths = np.hypot(dx, dy).tolist()
+
+        headings = np.degrees(np.arctan2(dy, dx))
+        turns = np.abs((np.diff(headings, prepend=headings[:1]) + 180) % 360 - 180).tolist()
+
+        long_exit = self._long_line_length * self.HYSTERESIS_RATIO
+        micro_exit = self._micro_length / self.HYSTERESIS_RATIO
+
+        ret = list[int]()
+        current = -1
+
+        for length, turn in zip(lengths, turns):
+            if length >= self._long_line_length or (current == self.LONG and length >= long_exit and turn <= self.STRAIGHT_ANGLE):
+                current = self.LONG
+
+            elif length < self._micro_length or (current == self.MICRO and length < micro_exit):
+                current = self.MICRO
+
+            else:
+                current = self.CURVE
+
+            ret.append(current)
+
+        return ret
+
+    def runs(self, x_positions: Sequence[int], y_positions: Sequence[int]) -> list[tuple[int, int]]:
+        """
+        Участки траектории с одним профилем
+        :return: Пары (Количество отрезков, Индекс профиля)
+        """
+        merged = list[tuple[int, int]]()
+
+        for index in self.classify(x_positions, y_positions):
+            if merged and merged[-1][1] == index:
+                merged[-1] = merged[-1][0] + 1, index
+
+            else:
+                merged.append((1, index))
+
+        ret = list[tuple[int, int]]()
+
+        for count, index in merged:
+            if ret and ret[-1][1] == index:
+                ret[-1] = ret[-1][0] + count, index
+
+            # короткий участок получает более медленный профиль предыдущего
+            elif ret and count < self.MIN_RUN and ret[-1][1] < index:
+                ret[-1] = ret[-1][0] + count, ret[-1][1]
+
+            # короткий предыдущий участок получает более медленный профиль текущего
+            elif ret and ret[-1][0] < self.MIN_RUN and ret[-1][1] > index:
+                ret[-1] = ret[-1][0] + count, index
+
+                if len(ret) > 1 and ret[-2][1] == index:
+                    ret[-2:] = [(ret[-2][0] + ret[-1][0], index)]
+
+            else:
+                ret.append((count, index))
+
+        return ret
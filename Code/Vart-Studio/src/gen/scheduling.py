@@ -0,0 +1,152 @@
+"""Планирование задания с учётом смены инструментов"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Sequence
+
+from gen.enums import MarkerTool
+from gen.ordering import EndpointSequencer
+from gen.ordering import TravelOptimizer
+from gen.ordering import TravelReport
+from gen.ordering import travelLength
+from gen.settings import GeneratorSettings
+from gen.trajectory import Trajectory
+
+
+@dataclass(frozen=True)
+class ScheduleReport:
+    """Отчёт планирования задания"""
+
+    changes_before: int
+    """Количество смен маркера до планирования"""
+
+    changes_after: int
+    """Количество смен маркера после планирования"""
+
+    change_seconds: float
+    """Длительность одной смены маркера"""
+
+    grouped: bool
+    """Траектории сгруппированы по инструментам"""
+
+    travel: TravelReport
+    """Отчёт оптимизации холостых перемещений"""
+
+    def getMessage(self) -> str:
+        """Получить сообщение отчёта"""
+        saved = self.changes_before - self.changes_after
+        mode = "grouped by tool" if self.grouped else "interleaved"
+        return (
+            f"Tool changes : {self.changes_before} -> {self.changes_after} ({mode}) "
+            f": {saved * self.change_seconds:.0f} seconds saved\n"
+            f"{self.travel.getMessage()}"
+        )
+
+
+class ToolScheduler:
+    """
+    Планировщик задания: упорядочивает траектории по суммарному времени холостых перемещений и смен маркера
+    Траектории группируются по инструменту, если сэкономленные смены маркера дороже добавленных перемещений,
+    затем порядок оптимизируется внутри каждого участка одного маркера
+    """
+
+    def __init__(self, settings: GeneratorSettings, seed: int = 0) -> None:
+        """
+        :param settings: Настройки генератора (Скорость свободного перемещения, паузы смены инструмента, бюджет времени)
+        :param seed: Зерно оптимизатора порядка
+        """
+        self._settings = settings
+        self._seed = seed
+
+    @staticmethod
+    def toolChanges(trajectories: Sequence[Trajectory]) -> int:
+        """Количество смен маркера между рисующими траекториями"""
+        tools = [t.tool for t in trajectories if t.tool != MarkerTool.NONE]
+        return sum(a != b for a, b in zip(tools, tools[1:]))
+
+    def changeSeconds(self) -> float:
+        """
+        Длительность смены маркера сверх опускания того же маркера
+        (Перо поднимается перед переходом в обоих случаях, см. MacroAgent.setTool)
+        """
+        settings = self._settings
+        return max(settings.tool_change_begin_timeout_ms + settings.tool_change_end_timeout_ms - settings.pen_lower_timeout_ms, 0) / 1000
+
+    def estimateSeconds(self, trajectories: Sequence[Trajectory]) -> float:
+        """Оценка времени холостых перемещений и смен маркера"""
+        return travelLength(trajectories) / self._settings.free_move_profile.speed + self.toolChanges(trajectories) * self.changeSeconds()
+
+    def schedule(self, trajectories: Sequence[Trajectory]) -> tuple[list[Trajectory], ScheduleReport]:
+        """
+        Спланировать задание
+        :param trajectories: Траектории в исходном порядке
+        :return: Траектории в порядке печати и отчёт
+        """
+        budget = self._settings.ordering_time_budget_ms / 1000
+        groups = self.__groupByTool(trajectories)
+        grouped = len(groups) > 1
+
+        if grouped:
+            ordered = list[Trajectory]()
+
+            for group in groups:
+                ordered.extend(EndpointSequencer.sequence(group, ordered[-1].end() if ordered else (0.0, 0.0)))
+
+            grouped = self.estimateSeconds(ordered) < self.estimateSeconds(trajectories)
+
+        if not grouped:
+            ordered = list(trajectories)
+
+        # порядок меняется только внутри участков одного маркера, поэтому смены маркера не добавляются
+        ret = list[Trajectory]()
+        reports = list[TravelReport]()
+
+        for run in self.__toolRuns(ordered):
+            share = budget * len(run) / len(ordered)
+            optimized, report = TravelOptimizer(share, self._seed).optimize(run)
+            ret.extend(optimized)
+            reports.append(report)
+
+        travel = TravelReport(
+            travelLength(ordered),
+            travelLength(ret),
+            sum(r.moves for r in reports),
+            sum(r.elapsed_seconds for r in reports),
+            all(r.converged for r in reports)
+        )
+
+        return ret, ScheduleReport(self.toolChanges(trajectories), self.toolChanges(ret), self.changeSeconds(), grouped, travel)
+
+    @staticmethod
+    def __toolRuns(trajectories: Sequence[Trajectory]) -> list[list[Trajectory]]:
+        """Участки подряд идущих траекторий одного маркера (Траектории без печати - к текущему участку)"""
+        ret = list[list[Trajectory]]()
+        tool = None
+
+        for trajectory in trajectories:
+            if not ret or (tool is not None and trajectory.tool not in (tool, MarkerTool.NONE)):
+                ret.append([])
+
+            if trajectory.tool != MarkerTool.NONE:
+                tool = trajectory.tool
+
+            ret[-1].append(trajectory)
+
+        return ret
+
+    @staticmethod
+    def __groupByTool(trajectories: Sequence[Trajectory]) -> list[list[Trajectory]]:
+        """Группы траекторий одного инструмента в порядке первого появления (Траектории без печати - к первой группе)"""
+        groups = dict[MarkerTool, list[Trajectory]]()
+
+        for trajectory in trajectories:
+            groups.setdefault(trajectory.tool, []).append(trajectory)
+
+        idle = groups.pop(MarkerTool.NONE, [])
+        ret = list(groups.values())
+
+        if not ret:
+            return [idle] if idle else []
+
+        ret[0] = idle + ret[0]
+        return ret
@@ -1,5 +1,7 @@
 from dataclasses import dataclass
+from typing import Optional
 
+from gen.enums import MarkerTool
 from gen.movementprofile import MovementProfile
 
 
@@ -31,6 +33,61 @@ class GeneratorSettings:
     epilogue_end_position: tuple[int, int]
     """Позиция после окончания печати"""
 
+    pen_lift_timeout_ms: int = 300
+    """Пауза после подъёма пера (Без смены маркера)"""
+
+    pen_lower_timeout_ms: int = 300
+    """Пауза после опускания того же маркера"""
+
+    pen_down_max_gap: int = 1
+    """Наибольший разрыв между траекториями одного маркера, преодолеваемый без подъёма пера"""
+
+    pen_down_max_retrace: int = 20
+    """Наибольшая длина перехода по уже нарисованной линии без подъёма пера"""
+
+    auto_long_line_length: int = 20
+    """Длина отрезка, начиная с которой автоматический выбор профиля считает его длинной линией"""
+
+    auto_micro_length: int = 2
+    """Длина отрезка, меньше которой автоматический выбор профиля считает его малым"""
+
+    junction_deviation_um: int = 50
+    """Допустимое отклонение от вершины на стыке отрезков при планировании скорости с упреждением (мкм)"""
+
+    ordering_time_budget_ms: int = 2000
+    """Бюджет времени оптимизации порядка траекторий при экспорте (На всё задание)"""
+
+    overlap_tolerance_um: int = 500
+    """Наибольшее расстояние между линиями одного инструмента, при котором повторная линия не рисуется (мкм)"""
+
+    weld_tolerance: int = 0
+    """Наибольшее расстояние между концами траекторий, свариваемых в один штрих (0 - только совпадающие)"""
+
+    plotter_count: int = 1
+    """Количество плоттеров, между которыми делится задание при экспорте"""
+
+    plotter_tools: tuple[int, ...] = ()
+    """Маски инструментов каждого плоттера (1 - левый маркер, 2 - правый, 3 - оба; Не заданные и 0 - все инструменты)"""
+
+    write_ir_text: bool = False
+    """Записывать рядом с байт-кодом текстовое промежуточное представление (.txt)"""
+
+    def getPlotterTools(self) -> Optional[list[set[MarkerTool]]]:
+        """Инструменты каждого плоттера (None - все плоттеры со всеми инструментами)"""
+        markers = (MarkerTool.LEFT, MarkerTool.RIGHT)
+        everything = set(markers)
+
+        ret = [
+            {tool for tool in markers if mask & tool} or everything
+            for mask in self.plotter_tools[:self.plotter_count]
+        ]
+        ret += [everything] * (self.plotter_count - len(ret))
+
+        if all(tools == everything for tools in ret):
+            return None
+
+        return ret
+
     def getProfileByIndex(self, index: int) -> MovementProfile:
         return (
             self.micro_curve_profile,
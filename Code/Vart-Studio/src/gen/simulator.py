@@ -0,0 +1,333 @@
+"""Моделирование выполнения задания"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import ClassVar
+from typing import Sequence
+
+import numpy as np
+
+from bytelang.content.impl.environments import Environment
+from bytelang.content.impl.primitives import PrimitiveType
+from gen.agents import MacroAgent
+from gen.agents import RecordingAgent
+from gen.enums import MarkerTool
+from gen.enums import PlannerMode
+from gen.enums import VartInstruction
+from gen.settings import GeneratorSettings
+from gen.trajectory import Trajectory
+from tools import Range
+
+
+@dataclass(frozen=True)
+class JobProgram:
+    """Таблица инструкций задания для моделирования"""
+
+    opcodes: np.ndarray
+    """Коды инструкций (N,)"""
+
+    arguments: np.ndarray
+    """Аргументы инструкций (N, RecordingAgent.ARGUMENTS_MAX)"""
+
+    trajectory_bounds: np.ndarray
+    """Индексы первых инструкций траекторий и конец последней (Пусто, если траектории неизвестны)"""
+
+    trajectory_names: tuple[str, ...]
+    """Наименования траекторий"""
+
+    @classmethod
+    def fromTrajectories(cls, trajectories: Sequence[Trajectory], settings: GeneratorSettings) -> JobProgram:
+        """Сгенерировать задание так же, как при экспорте, без компиляции"""
+        recorder = RecordingAgent()
+        agent = MacroAgent(recorder, settings, sum(t.vertexCount() for t in trajectories))
+
+        agent.prologue()
+
+        for trajectory in trajectories:
+            recorder.markTrajectory()
+            trajectory.run(agent, settings)
+
+        recorder.markTrajectory()
+        agent.epilogue()
+
+        return cls.fromRecording(recorder, trajectories)
+
+    @classmethod
+    def fromRecording(cls, recorder: RecordingAgent, trajectories: Sequence[Trajectory]) -> JobProgram:
+        """
+        Задание, записанное агентом во время генерации (Например, параллельно экспорту)
+        :param recorder: Агент, записавший задание и отметивший траектории
+        :param trajectories: Траектории задания
+        """
+        return cls(recorder.opcodes(), recorder.arguments(), recorder.trajectoryBounds(), tuple(t.name for t in trajectories))
+
+    @classmethod
+    def fromBytecode(cls, bytecode: bytes, environment: Environment) -> JobProgram:
+        """
+        Прочитать скомпилированное задание (Разбивка по траекториям недоступна)
+        :param bytecode: Байт-код программы
+        :param environment: Окружение, в котором программа скомпилирована
+        """
+        profile = environment.profile
+        instructions = {ins.index: ins for ins in environment.instructions.values()}
+        read_index = profile.instruction_index.packer.unpack_from
+        (offset,) = profile.pointer_heap.packer.unpack_from(bytecode, 0)
+
+        offsets = list[int]()
+        indices = list[int]()
+
+        while offset < len(bytecode):
+            (index,) = read_index(bytecode, offset)
+
+            if (instruction := instructions.get(index)) is None:
+                raise ValueError(f"Unknown instruction index {index} at {offset}")
+
+            offsets.append(offset)
+            indices.append(index)
+            offset += instruction.size
+
+            if instruction.name == VartInstruction.QUIT.name.lower():
+                break
+
+        buffer = np.frombuffer(bytecode, dtype=np.uint8)
+        offsets = np.array(offsets, dtype=np.int64)
+        indices = np.array(indices, dtype=np.int64)
+
+        opcodes = np.zeros(len(offsets), dtype=np.int8)
+        arguments = np.zeros((len(offsets), RecordingAgent.ARGUMENTS_MAX), dtype=np.float64)
+
+        for index, instruction in instructions.items():
+            rows = np.flatnonzero(indices == index)
+
+            if len(rows) == 0:
+                continue
+
+            if (opcode := VartInstruction.__members__.get(instruction.name.upper())) is None:
+                raise ValueError(f"Instruction {instruction.name} is not supported by simulator")
+
+            opcodes[rows] = opcode
+            position = offsets[rows] + profile.instruction_index.size
+
+            for column, argument in enumerate(instruction.arguments):
+                values = cls._gather(buffer, position, argument.primitive_type)
+
+                if argument.pointing_type is not None:
+                    values = cls._gather(buffer, values.astype(np.int64), argument.pointing_type)
+
+                arguments[rows, column] = values
+                position = position + argument.primitive_type.size
+
+        return cls(opcodes, arguments, np.zeros(0, dtype=np.int64), ())
+
+    @staticmethod
+    def _gather(buffer: np.ndarray, positions: np.ndarray, primitive: PrimitiveType) -> np.ndarray:
+        """Прочитать значения примитивного типа по смещениям"""
+        raw = buffer[positions[:, None] + np.arange(primitive.size)]
+        return raw.view(np.dtype(primitive.packer.format)).ravel().astype(np.float64)
+
+
+@dataclass(frozen=True)
+class TrajectoryTiming:
+    """Время печати траектории"""
+
+    name: str
+    """Наименование траектории"""
+
+    duration_seconds: float
+    """Длительность с переходом к началу и сменой инструмента"""
+
+    pen_down_length: float
+    """Путь с опущенным пером"""
+
+    pen_up_length: float
+    """Путь с поднятым пером"""
+
+
+@dataclass(frozen=True)
+class SimulationReport:
+    """Отчёт моделирования задания"""
+
+    SLOWEST_COUNT: ClassVar[int] = 5
+    """Количество самых долгих траекторий в сообщении"""
+
+    duration_seconds: float
+    """Общая длительность"""
+
+    pen_down_length: float
+    """Путь с опущенным пером"""
+
+    pen_down_seconds: float
+    """Время перемещений с опущенным пером"""
+
+    pen_up_length: float
+    """Путь с поднятым пером"""
+
+    pen_up_seconds: float
+    """Время перемещений с поднятым пером"""
+
+    wait_seconds: float
+    """Время пауз и поворота сервопривода инструмента"""
+
+    trajectories: tuple[TrajectoryTiming, ...]
+    """Разбивка по траекториям"""
+
+    def getMessage(self) -> str:
+        """Получить сообщение отчёта"""
+        lines = [
+            f"Print time : {timedelta(seconds=round(self.duration_seconds))} "
+            f": pen down {self.pen_down_length:.0f} mm in {self.pen_down_seconds:.0f} s "
+            f": pen up {self.pen_up_length:.0f} mm in {self.pen_up_seconds:.0f} s "
+            f": waits {self.wait_seconds:.0f} s"
+        ]
+
+        slowest = sorted(self.trajectories, key=lambda t: t.duration_seconds, reverse=True)[:self.SLOWEST_COUNT]
+        lines.extend(f"Trajectory : '{t.name}' : {t.duration_seconds:.1f} s : {t.pen_down_length:.0f} mm drawn" for t in slowest)
+
+        return "\n".join(lines)
+
+
+class JobSimulator:
+    """
+    Кинематическая модель устройства
+    Повторяет поведение планировщика прошивки в каждом режиме (Ограничения скорости и ускорения прошивки),
+    паузы delay_ms и поворот сервопривода инструмента. Все инструкции обрабатываются векторно
+    """
+
+    ORIGIN: ClassVar[tuple[float, float]] = (0.0, 0.0)
+    """Начальная позиция устройства"""
+
+    SPEED_RANGE: ClassVar[Range[float]] = Range(5.0, 150.0)
+    """Диапазон скоростей планировщика прошивки"""
+
+    ACCEL_RANGE: ClassVar[Range[float]] = Range(25.0, 100.0)
+    """Диапазон ускорений планировщика прошивки"""
+
+    DEFAULT_SPEED: ClassVar[float] = 150.0
+    """Скорость по умолчанию"""
+
+    DEFAULT_ACCEL: ClassVar[float] = 50.0
+    """Ускорение по умолчанию"""
+
+    DEFAULT_MODE: ClassVar[PlannerMode] = PlannerMode.ACCEL
+    """Режим планировщика по умолчанию"""
+
+    POSITION_SPEED: ClassVar[float] = 100.0
+    """Оценка скорости в режиме позиции (Ограничена только приводом)"""
+
+    SPEED_MIN_PATH: ClassVar[float] = 1.0
+    """Путь, короче которого режим скорости не перемещается"""
+
+    TOOL_ANGLES: ClassVar[tuple[int, ...]] = (78, 40, 120)
+    """Угол сервопривода для каждого инструмента"""
+
+    TOOL_STEP_SECONDS: ClassVar[float] = 0.012
+    """Время поворота сервопривода инструмента на градус"""
+
+    @classmethod
+    def simulate(cls, program: JobProgram) -> SimulationReport:
+        """Смоделировать выполнение задания"""
+        opcodes = program.opcodes.astype(np.int64)
+        arguments = program.arguments
+        count = len(opcodes)
+
+        quits = np.flatnonzero(opcodes == VartInstruction.QUIT)
+        alive = np.arange(count) < (quits[0] if len(quits) else count)
+
+        speed = np.clip(cls._forwardFill(opcodes == VartInstruction.SET_SPEED, arguments[:, 0], cls.DEFAULT_SPEED), cls.SPEED_RANGE.min, cls.SPEED_RANGE.max)
+        accel = np.clip(cls._forwardFill(opcodes == VartInstruction.SET_ACCEL, arguments[:, 0], cls.DEFAULT_ACCEL), cls.ACCEL_RANGE.min, cls.ACCEL_RANGE.max)
+        mode = cls._forwardFill(opcodes == VartInstruction.SET_PLANNER_MODE, arguments[:, 0], cls.DEFAULT_MODE)
+        tool = cls._forwardFill(opcodes == VartInstruction.SET_ACTIVE_TOOL, arguments[:, 0], MarkerTool.NONE)
+
+        durations = np.zeros(count)
+
+        # перемещения
+        moves = np.flatnonzero(((opcodes == VartInstruction.SET_POSITION) | (opcodes == VartInstruction.SET_POSITION_SPEED)) & alive)
+        x = np.concatenate(([cls.ORIGIN[0]], arguments[moves, 0]))
+        y = np.concatenate(([cls.ORIGIN[1]], arguments[moves, 1]))
+        lengths = np.hypot(np.diff(x), np.diff(y))
+        move_times = cls._moveTimes(lengths, opcodes[moves], arguments[moves, 2], mode[moves], speed[moves], accel[moves])
+        durations[moves] = move_times
+
+        # паузы
+        delays = np.flatnonzero((opcodes == VartInstruction.DELAY_MS) & alive)
+        durations[delays] = arguments[delays, 0] / 1000
+
+        # поворот сервопривода: с предыдущего угла до нового по градусу, первая установка мгновенна
+        changes = np.flatnonzero((opcodes == VartInstruction.SET_ACTIVE_TOOL) & alive)
+        angles = np.array(cls.TOOL_ANGLES)[arguments[changes, 0].astype(np.int64)]
+        steps = np.abs(np.diff(angles, prepend=angles[:1]))
+        durations[changes] += np.where(steps > 0, (steps + 1) * cls.TOOL_STEP_SECONDS, 0.0)
+
+        pen_down = tool[moves] != MarkerTool.NONE
+
+        return SimulationReport(
+            float(durations.sum()),
+            float(lengths[pen_down].sum()),
+            float(move_times[pen_down].sum()),
+            float(lengths[~pen_down].sum()),
+            float(move_times[~pen_down].sum()),
+            float(durations[delays].sum() + durations[changes].sum()),
+            cls._breakdown(program, durations, moves, lengths, pen_down)
+        )
+
+    @classmethod
+    def _moveTimes(cls, lengths: np.ndarray, opcodes: np.ndarray, exit_speeds: np.ndarray, mode: np.ndarray, speed: np.ndarray, accel: np.ndarray) -> np.ndarray:
+        """Длительности перемещений в режимах планировщика"""
+        accelerated = mode == PlannerMode.ACCEL
+
+        # скорость на стыке переходит к следующему перемещению, только если оба рассчитаны с упреждением
+        planned = accelerated & (opcodes == VartInstruction.SET_POSITION_SPEED)
+        exit_set = np.where(planned, np.minimum(exit_speeds, speed), 0.0)
+        entry = np.where(planned & np.concatenate(([False], planned[:-1])), np.minimum(np.concatenate(([0.0], exit_set[:-1])), speed), 0.0)
+        exit_reached = np.minimum(exit_set, np.sqrt(entry * entry + 2 * accel * lengths))
+
+        return np.select(
+            (mode == PlannerMode.POSITION, mode == PlannerMode.SPEED, accelerated),
+            (
+                lengths / cls.POSITION_SPEED,
+                np.where(lengths < cls.SPEED_MIN_PATH, 0.0, np.ceil(1e3 * lengths / speed) / 1e3),
+                cls._trapezoidTimes(lengths, entry, exit_reached, speed, accel)
+            ),
+            0.0
+        )
+
+    @staticmethod
+    def _trapezoidTimes(lengths: np.ndarray, entry: np.ndarray, exit: np.ndarray, speed: np.ndarray, accel: np.ndarray) -> np.ndarray:
+        """Время трапецеидального профиля скорости с заданными начальной и конечной скоростями"""
+        peak = np.clip(np.sqrt((2 * accel * lengths + entry * entry + exit * exit) / 2), np.maximum(entry, exit), speed)
+        cruise = np.maximum(lengths - (2 * peak * peak - entry * entry - exit * exit) / (2 * accel), 0.0)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ret = (2 * peak - entry - exit) / accel + cruise / peak
+
+        return np.where(lengths > 0, ret, 0.0)
+
+    @staticmethod
+    def _forwardFill(mask: np.ndarray, values: np.ndarray, initial: float) -> np.ndarray:
+        """Значение последней установившей его инструкции (Включительно) для каждой инструкции"""
+        last = np.maximum.accumulate(np.where(mask, np.arange(len(mask)), -1))
+        return np.where(last >= 0, values[np.maximum(last, 0)], initial)
+
+    @staticmethod
+    def _breakdown(program: JobProgram, durations: np.ndarray, moves: np.ndarray, lengths: np.ndarray, pen_down: np.ndarray) -> tuple[TrajectoryTiming, ...]:
+        """Разбивка длительности и пути по траекториям"""
+        bounds = program.trajectory_bounds
+        total = len(program.trajectory_names)
+
+        if total == 0:
+            return ()
+
+        owners = np.searchsorted(bounds, np.arange(len(durations)), "right") - 1
+        owned = (owners >= 0) & (owners < total)
+        seconds = np.bincount(owners[owned], durations[owned], total)
+
+        move_owners = owners[moves]
+        move_owned = owned[moves]
+        drawn = np.bincount(move_owners[move_owned & pen_down], lengths[move_owned & pen_down], total)
+        idle = np.bincount(move_owners[move_owned & ~pen_down], lengths[move_owned & ~pen_down], total)
+
+        return tuple(
+            TrajectoryTiming(name, duration, down, up)
+            for name, duration, down, up in zip(program.trajectory_names, seconds.tolist(), drawn.tolist(), idle.tolist())
+        )
@@ -0,0 +1,196 @@
+"""Пространственный индекс точек"""
+from __future__ import annotations
+
+from math import floor
+from math import hypot
+from math import sqrt
+from typing import Sequence
+
+import numpy as np
+
+from tools import raggedRange
+
+
+def gridCellSize(points: np.ndarray, population: float) -> float:
+    """
+    Размер ячейки сетки, в занятых ячейках которой в среднем лежит заданное количество точек
+    Начальный размер рассчитан на равномерное распределение, затем уточняется по числу занятых ячеек,
+    чтобы плотные скопления точек не попадали в одну ячейку
+    """
+    if len(points) == 0:
+        return 1.0
+
+    low = points.min(axis=0)
+    extent = float(np.ptp(points, axis=0).max())
+    cell = max(extent * sqrt(population / len(points)), 1e-9)
+
+    for _ in range(2):
+        cells = np.floor((points - low) / cell).astype(np.int64)
+        occupied = len(np.unique(cells[:, 0] * (int(cells[:, 1].max()) + 1) + cells[:, 1]))
+        cell = max(cell * sqrt(population * occupied / len(points)), 1e-9)
+
+    return cell
+
+
+def nearestNeighbours(sources: np.ndarray, targets: np.ndarray, count: int) -> np.ndarray:
+    """
+    Приближённые списки ближайших целей для каждого источника
+    Цели раскладываются по сетке с ячейками примерно на count / 2 точек, кандидаты берутся из соседних 3x3 ячеек
+    :param sources: Точки запросов (N, 2)
+    :param targets: Точки целей (M, 2)
+    :param count: Длина списков
+    :return: Индексы целей (N, count) по возрастанию расстояния, недостающие заполнены -1
+    """
+    result = np.full((len(sources), count), -1, dtype=np.int64)
+
+    if len(sources) == 0 or len(targets) == 0 or count < 1:
+        return result
+
+    low = targets.min(axis=0)
+    cell = gridCellSize(targets, max(count / 2, 1))
+    target_cells = np.floor((targets - low) / cell).astype(np.int64) + 1
+    width = int(target_cells.max()) + 2
+
+    keys = target_cells[:, 0] * width + target_cells[:, 1]
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+
+    source_cells = np.clip(np.floor((sources - low) / cell) + 1, 1, width - 2).astype(np.int64)
+    limit = 32 * count
+    chunk = 1 << 14
+
+    for begin in range(0, len(sources), chunk):
+        block = source_cells[begin:begin + chunk]
+        rows = np.arange(len(block))
+
+        # кандидаты каждого источника укладываются в строку матрицы без сортировки
+        firsts = []
+        counts = []
+
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                query = (block[:, 0] + dx) * width + block[:, 1] + dy
+                first = np.searchsorted(sorted_keys, query, "left")
+                firsts.append(first)
+                counts.append(np.searchsorted(sorted_keys, query, "right") - first)
+
+        columns = np.cumsum(counts, axis=0) - counts
+        candidates = np.full((len(block), max(min(int(columns[-1].max() + counts[-1].max()), limit), 1)), -1, dtype=np.int64)
+
+        for first, offset_counts, column in zip(firsts, counts, columns):
+            local = raggedRange(offset_counts)
+            cells = np.repeat(column, offset_counts) + local
+            kept = cells < candidates.shape[1]
+            candidates[np.repeat(rows, offset_counts)[kept], cells[kept]] = order[np.repeat(first, offset_counts) + local][kept]
+
+        deltas = targets[candidates] - sources[begin:begin + chunk, None]
+        distances = np.where(candidates >= 0, np.hypot(deltas[..., 0], deltas[..., 1]), np.inf)
+
+        size = min(count, candidates.shape[1])
+
+        if size < candidates.shape[1]:
+            nearest = np.argpartition(distances, size - 1, axis=1)[:, :size]
+
+        else:
+            nearest = np.broadcast_to(np.arange(size), (len(block), size))
+
+        nearest = np.take_along_axis(nearest, np.argsort(np.take_along_axis(distances, nearest, axis=1), axis=1, kind="stable"), axis=1)
+        found = np.take_along_axis(candidates, nearest, axis=1)
+        result[begin:begin + chunk, :size] = np.where(np.isfinite(np.take_along_axis(distances, nearest, axis=1)), found, -1)
+
+    return result
+
+
+class SpatialGrid:
+    """
+    Сетка точек с удалением
+    Поиск ближайшей оставшейся точки обходит кольца ячеек вокруг запроса, пока ближайшая найденная точка
+    не окажется ближе следующего кольца. Когда колец больше, чем оставшихся точек, точки перебираются напрямую.
+    """
+
+    def __init__(self, points: Sequence[tuple[float, float]]) -> None:
+        """
+        :param points: Точки (x, y), индекс точки - её номер в последовательности
+        """
+        self._xs = [float(x) for x, _ in points]
+        self._ys = [float(y) for _, y in points]
+
+        count = len(self._xs)
+
+        self._min_x = min(self._xs, default=0.0)
+        self._min_y = min(self._ys, default=0.0)
+        self._cell = gridCellSize(np.array((self._xs, self._ys), dtype=np.float64).T.reshape(-1, 2), 1)
+
+        self._cells = dict[tuple[int, int], list[int]]()
+        self._slot = [0] * count
+        self._alive = set(range(count))
+
+        for index in range(count):
+            cell = self._cellOf(self._xs[index], self._ys[index])
+            bucket = self._cells.setdefault(cell, [])
+            self._slot[index] = len(bucket)
+            bucket.append(index)
+
+    def __len__(self) -> int:
+        return len(self._alive)
+
+    def _cellOf(self, x: float, y: float) -> tuple[int, int]:
+        return floor((x - self._min_x) / self._cell), floor((y - self._min_y) / self._cell)
+
+    def remove(self, index: int) -> None:
+        """Удалить точку"""
+        self._alive.discard(index)
+
+        bucket = self._cells[self._cellOf(self._xs[index], self._ys[index])]
+        slot = self._slot[index]
+        last = bucket.pop()
+
+        if last != index:
+            bucket[slot] = last
+            self._slot[last] = slot
+
+    def nearest(self, x: float, y: float) -> int:
+        """
+        Ближайшая оставшаяся точка
+        :return: Индекс точки или -1, если точек не осталось
+        """
+        if not self._alive:
+            return -1
+
+        center_x, center_y = self._cellOf(x, y)
+        best = -1
+        best_distance = float("inf")
+        radius = 0
+
+        while True:
+            # колец больше, чем оставшихся точек: прямой перебор дешевле
+            if 8 * radius > len(self._alive):
+                return min(self._alive, key=lambda i: (hypot(self._xs[i] - x, self._ys[i] - y), i))
+
+            for cell in self._ring(center_x, center_y, radius):
+                for index in self._cells.get(cell, ()):
+                    distance = hypot(self._xs[index] - x, self._ys[index] - y)
+
+                    if distance < best_distance or (distance == best_distance and index < best):
+                        best = index
+                        best_distance = distance
+
+            if best != -1 and best_distance <= radius * self._cell:
+                return best
+
+            radius += 1
+
+    @staticmethod
+    def _ring(center_x: int, center_y: int, radius: int) -> list[tuple[int, int]]:
+        """Ячейки на границе квадрата заданного радиуса"""
+        if radius == 0:
+            return [(center_x, center_y)]
+
+        left = center_x - radius
+        right = center_x + radius
+        bottom = center_y - radius
+        top = center_y + radius
+
+        ring = [(cx, cy) for cx in range(left, right + 1) for cy in (bottom, top)]
+        ring.extend((cx, cy) for cy in range(bottom + 1, top) for cx in (left, right))
+        return ring
@@ -1,9 +1,18 @@
+from __future__ import annotations
+
 from dataclasses import dataclass
+from dataclasses import replace
+from itertools import islice
+from typing import ClassVar
 from typing import Iterable
+from typing import Optional
 from typing import Sequence
 
 from gen.agents import MacroAgent
 from gen.enums import MarkerTool
+from gen.enums import PlannerMode
+from gen.lookahead import LookAheadPlanner
+from gen.profileselector import ProfileSelector
 from gen.settings import GeneratorSettings
 
 
@@ -11,6 +20,9 @@ from gen.settings import GeneratorSettings
 class Trajectory:
     """Траектория - непрерывная кривая"""
 
+    AUTO_PLANNER_MODE: ClassVar[int] = 3
+    """Режим планировщика, при котором профиль выбирается автоматически по участкам траектории"""
+
     name: str
     """Наименование траектории для заметок"""
 
@@ -24,7 +36,7 @@ class Trajectory:
     """Инструмент печати"""
 
     planner_mode: int
-    """Режим планировщика"""
+    """Режим планировщика (Индекс профиля или AUTO_PLANNER_MODE)"""
 
     def centroid(self) -> tuple[float, float]:
         _l = len(self.x_positions)
@@ -32,10 +44,54 @@ class Trajectory:
         y = sum(self.y_positions) / _l
         return x, y
 
+    def start(self) -> tuple[int, int]:
+        """Первая вершина"""
+        return self.x_positions[0], self.y_positions[0]
+
+    def end(self) -> tuple[int, int]:
+        """Последняя вершина"""
+        return self.x_positions[-1], self.y_positions[-1]
+
+    def isClosed(self) -> bool:
+        """Замкнутая траектория (Первая вершина совпадает с последней) может начинаться с любой своей вершины"""
+        return len(self.x_positions) > 2 and self.start() == self.end()
+
+    def reversed(self) -> Trajectory:
+        """Та же траектория, пройденная в обратном направлении"""
+        return replace(self, x_positions=self.x_positions[::-1], y_positions=self.y_positions[::-1])
+
+    def rotated(self, index: int) -> Trajectory:
+        """Замкнутая траектория, начинающаяся с вершины index"""
+        x = list(self.x_positions[:-1])
+        y = list(self.y_positions[:-1])
+        return replace(self, x_positions=x[index:] + x[:index + 1], y_positions=y[index:] + y[:index + 1])
+
     def vertexCount(self) -> int:
         """Количество вершин"""
         return len(tuple(self.x_positions))
 
+    def profileRuns(self, settings: GeneratorSettings) -> list[tuple[int, int]]:
+        """Участки траектории с одним профилем: пары (Количество отрезков, Индекс профиля)"""
+        if self.planner_mode != self.AUTO_PLANNER_MODE:
+            return [(len(self.x_positions) - 1, self.planner_mode)]
+
+        return ProfileSelector(settings.auto_long_line_length, settings.auto_micro_length).runs(self.x_positions, self.y_positions)
+
+    def exitSpeeds(self, runs: Sequence[tuple[int, int]], settings: GeneratorSettings) -> list[Optional[int]]:
+        """Скорости в конце отрезков, рассчитанные с упреждением (None - отрезок не в режиме ускорения)"""
+        profiles = [settings.getProfileByIndex(index) for count, index in runs for _ in range(count)]
+        accelerated = [profile.mode == PlannerMode.ACCEL for profile in profiles]
+
+        if not any(accelerated):
+            return [None] * len(profiles)
+
+        # отрезки других режимов заканчиваются остановкой: их предел скорости для планировщика нулевой
+        speeds = [profile.speed if a else 0 for profile, a in zip(profiles, accelerated)]
+        accels = [profile.accel if a else 0 for profile, a in zip(profiles, accelerated)]
+        planned = LookAheadPlanner(settings.junction_deviation_um / 1000).plan(self.x_positions, self.y_positions, speeds, accels)
+
+        return [speed if a else None for speed, a in zip(planned, accelerated)]
+
     def run(self, agent: MacroAgent, settings: GeneratorSettings):
         """Использовать агента для преодоления траектории"""
 
@@ -44,18 +100,17 @@ class Trajectory:
 
         agent.note(f"Trajectory : '{self.name}' Begin")
 
-        agent.setProfile(settings.free_move_profile)
-        agent.setTool(MarkerTool.NONE)
-
-        agent.step(x_start, y_start)
+        agent.travel(x_start, y_start, self.tool)
 
         agent.setTool(self.tool)
-        agent.setProfile(settings.getProfileByIndex(self.planner_mode))
 
-        for x, y in zip(x_positions, y_positions):
-            agent.step(x, y)
+        runs = self.profileRuns(settings)
+        steps = iter(zip(x_positions, y_positions, self.exitSpeeds(runs, settings)))
+
+        for count, profile_index in runs:
+            agent.setProfile(settings.getProfileByIndex(profile_index))
 
-        agent.setProfile(settings.free_move_profile)
-        agent.setTool(MarkerTool.NONE)
+            for x, y, exit_speed in islice(steps, count):
+                agent.step(x, y, exit_speed)
 
         agent.note(f"Trajectory : '{self.name}' End")
@@ -19,6 +19,9 @@ Vec2i = Vec2D[int]
 
 
 class VertexGenerator:
+    STROKE_BREAK: Final[float] = math.nan
+    """Разрыв между штрихами (Перо поднимается)"""
+
     RESOLUTION_RANGE: Final[Range[int]] = Range(1, 1000)
     POLYGON_VERTEX_COUNT_RANGE: Final[Range[int]] = Range(3, 20)
     SPIRAL_REPEATS: Final[Range[int]] = Range(1, 50)
@@ -39,6 +42,30 @@ class VertexGenerator:
         x, y = tuple(zip(*map(__transform, zip(*v))))
         return x, y
 
+    @staticmethod
+    def splitStrokes[T: Number](x_positions: Iterable[T], y_positions: Iterable[T]) -> list[tuple[list[T], list[T]]]:
+        """Разделить вершины на штрихи по разрывам STROKE_BREAK"""
+        strokes = list()
+        stroke_x = list()
+        stroke_y = list()
+
+        for x, y in zip(x_positions, y_positions):
+            if math.isnan(x):
+                if stroke_x:
+                    strokes.append((stroke_x, stroke_y))
+                    stroke_x = list()
+                    stroke_y = list()
+
+                continue
+
+            stroke_x.append(x)
+            stroke_y.append(y)
+
+        if stroke_x:
+            strokes.append((stroke_x, stroke_y))
+
+        return strokes
+
     @classmethod
     def spiral(cls, resolution: int, k: float = 1.0) -> Vertices:
         k2_pi_p = 2 * k * pi / resolution
@@ -0,0 +1,207 @@
+"""Сварка траекторий в непрерывные штрихи"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from dataclasses import replace
+from math import floor
+from math import hypot
+from typing import Sequence
+
+import numpy as np
+
+from gen.enums import MarkerTool
+from gen.trajectory import Trajectory
+
+
+@dataclass(frozen=True)
+class WeldReport:
+    """Отчёт сварки траекторий"""
+
+    fragments: int
+    """Количество траекторий до сварки"""
+
+    strokes: int
+    """Количество траекторий после сварки"""
+
+    def getMessage(self) -> str:
+        """Получить сообщение отчёта"""
+        percent = (1 - self.strokes / self.fragments) * 100 if self.fragments else 0.0
+        return f"Welding : {self.fragments} -> {self.strokes} trajectories (-{percent:.1f}%)"
+
+
+class StrokeWelder:
+    """
+    Сварка траекторий с общими концами в непрерывные штрихи
+    Совпадающие концы траекторий объединяются в узлы, различные хешируются в сетку с ячейкой, равной допуску,
+    и привязываются к ближайшему представителю узла в пределах допуска (Без транзитивного объединения).
+    Траектории одного инструмента и режима планировщика становятся рёбрами графа узлов: нечётные узлы попарно соединяются фиктивными рёбрами,
+    эйлеров цикл (Алгоритм Хирхольцера) разрезается по фиктивным рёбрам. Так получается наименьшее число штрихов: по одному на пару нечётных узлов
+    и по одному на компоненту без нечётных узлов
+    """
+
+    def __init__(self, tolerance: float) -> None:
+        """
+        :param tolerance: Наибольшее расстояние между свариваемыми концами (0 - только совпадающие)
+        """
+        self._tolerance = tolerance
+        self._cell = max(tolerance, 1.0)
+
+    def weld(self, trajectories: Sequence[Trajectory]) -> tuple[list[Trajectory], WeldReport]:
+        """
+        Сварить траектории
+        :param trajectories: Исходные траектории
+        :return: Штрихи в порядке первой входящей в них траектории и отчёт
+        """
+        nodes = self.__endpointNodes(trajectories)
+        groups = dict[tuple[MarkerTool, int], list[int]]()
+
+        for index, trajectory in enumerate(trajectories):
+            groups.setdefault((trajectory.tool, trajectory.planner_mode), []).append(index)
+
+        strokes = list[list[tuple[int, bool]]]()
+
+        for members in groups.values():
+            strokes.extend(self.__strokes(members, nodes))
+
+        strokes.sort(key=lambda stroke: min(index for index, _ in stroke))
+        ret = [self.__join(trajectories, stroke) for stroke in strokes]
+
+        return ret, WeldReport(len(trajectories), len(ret))
+
+    def __endpointNodes(self, trajectories: Sequence[Trajectory]) -> list[int]:
+        """Узел каждого конца: концы 2i (начало) и 2i + 1 (конец) траектории i"""
+        ends = np.array([point for t in trajectories for point in (t.start(), t.end())], dtype=np.float64).reshape(-1, 2)
+
+        # совпадающие концы объединяются сразу, допуск проверяется только между различными точками
+        points, inverse = np.unique(ends, axis=0, return_inverse=True)
+        nodes = list(range(len(points)))
+
+        if self._tolerance > 0:
+            # точка привязывается к ближайшему представителю в пределах допуска, иначе сама становится представителем:
+            # цепочка близких точек не сваривает концы, удалённые друг от друга больше допуска
+            representatives = dict[tuple[int, int], list[int]]()
+            xs = points[:, 0].tolist()
+            ys = points[:, 1].tolist()
+
+            for index, (x, y) in enumerate(zip(xs, ys)):
+                cx = floor(x / self._cell)
+                cy = floor(y / self._cell)
+                nearest = -1
+                nearest_distance = self._tolerance
+
+                for dx in (-1, 0, 1):
+                    for dy in (-1, 0, 1):
+                        for other in representatives.get((cx + dx, cy + dy), ()):
+                            if (distance := hypot(xs[other] - x, ys[other] - y)) <= nearest_distance:
+                                nearest = other
+                                nearest_distance = distance
+
+                if nearest == -1:
+                    representatives.setdefault((cx, cy), []).append(index)
+
+                else:
+                    nodes[index] = nearest
+
+        return [nodes[i] for i in inverse.ravel().tolist()]
+
+    @staticmethod
+    def __strokes(members: Sequence[int], nodes: Sequence[int]) -> list[list[tuple[int, bool]]]:
+        """
+        Разбить рёбра группы на наименьшее число путей
+        :return: Пути: пары (Индекс траектории, Пройдена в обратном направлении)
+        """
+        # рёбра: (узел начала, узел конца, индекс траектории или -1 для фиктивного ребра)
+        edges = [(nodes[2 * i], nodes[2 * i + 1], i) for i in members]
+        adjacency = dict[int, list[int]]()
+
+        for edge, (a, b, _) in enumerate(edges):
+            adjacency.setdefault(a, []).append(edge)
+            adjacency.setdefault(b, []).append(edge)
+
+        odd = [node for node, incident in adjacency.items() if len(incident) % 2]
+
+        for a, b in zip(odd[::2], odd[1::2]):
+            adjacency[a].append(len(edges))
+            adjacency[b].append(len(edges))
+            edges.append((a, b, -1))
+
+        used = [False] * len(edges)
+        cursor = dict.fromkeys(adjacency, 0)
+        ret = list[list[tuple[int, bool]]]()
+
+        for start in adjacency:
+            if cursor[start] == len(adjacency[start]):
+                continue
+
+            # итеративный алгоритм Хирхольцера: стек (узел, ребро входа, обратное направление)
+            stack = [(start, -1, False)]
+            circuit = list[tuple[int, bool]]()
+
+            while stack:
+                node = stack[-1][0]
+                incident = adjacency[node]
+
+                while cursor[node] < len(incident) and used[incident[cursor[node]]]:
+                    cursor[node] += 1
+
+                if cursor[node] == len(incident):
+                    _, edge, backward = stack.pop()
+
+                    if edge != -1:
+                        circuit.append((edge, backward))
+
+                    continue
+
+                edge = incident[cursor[node]]
+                used[edge] = True
+                a, b, _ = edges[edge]
+                stack.append((b if a == node else a, edge, a != node))
+
+            circuit.reverse()
+
+            # цикл начинается после фиктивного ребра, чтобы разрез по фиктивным рёбрам не делил путь
+            cut = next((k for k, (edge, _) in enumerate(circuit) if edges[edge][2] == -1), -1)
+            circuit = circuit[cut + 1:] + circuit[:cut + 1]
+            path = list[tuple[int, bool]]()
+
+            for edge, backward in circuit:
+                if edges[edge][2] == -1:
+                    if path:
+                        ret.append(path)
+
+                    path = []
+                    continue
+
+                path.append((edges[edge][2], backward))
+
+            if path:
+                ret.append(path)
+
+        return ret
+
+    @staticmethod
+    def __join(trajectories: Sequence[Trajectory], stroke: Sequence[tuple[int, bool]]) -> Trajectory:
+        """Склеить траектории пути в одну"""
+        first = trajectories[stroke[0][0]]
+
+        if len(stroke) == 1 and not stroke[0][1]:
+            return first
+
+        x_positions = list[int]()
+        y_positions = list[int]()
+
+        for index, backward in stroke:
+            part = trajectories[index].reversed() if backward else trajectories[index]
+            x = list(part.x_positions)
+            y = list(part.y_positions)
+
+            # совпадающая вершина стыка не повторяется
+            if x_positions and x_positions[-1] == x[0] and y_positions[-1] == y[0]:
+                x = x[1:]
+                y = y[1:]
+
+            x_positions.extend(x)
+            y_positions.extend(y)
+
+        name = first.name if len(stroke) == 1 else f"{first.name} (+{len(stroke) - 1})"
+        return replace(first, name=name, x_positions=x_positions, y_positions=y_positions)
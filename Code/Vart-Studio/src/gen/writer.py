@@ -1,13 +1,19 @@
 from dataclasses import dataclass
 from typing import BinaryIO, TextIO
 from typing import Iterable
+from typing import Optional
 
 from bytelang.compiler import ByteLangCompiler
+from bytelang.core.handlers.errors import ErrorHandler
 from bytelang.core.results.compile.abc import CompileResult
-from bytelang.tools.string import FixedStringIO
+from bytelang.core.results.compile.impl import CompileResultError
 from bytelang.utils import LogFlag
+from gen.agents import BinaryAgent
 from gen.agents import LowLevelAgent
 from gen.agents import MacroAgent
+from gen.agents import RecordingAgent
+from gen.agents import TeeAgent
+from gen.agents import TextAgent
 from gen.settings import GeneratorSettings
 from gen.trajectory import Trajectory
 
@@ -19,17 +25,43 @@ class CodeWriter:
     _settings: GeneratorSettings
     _bytelang: ByteLangCompiler
 
-    def run(self, ir_output_stream: TextIO, trajectories: Iterable[Trajectory], bytecode_stream: BinaryIO, log_flag: LogFlag = LogFlag.ALL) -> CompileResult:
-        self._processAgent(MacroAgent(LowLevelAgent(ir_output_stream), self._settings, self._calcTotalStepCount(trajectories)), trajectories)
-        with open(ir_output_stream.name, "rt") as ir_input:
-            return self._bytelang.compile(ir_input, bytecode_stream, log_flag)
+    def run(
+            self, ir_output_stream: Optional[TextIO], trajectories: Iterable[Trajectory], bytecode_stream: BinaryIO,
+            log_flag: LogFlag = LogFlag.ALL, recorder: Optional[RecordingAgent] = None
+    ) -> CompileResult:
+        """
+        Записать байткод
+        Инструкции пакуются сразу в байт-код, текстовое представление пишется только при заданном потоке
+        :param ir_output_stream: Выход текстового представления (None - не записывать)
+        :param recorder: Агент, параллельно записывающий задание для моделирования (Траектории отмечаются)
+        """
+        environment = self._bytelang.getEnvironment(LowLevelAgent.ENVIRONMENT)
+        binary = BinaryAgent(environment)
+        agents = (binary,) + ((TextAgent(ir_output_stream),) if ir_output_stream is not None else ()) + ((recorder,) if recorder is not None else ())
+        agent = binary if len(agents) == 1 else TeeAgent(agents)
 
-    def _processAgent(self, agent: MacroAgent, trajectories: Iterable[Trajectory]):
+        try:
+            self._processAgent(MacroAgent(agent, self._settings, self._calcTotalStepCount(trajectories)), trajectories, recorder)
+
+        except ValueError as e:
+            errors_handler = ErrorHandler()
+            errors_handler.write(str(e))
+            return CompileResultError(ir_output_stream, bytecode_stream, errors_handler)
+
+        return self._bytelang.compilePacked(environment, binary.bytecode(), bytecode_stream, log_flag)
+
+    def _processAgent(self, agent: MacroAgent, trajectories: Iterable[Trajectory], recorder: Optional[RecordingAgent] = None):
         agent.prologue()
 
         for trajectory in trajectories:
+            if recorder is not None:
+                recorder.markTrajectory()
+
             trajectory.run(agent, self._settings)
 
+        if recorder is not None:
+            recorder.markTrajectory()
+
         agent.epilogue()
 
     @staticmethod
@@ -0,0 +1,123 @@
+"""Кэш предобработанных сеток"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from dataclasses import fields
+from hashlib import sha1
+from pathlib import Path
+from typing import Callable
+from typing import ClassVar
+from typing import Optional
+from typing import Sequence
+
+import numpy as np
+
+from loader.meshdata import MeshData
+
+
+class MeshCache:
+    """
+    Кэш сеток на диске
+    Запись - каталог с уровнями детализации каждой сетки файла в виде массивов MeshData в формате .npy,
+    которые при повторном открытии отображаются в память
+    Ключ записи - путь, время изменения и размер исходного файла
+    Записи с тем же путём, но другим состоянием файла удаляются при сохранении новой
+    """
+
+    FORMAT_VERSION: ClassVar[int] = 3
+    """Версия формата записи (Смена версии делает недействительными старые записи)"""
+
+    META_FILE: ClassVar[str] = "meta.json"
+    """Файл с именами уровней сеток записи"""
+
+    ARRAY_FIELDS: ClassVar[tuple[str, ...]] = tuple(f.name for f in fields(MeshData) if f.name != "name")
+    """Поля MeshData, сохраняемые массивами"""
+
+    TEMP_SUFFIX: ClassVar[str] = ".tmp"
+    """Суффикс каталога записи, которая ещё пишется"""
+
+    def __init__(self, folder: Path) -> None:
+        self._folder = Path(folder)
+
+    def load(self, path: Path, loader: Callable[[Path], Sequence[Sequence[MeshData]]]) -> Sequence[Sequence[MeshData]]:
+        """
+        Получить сетки файла из кэша, либо загрузить и сохранить их
+        :param path: Путь к исходному файлу
+        :param loader: Загрузчик исходного файла (Уровни детализации каждой сетки, начиная с исходной)
+        """
+        path = Path(path)
+        prefix = self._makePrefix(path)
+        entry = self._folder / f"{prefix}-{self._makeKey(path)}"
+
+        if (ret := self._read(entry)) is not None:
+            return ret
+
+        ret = loader(path)
+        self._prune(prefix)
+        self._write(entry, ret)
+        return ret
+
+    def clear(self) -> None:
+        """Удалить все записи"""
+        shutil.rmtree(self._folder, ignore_errors=True)
+
+    @staticmethod
+    def _makePrefix(path: Path) -> str:
+        """Часть ключа, общая для всех записей исходного файла"""
+        return sha1(str(path.resolve()).encode()).hexdigest()
+
+    def _makeKey(self, path: Path) -> str:
+        stat = path.stat()
+        return sha1(f"{self.FORMAT_VERSION}:{stat.st_mtime_ns}:{stat.st_size}".encode()).hexdigest()
+
+    def _prune(self, prefix: str) -> None:
+        """Удалить все записи исходного файла (Устаревшие и повреждённые)"""
+        for entry in self._folder.glob(f"{prefix}-*"):
+            if entry.suffix != self.TEMP_SUFFIX:
+                shutil.rmtree(entry, ignore_errors=True)
+
+    def _read(self, entry: Path) -> Optional[Sequence[Sequence[MeshData]]]:
+        try:
+            with open(entry / self.META_FILE) as f:
+                meshes = json.load(f)["meshes"]
+
+            return tuple(
+                tuple(
+                    MeshData(name=name, **{
+                        field: np.load(entry / str(index) / str(level) / f"{field}.npy", mmap_mode="r")
+                        for field in self.ARRAY_FIELDS
+                    })
+                    for level, name in enumerate(names)
+                )
+                for index, names in enumerate(meshes)
+            )
+
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write(self, entry: Path, meshes: Sequence[Sequence[MeshData]]) -> None:
+        temp = entry.with_name(f"{entry.name}.{os.getpid()}{self.TEMP_SUFFIX}")
+
+        try:
+            temp.mkdir(parents=True, exist_ok=True)
+
+            for index, levels in enumerate(meshes):
+                for level, mesh in enumerate(levels):
+                    folder = temp / str(index) / str(level)
+                    folder.mkdir(parents=True)
+
+                    for field in self.ARRAY_FIELDS:
+                        np.save(folder / f"{field}.npy", getattr(mesh, field))
+
+            with open(temp / self.META_FILE, "w") as f:
+                json.dump({"meshes": [[mesh.name for mesh in levels] for levels in meshes]}, f)
+
+            os.replace(temp, entry)
+
+        except OSError:
+            pass
+
+        finally:
+            shutil.rmtree(temp, ignore_errors=True)
@@ -0,0 +1,237 @@
+"""Упрощение сетки и уровни детализации"""
+from __future__ import annotations
+
+from typing import ClassVar
+
+import numpy as np
+
+from loader.meshdata import MeshData
+
+
+class QuadricDecimator:
+    """
+    Упрощение сетки стягиванием рёбер по квадратичной метрике ошибки (Garland-Heckbert)
+    Рёбра стягиваются параллельными раундами: в раунде стягиваются рёбра, стоимость которых минимальна
+    среди всех рёбер их вершин, поэтому стягивания одного раунда не затрагивают общих вершин
+    """
+
+    LEVEL_RATIO: ClassVar[float] = 0.5
+    """Доля треугольников следующего уровня детализации"""
+
+    MAX_LEVELS: ClassVar[int] = 6
+    """Наибольшее количество уровней (Включая исходную сетку)"""
+
+    MIN_FACES: ClassVar[int] = 64
+    """Сетки с меньшим числом треугольников не упрощаются"""
+
+    BOUNDARY_WEIGHT: ClassVar[float] = 100.0
+    """Вес штрафа за смещение граничных рёбер"""
+
+    @classmethod
+    def buildLevels(cls, data: MeshData) -> tuple[MeshData, ...]:
+        """
+        Построить пирамиду уровней детализации
+        :return: Уровни от исходной сетки к самой грубой
+        """
+        levels = [data]
+        positions, triangles = cls.__triangulate(data)
+        quadrics = cls.__quadrics(positions, triangles)
+
+        while len(levels) < cls.MAX_LEVELS and len(triangles) > cls.MIN_FACES:
+            target = max(int(len(triangles) * cls.LEVEL_RATIO), cls.MIN_FACES)
+            previous_count = len(triangles)
+            positions, triangles, quadrics = cls.__decimate(positions, triangles, quadrics, target)
+
+            if len(triangles) > previous_count * (1 + cls.LEVEL_RATIO) / 2:
+                break
+
+            levels.append(cls.__toMeshData(data.name, positions, triangles))
+
+        return tuple(levels)
+
+    @classmethod
+    def decimate(cls, data: MeshData, target_faces: int) -> MeshData:
+        """Упростить сетку до заданного числа треугольников"""
+        positions, triangles = cls.__triangulate(data)
+        positions, triangles, _ = cls.__decimate(positions, triangles, cls.__quadrics(positions, triangles), target_faces)
+        return cls.__toMeshData(data.name, positions, triangles)
+
+    @classmethod
+    def __triangulate(cls, data: MeshData) -> tuple[np.ndarray, np.ndarray]:
+        """Склеенные вершины и треугольники, ориентированные по нормалям файла"""
+        faces = np.arange(data.faceCount())
+        triangles = data.fanTriangles(faces)
+        source_faces = np.repeat(faces, np.maximum(data.faceSizes() - 2, 0))
+
+        used, triangles = np.unique(data.welded_indices[triangles], return_inverse=True)
+        triangles = triangles.reshape(-1, 3)
+        positions = data.positions[used].astype(np.float64)
+
+        normals = cls.__triangleNormals(positions, triangles)
+        flipped = np.einsum("ij,ij->i", normals, data.face_normals[source_faces]) < 0
+        triangles[flipped] = triangles[flipped][:, ::-1]
+
+        return positions, triangles
+
+    @staticmethod
+    def __triangleNormals(positions: np.ndarray, triangles: np.ndarray) -> np.ndarray:
+        """Ненормированные нормали треугольников (Длина - удвоенная площадь)"""
+        a, b, c = (positions[triangles[:, i]] for i in range(3))
+        return np.cross(b - a, c - a)
+
+    @staticmethod
+    def __edgeKeys(triangles: np.ndarray, vertex_count: int) -> tuple[np.ndarray, np.ndarray]:
+        """Рёбра треугольников (3T, 2) в порядке обхода и их целочисленные ключи без учёта направления"""
+        edges = np.concatenate((triangles[:, (0, 1)], triangles[:, (1, 2)], triangles[:, (2, 0)]))
+        return edges, edges.min(axis=1) * vertex_count + edges.max(axis=1)
+
+    @staticmethod
+    def __removeDuplicates(triangles: np.ndarray) -> np.ndarray:
+        """Удалить вырожденные и повторяющиеся треугольники"""
+        triangles = triangles[(triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2]) & (triangles[:, 2] != triangles[:, 0])]
+
+        ordered = np.sort(triangles, axis=1)
+        order = np.lexsort(ordered.T)
+        repeated = np.zeros(len(triangles), dtype=bool)
+        repeated[order[1:]] = np.all(ordered[order[1:]] == ordered[order[:-1]], axis=1)
+
+        return triangles[~repeated]
+
+    @staticmethod
+    def __scatterAdd(indices: np.ndarray, values: np.ndarray, size: int) -> np.ndarray:
+        """Сумма матриц (K, 4, 4) по индексам вершин"""
+        flat = values.reshape(len(values), -1)
+        return np.stack([np.bincount(indices, flat[:, i], minlength=size) for i in range(flat.shape[1])], axis=1).reshape(size, 4, 4)
+
+    @classmethod
+    def __quadrics(cls, positions: np.ndarray, triangles: np.ndarray) -> np.ndarray:
+        """Квадрики вершин: сумма квадрик плоскостей прилегающих треугольников с весом по площади"""
+        normals = cls.__triangleNormals(positions, triangles)
+        areas = np.linalg.norm(normals, axis=1)
+        units = normals / np.where(areas > 0, areas, 1)[:, None]
+
+        planes = np.concatenate((units, -np.einsum("ij,ij->i", units, positions[triangles[:, 0]])[:, None]), axis=1)
+        plane_quadrics = planes[:, :, None] * planes[:, None, :] * areas[:, None, None]
+
+        quadrics = sum(cls.__scatterAdd(triangles[:, i], plane_quadrics, len(positions)) for i in range(3))
+
+        # граничные рёбра удерживаются плоскостями, перпендикулярными треугольнику
+        edges, keys = cls.__edgeKeys(triangles, len(positions))
+        edge_triangles = np.tile(np.arange(len(triangles)), 3)
+        _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        boundary = counts[inverse] == 1
+
+        if np.any(boundary):
+            edges = edges[boundary]
+            begin = positions[edges[:, 0]]
+            direction = positions[edges[:, 1]] - begin
+
+            side = np.cross(direction, units[edge_triangles[boundary]])
+            lengths = np.linalg.norm(side, axis=1)
+            side /= np.where(lengths > 0, lengths, 1)[:, None]
+
+            planes = np.concatenate((side, -np.einsum("ij,ij->i", side, begin)[:, None]), axis=1)
+            weights = cls.BOUNDARY_WEIGHT * np.einsum("ij,ij->i", direction, direction)
+            plane_quadrics = planes[:, :, None] * planes[:, None, :] * weights[:, None, None]
+
+            quadrics += cls.__scatterAdd(edges[:, 0], plane_quadrics, len(positions))
+            quadrics += cls.__scatterAdd(edges[:, 1], plane_quadrics, len(positions))
+
+        return quadrics
+
+    @classmethod
+    def __decimate(cls, positions: np.ndarray, triangles: np.ndarray, quadrics: np.ndarray, target: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        positions = positions.copy()
+        quadrics = quadrics.copy()
+
+        while len(triangles) > target:
+            _, keys = cls.__edgeKeys(triangles, len(positions))
+            keys = np.unique(keys)
+            keep, drop = np.divmod(keys, len(positions))
+
+            # лучшая из трёх позиций: концы ребра или его середина
+            edge_quadrics = quadrics[keep] + quadrics[drop]
+            candidates = np.stack((positions[keep], positions[drop], (positions[keep] + positions[drop]) / 2), axis=1)
+            homogeneous = np.concatenate((candidates, np.ones((len(keys), 3, 1))), axis=2)
+            errors = np.einsum("eci,eij,ecj->ec", homogeneous, edge_quadrics, homogeneous)
+
+            best = errors.argmin(axis=1)
+            cost = errors[np.arange(len(keys)), best]
+            targets = candidates[np.arange(len(keys)), best]
+
+            # независимое множество: ребро дешевле всех рёбер своих вершин
+            rank = np.empty(len(keys), dtype=np.int64)
+            rank[np.argsort(cost, kind="stable")] = np.arange(len(keys))
+
+            vertex_best = np.full(len(positions), len(keys), dtype=np.int64)
+            np.minimum.at(vertex_best, keep, rank)
+            np.minimum.at(vertex_best, drop, rank)
+
+            selected = np.flatnonzero((vertex_best[keep] == rank) & (vertex_best[drop] == rank))
+            budget = max((len(triangles) - target + 1) // 2, 1)
+            selected = selected[np.argsort(cost[selected], kind="stable")[:budget]]
+
+            selected = cls.__rejectFlips(positions, triangles, keep, drop, targets, selected)
+
+            if len(selected) == 0:
+                break
+
+            remap = np.arange(len(positions))
+            remap[drop[selected]] = keep[selected]
+
+            positions[keep[selected]] = targets[selected]
+            quadrics[keep[selected]] += quadrics[drop[selected]]
+
+            triangles = cls.__removeDuplicates(remap[triangles])
+
+        return positions, triangles, quadrics
+
+    @classmethod
+    def __rejectFlips(cls, positions: np.ndarray, triangles: np.ndarray, keep: np.ndarray, drop: np.ndarray, targets: np.ndarray, selected: np.ndarray) -> np.ndarray:
+        """Отбросить стягивания, после которых какой-либо треугольник меняет ориентацию"""
+        old_normals = cls.__triangleNormals(positions, triangles)
+
+        while len(selected):
+            collapse_of = np.full(len(positions), -1, dtype=np.int64)
+            collapse_of[keep[selected]] = np.arange(len(selected))
+            collapse_of[drop[selected]] = np.arange(len(selected))
+
+            remap = np.arange(len(positions))
+            remap[drop[selected]] = keep[selected]
+            moved = positions.copy()
+            moved[keep[selected]] = targets[selected]
+
+            touched = np.flatnonzero((collapse_of[triangles] >= 0).any(axis=1))
+            new_triangles = remap[triangles[touched]]
+            alive = (new_triangles[:, 0] != new_triangles[:, 1]) & (new_triangles[:, 1] != new_triangles[:, 2]) & (new_triangles[:, 2] != new_triangles[:, 0])
+
+            new_normals = cls.__triangleNormals(moved, new_triangles)
+            flipped = alive & (np.einsum("ij,ij->i", new_normals, old_normals[touched]) <= 0)
+
+            if not np.any(flipped):
+                break
+
+            rejected = collapse_of[triangles[touched[flipped]]]
+            reject_mask = np.zeros(len(selected), dtype=bool)
+            reject_mask[rejected[rejected >= 0]] = True
+            selected = selected[~reject_mask]
+
+        return selected
+
+    @classmethod
+    def __toMeshData(cls, name: str, positions: np.ndarray, triangles: np.ndarray) -> MeshData:
+        used, triangles = np.unique(triangles, return_inverse=True)
+        triangles = triangles.reshape(-1, 3)
+        positions = positions[used]
+
+        normals = cls.__triangleNormals(positions, triangles)
+        normals /= np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-30)
+
+        return MeshData.build(
+            name,
+            positions,
+            normals,
+            triangles.ravel(),
+            np.repeat(np.arange(len(triangles)), 3),
+            np.arange(0, 3 * len(triangles) + 1, 3)
+        )
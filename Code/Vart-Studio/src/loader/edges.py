@@ -0,0 +1,142 @@
+"""Граф рёбер сетки и сборка непрерывных штрихов"""
+from __future__ import annotations
+
+from typing import Final
+
+import numpy as np
+
+
+class EdgeGraph:
+    """Неориентированный граф рёбер: каждое ребро присутствует ровно один раз"""
+
+    STROKE_BREAK: Final[int] = -1
+    """Разделитель штрихов в плоском массиве индексов"""
+
+    def __init__(self, edges: np.ndarray) -> None:
+        self.edges = edges
+        """Рёбра (E, 2), индексы вершин упорядочены внутри ребра"""
+
+    @classmethod
+    def fromLoops(cls, loops: np.ndarray, offsets: np.ndarray) -> EdgeGraph:
+        """
+        Построить граф по замкнутым контурам граней
+        :param loops: индексы вершин контуров подряд (первая вершина повторяется в конце)
+        :param offsets: смещения контуров
+        """
+        keep = np.ones(max(len(loops) - 1, 0), dtype=bool)
+        keep[offsets[1:-1] - 1] = False
+
+        edges = np.stack((loops[:-1][keep], loops[1:][keep]), axis=1)
+        edges.sort(axis=1)
+        edges = edges[edges[:, 0] != edges[:, 1]]
+
+        return cls(np.unique(edges, axis=0))
+
+    def chain(self) -> list[np.ndarray]:
+        """
+        Разбить рёбра на минимальное число непрерывных штрихов (Алгоритм Хирхольцера)
+        Нечётные вершины попарно соединяются мнимыми рёбрами, после чего эйлеров цикл разрезается по ним
+        :return: Штрихи - последовательности индексов вершин
+        """
+        if len(self.edges) == 0:
+            return []
+
+        vertex_ids, local = np.unique(self.edges, return_inverse=True)
+        local = local.reshape(-1, 2)
+        vertex_count = len(vertex_ids)
+
+        odd = np.flatnonzero(np.bincount(local.ravel(), minlength=vertex_count) & 1)
+        edges = np.concatenate((local, odd.reshape(-1, 2)))
+        real_count = len(local)
+
+        # Списки смежности в виде CSR
+        edge_count = len(edges)
+        ends = np.concatenate((edges[:, 0], edges[:, 1]))
+        others = np.concatenate((edges[:, 1], edges[:, 0]))
+        edge_of = np.concatenate((np.arange(edge_count), np.arange(edge_count)))
+
+        order = np.argsort(ends, kind="stable")
+        adjacent_vertex = others[order].tolist()
+        adjacent_edge = edge_of[order].tolist()
+        pointer = np.searchsorted(ends[order], np.arange(vertex_count)).tolist()
+        end = pointer[1:] + [len(order)]
+
+        used = [False] * edge_count
+        strokes = list[np.ndarray]()
+
+        for start in range(vertex_count):
+            if pointer[start] == end[start]:
+                continue
+
+            circuit = self.__findCircuit(start, pointer, end, adjacent_vertex, adjacent_edge, used)
+
+            if len(circuit) > 1:
+                strokes.extend(self.__splitCircuit(circuit, real_count))
+
+        return [vertex_ids[stroke] for stroke in strokes]
+
+    @staticmethod
+    def __findCircuit(start: int, pointer: list[int], end: list[int], adjacent_vertex: list[int], adjacent_edge: list[int], used: list[bool]) -> list[tuple[int, int]]:
+        stack = [(start, -1)]
+        circuit = list[tuple[int, int]]()
+
+        while stack:
+            vertex, _ = stack[-1]
+            p = pointer[vertex]
+
+            while p < end[vertex] and used[adjacent_edge[p]]:
+                p += 1
+
+            if p == end[vertex]:
+                pointer[vertex] = p
+                circuit.append(stack.pop())
+                continue
+
+            pointer[vertex] = p + 1
+            edge = adjacent_edge[p]
+            used[edge] = True
+            stack.append((adjacent_vertex[p], edge))
+
+        circuit.reverse()
+        return circuit
+
+    @staticmethod
+    def __splitCircuit(circuit: list[tuple[int, int]], real_count: int) -> list[list[int]]:
+        vertices = [v for v, _ in circuit]
+        edges = [e for _, e in circuit[1:]]
+
+        first_virtual = next((i for i, e in enumerate(edges) if e >= real_count), None)
+
+        if first_virtual is None:
+            return [vertices]
+
+        # Поворот цикла так, чтобы он начинался сразу после мнимого ребра
+        vertices = vertices[first_virtual + 1:] + vertices[1:first_virtual + 2]
+        edges = edges[first_virtual + 1:] + edges[:first_virtual + 1]
+
+        strokes = list[list[int]]()
+        stroke = [vertices[0]]
+
+        for vertex, edge in zip(vertices[1:], edges):
+            if edge >= real_count:
+                strokes.append(stroke)
+                stroke = [vertex]
+            else:
+                stroke.append(vertex)
+
+        strokes.append(stroke)
+        return [s for s in strokes if len(s) > 1]
+
+    @classmethod
+    def joinStrokes(cls, strokes: list[np.ndarray]) -> np.ndarray:
+        """Объединить штрихи в плоский массив индексов с разделителем STROKE_BREAK"""
+        if not strokes:
+            return np.zeros(0, dtype=np.int64)
+
+        parts = list[np.ndarray]()
+
+        for stroke in strokes:
+            parts.append(stroke)
+            parts.append(np.array((cls.STROKE_BREAK,)))
+
+        return np.concatenate(parts[:-1])
@@ -0,0 +1,195 @@
+"""Удаление невидимых линий"""
+from __future__ import annotations
+
+from typing import ClassVar
+
+import numpy as np
+
+from tools import raggedRange
+
+
+class HiddenLineRemover:
+    """
+    Удаление невидимых линий
+    Проекции рёбер проверяются на перекрытие треугольниками сетки.
+    Треугольники распределены по равномерной экранной сетке, поэтому каждая проба ребра сравнивается
+    только с треугольниками своей ячейки, а не со всей сеткой.
+    Граница треугольника входит в него: проба на общем ребре соседних треугольников перекрывается ими.
+    Треугольники, сторона которых - проверяемое ребро, не перекрывают само ребро.
+    """
+
+    BARYCENTRIC_EPSILON: ClassVar[float] = 1e-5
+    """Допуск попадания внутрь треугольника (Граница и точки вблизи неё перекрываются треугольником)"""
+
+    DEPTH_BIAS: ClassVar[float] = 1e-4
+    """Допуск по глубине относительно размера сцены"""
+
+    PAIRS_PER_CHUNK: ClassVar[int] = 1 << 21
+    """Ограничение числа проверок (проба, треугольник) за один проход"""
+
+    def __init__(self, projected: np.ndarray, depth: np.ndarray, triangles: np.ndarray, resolution: int = 512) -> None:
+        """
+        :param projected: Проекции вершин (N, 2)
+        :param depth: Глубина вершин (N,) - чем больше, тем ближе к камере
+        :param triangles: Перекрывающие треугольники (T, 3) с теми же индексами вершин, что и у рёбер
+        :param resolution: Число проб на размер сцены
+        """
+        self._projected = projected
+        self._depth = depth
+
+        low = projected.min(axis=0)
+        extent = max(float((projected.max(axis=0) - low).max()), 1e-9)
+
+        self._origin = low
+        self._sample_step = extent / resolution
+        self._depth_bias = self.DEPTH_BIAS * max(float(np.ptp(depth)), extent)
+
+        a, b, c = (projected[triangles[:, i]] for i in range(3))
+        v0 = b - a
+        v1 = c - a
+        cross = v0[:, 0] * v1[:, 1] - v0[:, 1] * v1[:, 0]
+
+        valid = np.abs(cross) > 1e-12 * extent * extent
+        triangles = triangles[valid]
+
+        self._triangles = triangles
+
+        self._a = a[valid]
+        self._v0 = v0[valid]
+        self._v1 = v1[valid]
+        self._inv_cross = 1.0 / cross[valid]
+        self._depth_a = depth[triangles[:, 0]]
+        self._depth_b = depth[triangles[:, 1]] - self._depth_a
+        self._depth_c = depth[triangles[:, 2]] - self._depth_a
+        self._depth_max = depth[triangles].max(axis=1)
+
+        self.__buildGrid(projected[triangles], extent)
+
+    def __buildGrid(self, triangle_points: np.ndarray, extent: float) -> None:
+        triangle_low = triangle_points.min(axis=1)
+        triangle_high = triangle_points.max(axis=1)
+
+        size = float(np.median((triangle_high - triangle_low).max(axis=1))) if len(triangle_points) else extent
+        cell = max(size / 2, self._sample_step)
+
+        self._cell = cell
+        self._grid_size = int(extent / cell) + 1
+
+        cell_low = np.clip(((triangle_low - self._origin) / cell).astype(np.int64), 0, self._grid_size - 1)
+        cell_high = np.clip(((triangle_high - self._origin) / cell).astype(np.int64), 0, self._grid_size - 1)
+        span = cell_high - cell_low + 1
+
+        counts = span[:, 0] * span[:, 1]
+        owner = np.repeat(np.arange(len(counts)), counts)
+        local = raggedRange(counts)
+
+        cell_x = cell_low[owner, 0] + local % span[owner, 0]
+        cell_y = cell_low[owner, 1] + local // span[owner, 0]
+        cell_ids = cell_y * self._grid_size + cell_x
+
+        order = np.argsort(cell_ids, kind="stable")
+        self._cell_triangles = owner[order]
+        self._cell_start = np.searchsorted(cell_ids[order], np.arange(self._grid_size * self._grid_size + 1))
+
+    def _occluded(self, points: np.ndarray, depth: np.ndarray, endpoints: np.ndarray) -> np.ndarray:
+        """
+        Маска перекрытых точек
+        :param endpoints: Концы ребра каждой точки (M, 2): треугольники с обеими вершинами не проверяются
+        """
+        cell_xy = np.clip(((points - self._origin) / self._cell).astype(np.int64), 0, self._grid_size - 1)
+        cells = cell_xy[:, 1] * self._grid_size + cell_xy[:, 0]
+
+        begins = self._cell_start[cells]
+        counts = self._cell_start[cells + 1] - begins
+        result = np.zeros(len(points), dtype=bool)
+
+        pair_totals = np.cumsum(counts)
+        chunk_begin = 0
+
+        while chunk_begin < len(points):
+            chunk_end = int(np.searchsorted(pair_totals, pair_totals[chunk_begin] - counts[chunk_begin] + self.PAIRS_PER_CHUNK, side="right"))
+            chunk_end = max(chunk_end, chunk_begin + 1)
+            chunk = slice(chunk_begin, chunk_end)
+
+            sample = np.repeat(np.arange(chunk_begin, chunk_end), counts[chunk])
+            triangle = self._cell_triangles[np.repeat(begins[chunk], counts[chunk]) + raggedRange(counts[chunk])]
+
+            # треугольники целиком позади пробы не проверяются
+            in_front = self._depth_max[triangle] > depth[sample] + self._depth_bias
+            sample = sample[in_front]
+            triangle = triangle[in_front]
+
+            # треугольники, смежные с ребром пробы
+            corners = self._triangles[triangle]
+            own = (corners == endpoints[sample, :1]).any(axis=1) & (corners == endpoints[sample, 1:]).any(axis=1)
+            sample = sample[~own]
+            triangle = triangle[~own]
+
+            d = points[sample] - self._a[triangle]
+            v0 = self._v0[triangle]
+            v1 = self._v1[triangle]
+            inv = self._inv_cross[triangle]
+
+            u = (d[:, 0] * v1[:, 1] - d[:, 1] * v1[:, 0]) * inv
+            v = (v0[:, 0] * d[:, 1] - v0[:, 1] * d[:, 0]) * inv
+
+            eps = self.BARYCENTRIC_EPSILON
+            inside = (u >= -eps) & (v >= -eps) & (u + v <= 1 + eps)
+
+            triangle_depth = self._depth_a[triangle] + u * self._depth_b[triangle] + v * self._depth_c[triangle]
+            hit = inside & (triangle_depth > depth[sample] + self._depth_bias)
+
+            result[sample[hit]] = True
+            chunk_begin = chunk_end
+
+        return result
+
+    def run(self, edges: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Проверить видимость рёбер
+        :param edges: Рёбра (E, 2)
+        :return: Маска полностью видимых рёбер и видимые части частично перекрытых рёбер (K, 2, 2)
+        """
+        begin = self._projected[edges[:, 0]]
+        end = self._projected[edges[:, 1]]
+        begin_depth = self._depth[edges[:, 0]]
+        end_depth = self._depth[edges[:, 1]]
+
+        lengths = np.hypot(*(end - begin).T)
+        intervals = np.maximum(np.ceil(lengths / self._sample_step), 1).astype(np.int64)
+
+        edge_of = np.repeat(np.arange(len(edges)), intervals)
+        index = raggedRange(intervals)
+        t = ((index + 0.5) / intervals[edge_of])[:, None]
+
+        points = begin[edge_of] * (1 - t) + end[edge_of] * t
+        depth = begin_depth[edge_of] * (1 - t[:, 0]) + end_depth[edge_of] * t[:, 0]
+
+        occluded = self._occluded(points, depth, edges[edge_of])
+        hidden_count = np.bincount(edge_of[occluded], minlength=len(edges))
+
+        fully_visible = hidden_count == 0
+        partial = (hidden_count > 0) & (hidden_count < intervals)
+
+        return fully_visible, self.__visibleRuns(partial[edge_of], ~occluded, edge_of, index, intervals, begin, end)
+
+    @staticmethod
+    def __visibleRuns(selected: np.ndarray, visible: np.ndarray, edge_of: np.ndarray, index: np.ndarray, intervals: np.ndarray, begin: np.ndarray, end: np.ndarray) -> np.ndarray:
+        visible = visible[selected]
+        edge_of = edge_of[selected]
+        index = index[selected]
+
+        previous_visible = np.concatenate(((False,), visible[:-1])) & (index != 0)
+        next_visible = np.concatenate((visible[1:], (False,))) & (index != intervals[edge_of] - 1)
+
+        run_begin = np.flatnonzero(visible & ~previous_visible)
+        run_end = np.flatnonzero(visible & ~next_visible)
+
+        edge = edge_of[run_begin]
+        t0 = (index[run_begin] / intervals[edge])[:, None]
+        t1 = ((index[run_end] + 1) / intervals[edge])[:, None]
+
+        return np.stack((
+            begin[edge] * (1 - t0) + end[edge] * t0,
+            begin[edge] * (1 - t1) + end[edge] * t1,
+        ), axis=1)
@@ -1,12 +1,8 @@
-"""Загрузчик OBJ файла"""
+"""Загрузчик сеток OBJ и STL"""
 from __future__ import annotations
 
-from abc import ABC
-from abc import abstractmethod
-from dataclasses import dataclass
-from itertools import chain
+from functools import cached_property
 from math import cos
-from math import hypot
 from math import radians
 from math import sin
 from pathlib import Path
@@ -15,198 +11,91 @@ from typing import ClassVar
 from typing import Iterable
 from typing import Optional
 from typing import Sequence
-from typing import TextIO
+
+import numpy as np
 
 from figure.impl.generative import GenerativeFigure
 from figure.impl.transformable import TransformableFigure
-from figure.impl.transformable import TransformableFigure
+from gen.vertex import VertexGenerator
 from gen.vertex import Vertices
-from tools import greedySort
+from loader.cache import MeshCache
+from loader.decimation import QuadricDecimator
+from loader.edges import EdgeGraph
+from loader.hiddenline import HiddenLineRemover
+from loader.meshdata import MeshData
+from loader.projection import IsometricProjector
+from loader.projection import OrthographicProjector
+from loader.projection import PerspectiveProjector
+from loader.projection import Projector
+from loader.slicing import MeshSlicer
+from loader.topology import MeshTopology
+from tools import LruCache
 from ui.widgets.abc import ItemID
 from ui.widgets.custom.input2d import InputInt2D
 from ui.widgets.custom.input3d import InputInt3D
 from ui.widgets.dpg.impl import Checkbox
 from ui.widgets.dpg.impl import CollapsingHeader
+from ui.widgets.dpg.impl import InputInt
+from ui.widgets.dpg.impl import MouseReleaseHandler
 from ui.widgets.dpg.impl import TextInput
 
-type vec2 = tuple[float, float]
 
+class _AdvancedMesh:
+    """Объектное представление сетки поверх массивов MeshData"""
 
-@dataclass(frozen=True)
-class Vector3D:
-    x: float
-    y: float
-    z: float
+    def __init__(self, data: MeshData, levels: Sequence[MeshData] = ()) -> None:
+        """
+        :param data: Исходная сетка
+        :param levels: Уровни детализации, начиная с исходной сетки (Пусто - только исходная)
+        """
+        self.data = data
+        self.levels: tuple[_AdvancedMesh, ...] = (self,) + tuple(map(_AdvancedMesh, levels[1:]))
+        """Уровни детализации от исходной сетки к самой грубой"""
 
     @classmethod
-    def fromParts(cls, parts: Iterable[str]) -> Vector3D:
-        return cls(*map(float, parts))
+    def load(cls, path: Path, cache: Optional[MeshCache] = None) -> Sequence[_AdvancedMesh]:
+        """Загрузить сетки файла вместе с уровнями детализации (Из кэша, если он задан)"""
+        meshes = cls._loadLevels(path) if cache is None else cache.load(path, cls._loadLevels)
+        return tuple(cls(levels[0], levels) for levels in meshes)
 
     @classmethod
-    def avg(cls, v: Sequence[Vector3D]) -> Vector3D:
-        _l = len(v)
-
-        return Vector3D(
-            sum(n.x for n in v) / _l,
-            sum(n.y for n in v) / _l,
-            sum(n.z for n in v) / _l,
-        )
-
-    def length(self) -> float:
-        return hypot(self.x, self.y, self.z)
-
-    def normalized(self) -> Vector3D:
-        _l = self.length()
-        return Vector3D(self.x / _l, self.y / _l, self.z / _l)
-
-    def dist(self, v: Vector3D) -> float:
-        return hypot(self.x - v.x, self.y - v.y, self.z - v.z)
-
-    def add(self, v: Vector3D) -> Vector3D:
-        return Vector3D(self.x + v.x, self.y + v.y, self.z + v.z)
-
-    def compMul(self, m: Vector3D) -> Vector3D:
-        return Vector3D(self.x * m.x, self.y * m.y, self.z * m.z)
-
-    def rotated_x(self, angle: float) -> Vector3D:
-        r = radians(angle)
-        c = cos(r)
-        s = sin(r)
-
-        return Vector3D(
-            self.x,
-            self.y * c - self.z * s,
-            self.y * s + self.z * c
-        )
-
-    def rotated_y(self, angle: float) -> Vector3D:
-        r = radians(angle)
-        c = cos(r)
-        s = sin(r)
-
-        return Vector3D(
-            self.x * c + self.z * s,
-            self.y,
-            -self.x * s + self.z * c
-        )
-
-    def dot(self, v: Vector3D) -> float:
-        return self.x * v.x + self.y * v.y + self.z * v.z
-
-
-class Projector(ABC):
-    """Проектор"""
-
-    _cameraVertex: ClassVar = Vector3D(-1, 1, -1)
-
-    @abstractmethod
-    def project(self, v: Vector3D) -> tuple[float, float]:
-        """Спроецировать вектор на дисплей"""
-
-    def isVisible(self, n: Vector3D) -> bool:
-        return self._cameraVertex.dot(n) >= 0
-
-
-class IsometricProjector(Projector):
-
-    def project(self, v: Vector3D) -> tuple[float, float]:
-        return (
-            (v.x - v.z) * cos(radians(30)),
-            (v.x + v.z) * sin(radians(30)) + v.y
-        )
-
-
-@dataclass
-class _Mesh:
-    name: str
-    vertices: list[Vector3D]
-
+    def _loadLevels(cls, path: Path) -> Sequence[Sequence[MeshData]]:
+        return tuple(map(QuadricDecimator.buildLevels, cls._loadData(path)))
 
-@dataclass
-class _MeshFace:
-    _cameraVertex: ClassVar = Vector3D(-1, 1, -1)
+    @staticmethod
+    def _loadData(path: Path) -> Sequence[MeshData]:
+        if Path(path).suffix.lower() == ".stl":
+            return MeshData.loadStl(path)
 
-    vertices: list[Vector3D]
-    normal: Vector3D
-    centroid: Vector3D
-
-    @classmethod
-    def parse(cls, parts: Iterable[str], model: _AdvancedMesh, v_offset: int, n_offset: int) -> _MeshFace:
-        vertices = list()
-        normals = list()
-
-        for part in parts:
-            v, _, n = part.split('/')
-
-            v_index = int(v) - v_offset
-            vertices.append(model.vertices[v_index])
-
-            n_index = int(n) - n_offset
-            normals.append(model.normals[n_index])
-
-        vertices.append(vertices[0])
-
-        return cls(vertices, Vector3D.avg(normals), Vector3D.avg(vertices))
-
-
-@dataclass
-class _AdvancedMesh(_Mesh):
-    normals: list[Vector3D]
-    faces: list[_MeshFace]
-
-    @classmethod
-    def load(cls, path: Path) -> Sequence[_AdvancedMesh]:
         with open(path) as f:
-            return cls._loadFromObj(f)
-
-    @classmethod
-    def _loadFromObj(cls, stream: TextIO) -> Sequence[_AdvancedMesh]:
-        def err(msg: str) -> None:
-            """err"""
-            raise ValueError(f"Err : {cls.__name__} : ( '{stream}' ) : {msg}")
-
-        objects = list[_AdvancedMesh]()
-        current_model: Optional[_AdvancedMesh] = None
+            return MeshData.loadObj(f)
 
-        v_index_offset = 1
-        n_index_offset = 1
+    @property
+    def name(self) -> str:
+        return self.data.name
 
-        for index, line in enumerate(stream):
-            parts = line.strip().split()
+    @cached_property
+    def topology(self) -> MeshTopology:
+        return MeshTopology.build(self.data)
 
-            if not parts:
-                continue
+    @cached_property
+    def slicer(self) -> MeshSlicer:
+        return MeshSlicer(self.data)
 
-            match parts[0]:
-                case 'o':
-                    if current_model is not None:
-                        v_index_offset += len(current_model.vertices)
-                        n_index_offset += len(current_model.normals)
+    @cached_property
+    def radius(self) -> float:
+        """Наибольшее удаление вершины от начала координат"""
+        return float(np.linalg.norm(self.data.positions, axis=1).max(initial=0))
 
-                    current_model = _AdvancedMesh(parts[1], list(), list(), list())
-                    objects.append(current_model)
+    @cached_property
+    def feature_size(self) -> float:
+        """Медианная длина ребра в единицах модели"""
+        edges = self.topology.edges
 
-                case 'v':
-                    if current_model is None:
-                        err(f"obj not selected (v) - at {index}")
+        if len(edges) == 0:
+            return 0.0
 
-                    current_model.vertices.append(Vector3D.fromParts(parts[1:4]))
-
-                case 'vn':
-                    if current_model is None:
-                        err(f"obj not selected (n) at {index}")
-
-                    current_model.normals.append(Vector3D.fromParts(parts[1:4]))
-
-                case 'f':
-                    if current_model is None:
-                        err(f"obj not selected (f) at {index}")
-
-                    face = _MeshFace.parse(parts[1:], current_model, v_index_offset, n_index_offset)
-
-                    current_model.faces.append(face)
-
-        return objects
+        return float(np.median(np.linalg.norm(self.data.positions[edges[:, 1]] - self.data.positions[edges[:, 0]], axis=1)))
 
 
 class TextMeshFigure(GenerativeFigure):
@@ -229,9 +118,15 @@ class TextMeshFigure(GenerativeFigure):
 
 class LegacyMeshFigure(GenerativeFigure):
 
+    PREVIEW_LEVEL_OFFSET: ClassVar[int] = 2
+    """На сколько уровней предпросмотр во время перетаскивания грубее уровня экспорта"""
+
+    STAGE_CACHE_CAPACITY: ClassVar[int] = 8
+    """Количество запоминаемых результатов 3D стадии"""
+
     @classmethod
-    def load(cls, path: Path, on_delete: Callable, on_clone: Callable) -> Iterable[LegacyMeshFigure]:
-        return (LegacyMeshFigure(m.name, on_delete, on_clone, m) for m in (_AdvancedMesh.load(path)))
+    def load(cls, path: Path, on_delete: Callable, on_clone: Callable, cache: Optional[MeshCache] = None) -> Iterable[LegacyMeshFigure]:
+        return (cls(m.name, on_delete, on_clone, m) for m in (_AdvancedMesh.load(path, cache)))
 
     def __init__(self, label: str, on_delete: Callable, on_clone: Callable, model: _AdvancedMesh) -> None:
         super().__init__(label, on_delete, on_clone)
@@ -258,68 +153,293 @@ class LegacyMeshFigure(GenerativeFigure):
             default_value=(100, 100, 100)
         )
 
-        self._use_beta_gen = Checkbox(update_, label="Отрисовка 2", default_value=False)
+        self._camera_input = InputInt("Камера", update_, value_range=(0, 2), default_value=0)
+        self._camera_orbit = InputInt2D(
+            "Орбита камеры",
+            update_,
+            value_range=(-180, 180),
+            step_fast=5,
+            reset_button=True,
+            is_horizontal=True,
+            default_value=(45, 35)
+        )
+        self._camera_distance = InputInt("Дистанция камеры", update_, value_range=(110, 2000), default_value=300, step=10, step_fast=50)
+
+        self._use_silhouette = Checkbox(update_, label="Только силуэт и изломы", default_value=False)
+        self._crease_angle = InputInt("Угол излома", update_, value_range=(0, 180), default_value=40, step_fast=5)
+
+        self._auto_level = Checkbox(update_, label="Автовыбор детализации", default_value=True)
+        self._level_input = InputInt("Уровень детализации", update_, value_range=(0, QuadricDecimator.MAX_LEVELS - 1), default_value=0)
+        self._min_feature_input = InputInt("Мин. размер детали", update_, value_range=(0, 100), default_value=2)
+        self._fast_preview = Checkbox(update_, label="Упрощённый предпросмотр", default_value=True)
+        self._is_preview = False
+        self._is_preview_shown = False
+        self._mouse_release_handler: Optional[MouseReleaseHandler] = None
+        self._stage_cache = LruCache(self.STAGE_CACHE_CAPACITY)
         self._face_culling = Checkbox(update_, label="Отсечение невидимых граней", default_value=True)
+        self._hidden_lines = Checkbox(update_, label="Удаление невидимых линий", default_value=False)
 
     def _getCloneInstance(self, name: str, on_delete: Callable, on_clone: Callable) -> LegacyMeshFigure:
-        return LegacyMeshFigure(name, on_delete, on_clone, self._model)
+        return type(self)(name, on_delete, on_clone, self._model)
 
-    def getMeshScaleXYZ(self) -> Vector3D:
+    def getMeshScaleXYZ(self) -> tuple[float, float, float]:
         x, y, z = self._scale_XYZ.getValue()
-        return Vector3D(x / 100, y / 100, z / 100)
+        return x / 100, y / 100, z / 100
+
+    def getTransformMatrix(self) -> np.ndarray:
+        """Матрица 3x3 трансформации модели: масштаб, затем поворот вокруг Y и X"""
+        rx, ry = map(radians, self._rotation_XY.getValue())
+        scale = self.getMeshScaleXYZ()
+
+        cx, sx = cos(rx), sin(rx)
+        cy, sy = cos(ry), sin(ry)
 
-    def _vertexTransform(self, v: Vector3D) -> Vector3D:
-        rx, ry = self._rotation_XY.getValue()
-        return v.compMul(self.getMeshScaleXYZ()).rotated_y(ry).rotated_x(rx)
+        rotation_x = np.array((
+            (1, 0, 0),
+            (0, cx, -sx),
+            (0, sx, cx),
+        ))
+
+        rotation_y = np.array((
+            (cy, 0, sy),
+            (0, 1, 0),
+            (-sy, 0, cy),
+        ))
+
+        return rotation_x @ rotation_y @ np.diag(scale)
 
     def _getProjector(self) -> Projector:
-        return self._isometric_projector
+        """Камера: 0 - изометрия, 1 - ортографическая орбита, 2 - перспектива"""
+        mode = self._camera_input.getValue()
+
+        if mode == 0:
+            return self._isometric_projector
+
+        view = Projector.orbit(*self._camera_orbit.getValue())
+
+        if mode == 1:
+            return OrthographicProjector(view)
+
+        # дистанция в процентах от радиуса модели после масштабирования
+        radius = self._model.radius * max(map(abs, self._scale_XYZ.getValue())) / 100
+        return PerspectiveProjector(view, max(radius, 1e-6) * self._camera_distance.getValue() / 100)
+
+    def getLevel(self) -> int:
+        """Уровень детализации для экспорта"""
+        levels = self._model.levels
+
+        if not self._auto_level.getValue():
+            return min(self._level_input.getValue(), len(levels) - 1)
+
+        # длина ребра модели на рабочей области
+        scale = max(map(abs, self._scale_XYZ.getValue())) / 100 * max(self.getSize())
+        min_feature = self._min_feature_input.getValue()
+
+        return next((index for index, level in enumerate(levels) if level.feature_size * scale >= min_feature), len(levels) - 1)
+
+    def update(self) -> None:
+        # упрощённый предпросмотр только пока идёт перетаскивание или удержание элемента управления
+        self._is_preview = self._fast_preview.getValue() and MouseReleaseHandler.isPressed()
+        self._is_preview_shown = self._is_preview
+
+        try:
+            super().update()
+
+        finally:
+            self._is_preview = False
+
+    def __onMouseRelease(self) -> None:
+        """По окончании перетаскивания фигура перерисовывается с детализацией экспорта"""
+        if self._is_preview_shown:
+            self.update()
+
+    def delete(self) -> None:
+        super().delete()
+
+        if self._mouse_release_handler is not None:
+            self._mouse_release_handler.delete()
 
     def _generateVertices(self) -> Vertices:
-        return self._draw1()
+        level = self.getLevel()
+
+        if self._is_preview:
+            level = min(level + self.PREVIEW_LEVEL_OFFSET, len(self._model.levels) - 1)
+
+        # 2D размещение применяется позже, поэтому результат зависит только от параметров 3D стадии
+        key = self._getStageKey(level)
+
+        if (ret := self._stage_cache.get(key)) is not None:
+            return ret
+
+        ret = self._drawStage(self._model.levels[level])
+
+        self._stage_cache.put(key, ret)
+        return ret
+
+    def _getStageKey(self, level: int) -> tuple:
+        """Параметры, от которых зависит результат 3D стадии"""
+        return (
+            level,
+            self._rotation_XY.getValue(),
+            self._scale_XYZ.getValue(),
+            self._camera_input.getValue(),
+            self._camera_orbit.getValue(),
+            self._camera_distance.getValue(),
+            self._face_culling.getValue(),
+            self._hidden_lines.getValue(),
+            self._use_silhouette.getValue(),
+            self._crease_angle.getValue(),
+        )
+
+    def _drawStage(self, mesh: _AdvancedMesh) -> Vertices:
+        """3D стадия: отсечение, проецирование и сборка штрихов"""
+        if self._use_silhouette.getValue():
+            return self._draw2(mesh)
+
+        return self._draw1(mesh)
 
-    def _draw1(self) -> Vertices:
+    def _draw1(self, mesh: _AdvancedMesh) -> Vertices:
         projector = self._getProjector()
+        data = mesh.data
+        transform_t = self.getTransformMatrix().T
 
         # определение видимых граней
-        def _getVisibleFaces() -> Iterable[_MeshFace]:
-            if self._face_culling.getValue():
-                return (f for f in self._model.faces if projector.isVisible(self._vertexTransform(f.normal)))
+        faces = np.arange(data.faceCount())
 
-            return self._model.faces
+        if self._face_culling.getValue():
+            faces = faces[projector.visibleMask(data.face_normals @ transform_t, data.face_centroids @ transform_t)]
 
-        visible_faces = _getVisibleFaces()
+        if len(faces) == 0:
+            return (), ()
 
-        # проецирование граней
-        def project_face(f: _MeshFace) -> Sequence[vec2]:
-            return tuple(map(projector.project, map(self._vertexTransform, f.vertices)))
+        # проецирование всех вершин за раз
+        transformed = data.positions @ transform_t
+        projected = projector.projectMany(transformed)
 
-        projections = tuple(map(project_face, visible_faces))
+        # каждое видимое ребро один раз
+        loops, offsets = data.faceLoops(faces)
+        graph = EdgeGraph.fromLoops(data.welded_indices[loops], offsets)
+
+        return self._drawEdges(mesh, graph, faces, transformed, projected)
+
+    def _draw2(self, mesh: _AdvancedMesh) -> Vertices:
+        projector = self._getProjector()
+        data = mesh.data
+        topology = mesh.topology
+        transform_t = self.getTransformMatrix().T
 
-        # сортировка проекций
-        def _metric(a: Sequence[vec2], b: Sequence[vec2]) -> float:
-            ax, ay = _centroid(a)
-            bx, by = _centroid(b)
+        # от поворота зависит только ориентация граней
+        front = projector.visibleMask(data.face_normals @ transform_t, data.face_centroids @ transform_t)
+        first, second = topology.edge_faces.T
+        first_front = front[first]
+        second_front = front[second] & (second >= 0)
 
-            return hypot(ax - bx, ay - by)
+        silhouette = first_front != second_front
+        crease = topology.dihedral_angles > self._crease_angle.getValue()
 
-        def _centroid(__v: Sequence[vec2]) -> vec2:
-            _x, _y = zip(*__v)
-            _l = len(__v)
-            return sum(_x) / _l, sum(_y) / _l
+        faces = np.arange(data.faceCount())
 
-        projections_sorted = greedySort(projections, _metric)
+        if self._face_culling.getValue():
+            crease &= first_front | second_front
+            faces = faces[front]
 
-        # комбинирование TODO решение общих ребер
-        combined = chain(*projections_sorted)
+        edges = topology.edges[silhouette | crease]
 
-        return zip(*combined)
+        if len(edges) == 0:
+            return (), ()
+
+        transformed = data.positions @ transform_t
+        projected = projector.projectMany(transformed)
+
+        return self._drawEdges(mesh, EdgeGraph(edges), faces, transformed, projected)
+
+    def _drawEdges(self, mesh: _AdvancedMesh, graph: EdgeGraph, faces: np.ndarray, transformed: np.ndarray, projected: np.ndarray) -> Vertices:
+        """Собрать рёбра графа в штрихи, при необходимости удалив невидимые линии"""
+        segments = np.zeros((0, 2, 2))
+
+        if self._hidden_lines.getValue():
+            remover = HiddenLineRemover(projected, self._getProjector().depthMany(transformed), mesh.data.welded_indices[mesh.data.fanTriangles(faces)])
+            visible, segments = remover.run(graph.edges)
+            graph = EdgeGraph(graph.edges[visible])
+
+        # рёбра собраны в непрерывные штрихи
+        strokes = EdgeGraph.joinStrokes(graph.chain())
+        combined = projected[strokes]
+        combined[strokes == EdgeGraph.STROKE_BREAK] = VertexGenerator.STROKE_BREAK
+
+        # видимые части частично перекрытых рёбер
+        if len(segments):
+            breaks = np.full((len(segments), 1, 2), VertexGenerator.STROKE_BREAK)
+            combined = np.concatenate((combined, breaks[0], np.concatenate((segments, breaks), axis=1).reshape(-1, 2)))
+
+        return combined[:, 0], combined[:, 1]
 
     def placeRaw(self, parent_id: ItemID) -> None:
         super().placeRaw(parent_id)
-        (
+        self._mouse_release_handler = MouseReleaseHandler(self.__onMouseRelease)
+
+        header = (
             CollapsingHeader("Трансформации 3D", default_open=True).place(self)
             .add(self._rotation_XY)
+            .add(self._camera_input)
+            .add(self._camera_orbit)
+            .add(self._camera_distance)
             .add(self._face_culling)
-            .add(self._scale_XYZ)
+            .add(self._hidden_lines)
         )
+        self._placeDrawOptions(header)
+        header.add(self._scale_XYZ)
+
+        (
+            CollapsingHeader("Детализация", default_open=False).place(self)
+            .add(self._auto_level)
+            .add(self._level_input)
+            .add(self._min_feature_input)
+            .add(self._fast_preview)
+        )
+
+    def _placeDrawOptions(self, header: CollapsingHeader) -> None:
+        """Добавить параметры режима отрисовки"""
+        header.add(self._use_silhouette).add(self._crease_angle)
+
+
+class ContourMeshFigure(LegacyMeshFigure):
+    """Сетка, изображённая контурами сечений параллельными плоскостями"""
+
+    SLICE_AXIS: ClassVar[np.ndarray] = np.array((0.0, 1.0, 0.0))
+    """Нормаль секущих плоскостей (Вертикаль после поворота модели)"""
+
+    def __init__(self, label: str, on_delete: Callable, on_clone: Callable, model: _AdvancedMesh) -> None:
+        super().__init__(label, on_delete, on_clone, model)
+        self._slice_count = InputInt("Количество сечений", lambda _: self.update(), value_range=(1, 1000), default_value=20, step_fast=10)
+
+    def _getStageKey(self, level: int) -> tuple:
+        return super()._getStageKey(level) + (self._slice_count.getValue(),)
+
+    def _drawStage(self, mesh: _AdvancedMesh) -> Vertices:
+        projector = self._getProjector()
+        data = mesh.data
+        transform_t = self.getTransformMatrix().T
+
+        transformed = data.positions @ transform_t
+        contours = mesh.slicer.slice(transformed, self.SLICE_AXIS, self._slice_count.getValue())
+
+        faces = np.arange(data.faceCount())
+        segments = contours.segments
+
+        if self._face_culling.getValue():
+            front = projector.visibleMask(data.face_normals @ transform_t, data.face_centroids @ transform_t)
+            faces = faces[front]
+            segments = segments[front[contours.segment_faces]]
+
+        if len(segments) == 0:
+            return (), ()
+
+        # узлы контуров добавлены после вершин сетки, чтобы треугольники сетки могли их перекрывать
+        points = np.concatenate((transformed, contours.points))
+        graph = EdgeGraph(segments + len(transformed))
+
+        return self._drawEdges(mesh, graph, faces, points, projector.projectMany(points))
+
+    def _placeDrawOptions(self, header: CollapsingHeader) -> None:
+        header.add(self._slice_count)
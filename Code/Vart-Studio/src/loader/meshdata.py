@@ -0,0 +1,408 @@
+"""Массивное представление полигональной сетки"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+from typing import ClassVar
+from typing import Sequence
+from typing import TextIO
+
+import numpy as np
+
+from tools import raggedRange
+
+
+@dataclass(frozen=True)
+class MeshData:
+    """Полигональная сетка в виде непрерывных массивов"""
+
+    name: str
+    """Наименование объекта"""
+
+    positions: np.ndarray
+    """Позиции вершин (N, 3) float32"""
+
+    normals: np.ndarray
+    """Нормали из файла (M, 3) float32"""
+
+    face_indices: np.ndarray
+    """Индексы вершин всех граней подряд (CSR)"""
+
+    face_normal_indices: np.ndarray
+    """Индексы нормалей углов граней (параллельно face_indices)"""
+
+    face_offsets: np.ndarray
+    """Смещения граней в face_indices (F + 1)"""
+
+    face_normals: np.ndarray
+    """Нормали граней (F, 3) float32"""
+
+    face_centroids: np.ndarray
+    """Центроиды граней (F, 3) float32"""
+
+    STL_HEADER_SIZE: ClassVar[int] = 84
+    """Заголовок двоичного STL: 80 байт описания и количество треугольников"""
+
+    STL_TRIANGLE: ClassVar[np.dtype] = np.dtype([
+        ("normal", "<f4", (3,)),
+        ("vertices", "<f4", (3, 3)),
+        ("attribute", "<u2"),
+    ])
+    """Запись треугольника двоичного STL"""
+
+    STL_CHUNK_TRIANGLES: ClassVar[int] = 1 << 20
+    """Количество треугольников STL, обрабатываемых за один проход"""
+
+    STL_HASH_FACTORS: ClassVar[np.ndarray] = np.array((0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9), dtype=np.uint64)
+    """Множители хеша координат вершины"""
+
+    @classmethod
+    def build(
+            cls,
+            name: str,
+            positions: np.ndarray,
+            normals: np.ndarray,
+            face_indices: np.ndarray,
+            face_normal_indices: np.ndarray,
+            face_offsets: np.ndarray
+    ) -> MeshData:
+        """Собрать сетку, вычислив производные массивы граней за один проход"""
+        positions = np.ascontiguousarray(positions, dtype=np.float32).reshape(-1, 3)
+        normals = np.ascontiguousarray(normals, dtype=np.float32).reshape(-1, 3)
+        face_indices = np.ascontiguousarray(face_indices, dtype=np.int32)
+        face_normal_indices = np.ascontiguousarray(face_normal_indices, dtype=np.int32)
+        face_offsets = np.ascontiguousarray(face_offsets, dtype=np.int64)
+
+        return cls(
+            name=name,
+            positions=positions,
+            normals=normals,
+            face_indices=face_indices,
+            face_normal_indices=face_normal_indices,
+            face_offsets=face_offsets,
+            face_normals=cls.faceMean(normals[face_normal_indices], face_offsets),
+            face_centroids=cls.faceMean(positions[face_indices], face_offsets),
+        )
+
+    @staticmethod
+    def faceMean(corner_values: np.ndarray, face_offsets: np.ndarray) -> np.ndarray:
+        """Среднее значение по углам каждой грани"""
+        face_count = len(face_offsets) - 1
+
+        if face_count == 0:
+            return np.zeros((0, 3), dtype=np.float32)
+
+        sums = np.add.reduceat(corner_values, face_offsets[:-1], axis=0)
+        return (sums / np.diff(face_offsets)[:, None]).astype(np.float32)
+
+    def faceCount(self) -> int:
+        """Количество граней"""
+        return len(self.face_offsets) - 1
+
+    def faceSizes(self) -> np.ndarray:
+        """Количество вершин каждой грани"""
+        return np.diff(self.face_offsets)
+
+    @cached_property
+    def welded_indices(self) -> np.ndarray:
+        """Для каждой вершины - индекс первой вершины с той же позицией"""
+        if len(self.positions) == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        _, first, inverse = np.unique(self.positions, axis=0, return_index=True, return_inverse=True)
+        return first[inverse.ravel()]
+
+    def faceLoops(self, faces: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Получить замкнутые контуры выбранных граней
+        :param faces: индексы граней
+        :return: индексы вершин всех контуров подряд (первая вершина повторяется в конце) и смещения контуров
+        """
+        begins = self.face_offsets[faces]
+        sizes = self.face_offsets[faces + 1] - begins
+        loop_sizes = sizes + 1
+
+        loop_offsets = np.zeros(len(faces) + 1, dtype=np.int64)
+        np.cumsum(loop_sizes, out=loop_offsets[1:])
+
+        local = raggedRange(loop_sizes)
+        local[loop_offsets[1:] - 1] = 0
+
+        return self.face_indices[np.repeat(begins, loop_sizes) + local], loop_offsets
+
+    def fanTriangles(self, faces: np.ndarray) -> np.ndarray:
+        """Разбить выбранные грани веером на треугольники (T, 3)"""
+        begins = self.face_offsets[faces]
+        triangle_counts = np.maximum(self.face_offsets[faces + 1] - begins - 2, 0)
+
+        first = np.repeat(begins, triangle_counts)
+        second = first + raggedRange(triangle_counts) + 1
+
+        return np.stack((self.face_indices[first], self.face_indices[second], self.face_indices[second + 1]), axis=1)
+
+    @staticmethod
+    def faceAreaVectors(positions: np.ndarray, face_indices: np.ndarray, face_offsets: np.ndarray) -> np.ndarray:
+        """
+        Векторы площади граней (F, 3): направлены по нормали, длина - удвоенная площадь
+        Грань разбивается веером на треугольники, векторные произведения которых суммируются за один проход
+        """
+        face_count = len(face_offsets) - 1
+        triangle_counts = np.maximum(np.diff(face_offsets) - 2, 0)
+
+        first = np.repeat(face_offsets[:-1], triangle_counts)
+        second = first + raggedRange(triangle_counts) + 1
+
+        a = positions[face_indices[first]].astype(np.float64)
+        cross = np.cross(positions[face_indices[second]] - a, positions[face_indices[second + 1]] - a)
+
+        owner = np.repeat(np.arange(face_count), triangle_counts)
+        return np.stack([np.bincount(owner, cross[:, i], minlength=face_count) for i in range(3)], axis=1).reshape(face_count, 3)
+
+    @classmethod
+    def geometricFaceNormals(cls, positions: np.ndarray, face_indices: np.ndarray, face_offsets: np.ndarray) -> np.ndarray:
+        """Нормали граней по их вершинам (F, 3)"""
+        normals = cls.faceAreaVectors(positions, face_indices, face_offsets)
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        return (normals / np.where(lengths > 0, lengths, 1)).astype(np.float32)
+
+    @cached_property
+    def smooth_normals(self) -> np.ndarray:
+        """Сглаженные нормали вершин (N, 3): нормали прилегающих граней, взвешенные по площади"""
+        areas = self.faceAreaVectors(self.positions, self.face_indices, self.face_offsets)
+        areas[np.einsum("ij,ij->i", areas, self.face_normals) < 0] *= -1
+
+        corners = self.welded_indices[self.face_indices]
+        corner_areas = np.repeat(areas, self.faceSizes(), axis=0)
+
+        normals = np.stack([np.bincount(corners, corner_areas[:, i], minlength=len(self.positions)) for i in range(3)], axis=1)
+        normals = normals.reshape(-1, 3)[self.welded_indices]
+
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        return (normals / np.where(lengths > 0, lengths, 1)).astype(np.float32)
+
+    @classmethod
+    def loadObj(cls, stream: TextIO) -> Sequence[MeshData]:
+        """
+        Загрузить все объекты OBJ потока
+        Поддерживаются грани вида v, v/t, v//n и v/t/n, в том числе с отрицательными индексами
+        Для углов без нормали используется нормаль грани, вычисленная по её вершинам
+        """
+
+        def err(msg: str) -> None:
+            """err"""
+            raise ValueError(f"Err : {cls.__name__} : ( '{stream}' ) : {msg}")
+
+        names = list[str]()
+        v_begins = list[int]()
+        n_begins = list[int]()
+        f_begins = list[int]()
+
+        v_tokens = list[str]()
+        n_tokens = list[str]()
+        f_tokens = list[str]()
+        f_sizes = list[int]()
+        f_v_counts = list[int]()
+        f_n_counts = list[int]()
+
+        for index, line in enumerate(stream):
+            parts = line.split()
+
+            if not parts:
+                continue
+
+            match parts[0]:
+                case 'o':
+                    names.append(parts[1])
+                    v_begins.append(len(v_tokens) // 3)
+                    n_begins.append(len(n_tokens) // 3)
+                    f_begins.append(len(f_sizes))
+
+                case 'v':
+                    if not names:
+                        err(f"obj not selected (v) - at {index}")
+
+                    v_tokens.extend(parts[1:4])
+
+                case 'vn':
+                    if not names:
+                        err(f"obj not selected (n) at {index}")
+
+                    n_tokens.extend(parts[1:4])
+
+                case 'f':
+                    if not names:
+                        err(f"obj not selected (f) at {index}")
+
+                    f_tokens.extend(parts[1:])
+                    f_sizes.append(len(parts) - 1)
+                    f_v_counts.append(len(v_tokens) // 3)
+                    f_n_counts.append(len(n_tokens) // 3)
+
+        positions = np.array(v_tokens, dtype=np.float32).reshape(-1, 3)
+        file_normals = np.array(n_tokens, dtype=np.float32).reshape(-1, 3)
+
+        corner_vertices, corner_normals = cls.__parseCorners(f_tokens)
+
+        if np.any(corner_vertices == 0):
+            err("face vertex index must not be 0")
+
+        # отрицательные индексы отсчитываются от последнего объявленного элемента
+        corner_vertices = cls.__resolveIndices(corner_vertices, np.repeat(f_v_counts, f_sizes))
+        corner_normals = cls.__resolveIndices(corner_normals, np.repeat(f_n_counts, f_sizes))
+
+        face_offsets = np.zeros(len(f_sizes) + 1, dtype=np.int64)
+        np.cumsum(f_sizes, out=face_offsets[1:])
+
+        v_ends = v_begins[1:] + [len(positions)]
+        n_ends = n_begins[1:] + [len(file_normals)]
+        f_ends = f_begins[1:] + [len(f_sizes)]
+
+        ret = list[MeshData]()
+
+        for name, v_begin, v_end, n_begin, n_end, f_begin, f_end in zip(names, v_begins, v_ends, n_begins, n_ends, f_begins, f_ends):
+            corners = slice(face_offsets[f_begin], face_offsets[f_end])
+            offsets = face_offsets[f_begin:f_end + 1] - face_offsets[f_begin]
+
+            object_positions = positions[v_begin:v_end]
+            vertex_indices = corner_vertices[corners] - v_begin
+            normal_indices = corner_normals[corners] - n_begin
+            normals = file_normals[n_begin:n_end]
+
+            if np.any(vertex_indices < 0) or np.any(vertex_indices >= len(object_positions)):
+                err(f"face vertex index out of object '{name}'")
+
+            missing = corner_normals[corners] < 0
+
+            if np.any(missing):
+                # нормали граней без нормалей в файле добавляются после нормалей файла
+                computed = cls.geometricFaceNormals(object_positions, vertex_indices, offsets)
+                normal_indices[missing] = len(normals) + np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))[missing]
+                normals = np.concatenate((normals, computed))
+
+            ret.append(cls.build(name, object_positions, normals, vertex_indices, normal_indices, offsets))
+
+        return tuple(ret)
+
+    @classmethod
+    def loadStl(cls, path: Path) -> Sequence[MeshData]:
+        """
+        Загрузить двоичный STL
+        Файл отображается в память без копирования и обрабатывается частями.
+        Совпадающие вершины склеиваются по хешу их координат.
+        """
+        path = Path(path)
+
+        with open(path, "rb") as f:
+            header = f.read(cls.STL_HEADER_SIZE)
+
+        if len(header) < cls.STL_HEADER_SIZE:
+            raise ValueError(f"Err : {cls.__name__} : ( '{path}' ) : file is too short for binary STL")
+
+        count = int(np.frombuffer(header, dtype="<u4", offset=80)[0])
+
+        if path.stat().st_size != cls.STL_HEADER_SIZE + count * cls.STL_TRIANGLE.itemsize:
+            raise ValueError(f"Err : {cls.__name__} : ( '{path}' ) : not a binary STL (ASCII STL is not supported)")
+
+        if count == 0:
+            return (cls.build(path.stem, np.zeros((0, 3)), np.zeros((0, 3)), np.zeros(0), np.zeros(0), np.zeros(1)),)
+
+        records = np.memmap(path, dtype=cls.STL_TRIANGLE, mode="r", offset=cls.STL_HEADER_SIZE, shape=(count,))
+        chunks = range(0, count, cls.STL_CHUNK_TRIANGLES)
+
+        keys = np.empty(3 * count, dtype=np.uint64)
+        normals = np.empty((count, 3), dtype=np.float32)
+        centroids = np.empty((count, 3), dtype=np.float32)
+
+        for begin in chunks:
+            chunk = slice(begin, begin + cls.STL_CHUNK_TRIANGLES)
+            corners = cls.__stlCorners(records, chunk)
+
+            keys[3 * begin:3 * begin + len(corners)] = np.bitwise_xor.reduce(corners.view(np.uint32).astype(np.uint64) * cls.STL_HASH_FACTORS, axis=1)
+            normals[chunk] = cls.__stlNormals(corners.reshape(-1, 3, 3), records["normal"][chunk])
+            centroids[chunk] = corners.reshape(-1, 3, 3).mean(axis=1)
+
+        # склейка: одинаковые ключи - одна вершина
+        order = np.argsort(keys)
+        sorted_keys = keys[order]
+        del keys
+
+        group_start = np.ones(len(order), dtype=bool)
+        group_start[1:] = sorted_keys[1:] != sorted_keys[:-1]
+        del sorted_keys
+
+        face_indices = np.empty(len(order), dtype=np.int32)
+        face_indices[order] = np.cumsum(group_start, dtype=np.int64) - 1
+
+        first = order[group_start]
+        del order, group_start
+
+        positions = records["vertices"][first // 3, first % 3] + np.float32(0)
+        position_bits = positions.view(np.uint32)
+
+        # проверка коллизий хеша
+        collided = any(
+            np.any(cls.__stlCorners(records, slice(begin, begin + cls.STL_CHUNK_TRIANGLES)).view(np.uint32) != position_bits[face_indices[3 * begin:3 * (begin + cls.STL_CHUNK_TRIANGLES)]])
+            for begin in chunks
+        )
+
+        if collided:
+            positions, face_indices = np.unique(records["vertices"].reshape(-1, 3) + np.float32(0), axis=0, return_inverse=True)
+            face_indices = face_indices.ravel().astype(np.int32)
+
+        # нормали и центроиды граней уже посчитаны по частям, повторный проход build не нужен
+        return (cls(
+            name=path.stem,
+            positions=np.ascontiguousarray(positions, dtype=np.float32),
+            normals=normals,
+            face_indices=face_indices,
+            face_normal_indices=np.repeat(np.arange(count, dtype=np.int32), 3),
+            face_offsets=np.arange(0, 3 * count + 1, 3, dtype=np.int64),
+            face_normals=normals,
+            face_centroids=centroids,
+        ),)
+
+    @staticmethod
+    def __stlCorners(records: np.ndarray, chunk: slice) -> np.ndarray:
+        """Вершины части треугольников (3K, 3); -0.0 приводится к 0.0, чтобы совпадающие вершины имели одинаковые биты"""
+        return records["vertices"][chunk].reshape(-1, 3) + np.float32(0)
+
+    @staticmethod
+    def __stlNormals(triangles: np.ndarray, file_normals: np.ndarray) -> np.ndarray:
+        """Нормали по обходу вершин, нормаль файла - если треугольник вырожден"""
+        u = triangles[:, 1] - triangles[:, 0]
+        v = triangles[:, 2] - triangles[:, 0]
+
+        normals = np.empty_like(u)
+        normals[:, 0] = u[:, 1] * v[:, 2] - u[:, 2] * v[:, 1]
+        normals[:, 1] = u[:, 2] * v[:, 0] - u[:, 0] * v[:, 2]
+        normals[:, 2] = u[:, 0] * v[:, 1] - u[:, 1] * v[:, 0]
+
+        lengths = np.sqrt(np.einsum("ij,ij->i", normals, normals))[:, None]
+        return np.where(lengths > 0, normals / np.where(lengths > 0, lengths, 1), file_normals)
+
+    @staticmethod
+    def __parseCorners(tokens: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Индексы вершин и нормалей углов граней в нотации OBJ
+        :return: Индексы из файла, 0 - индекс не указан
+        """
+        if not tokens:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        slashes = tokens[0].count("/")
+        joined = "/".join(tokens)
+
+        # углы с разным числом полей приводятся к виду v/t/n
+        if slashes != 2 or joined.count("/") != 3 * len(tokens) - 1:
+            joined = "/".join(token + "/" * (2 - token.count("/")) for token in tokens)
+
+        fields = np.array(joined.split("/")).reshape(-1, 3)
+        fields[fields == ""] = "0"
+
+        return fields[:, 0].astype(np.int64), fields[:, 2].astype(np.int64)
+
+    @staticmethod
+    def __resolveIndices(indices: np.ndarray, declared: np.ndarray) -> np.ndarray:
+        """Перевести индексы OBJ в индексы от нуля (-1 - индекс не указан)"""
+        return np.where(indices > 0, indices - 1, np.where(indices < 0, declared + indices, -1))
@@ -0,0 +1,111 @@
+"""Камеры и проецирование массивов точек"""
+from __future__ import annotations
+
+from abc import ABC
+from abc import abstractmethod
+from math import cos
+from math import radians
+from math import sin
+from math import sqrt
+from typing import ClassVar
+from typing import Optional
+
+import numpy as np
+
+
+class Projector(ABC):
+    """
+    Проектор
+    Вид задаётся матрицей 3x3, строки которой - оси экрана X, Y и направление на камеру в координатах модели
+    """
+
+    def __init__(self, view: np.ndarray) -> None:
+        self.view = np.asarray(view, dtype=np.float64)
+        """Матрица вида (Строки: ось X экрана, ось Y экрана, направление на камеру)"""
+
+    @staticmethod
+    def orbit(yaw: float, pitch: float) -> np.ndarray:
+        """
+        Матрица вида камеры, вращающейся вокруг начала координат
+        :param yaw: Поворот вокруг вертикальной оси (градусы)
+        :param pitch: Наклон над горизонтом (градусы)
+        """
+        yaw = radians(yaw)
+        pitch = radians(pitch)
+
+        toward = np.array((cos(pitch) * sin(yaw), sin(pitch), cos(pitch) * cos(yaw)))
+        right = np.array((cos(yaw), 0.0, -sin(yaw)))
+        up = np.cross(toward, right)
+
+        return np.stack((right, up, toward))
+
+    def depthMany(self, points: np.ndarray) -> np.ndarray:
+        """Глубина массива точек (N, 3): чем больше, тем ближе к камере"""
+        return points @ self.view[2]
+
+    @abstractmethod
+    def projectMany(self, points: np.ndarray) -> np.ndarray:
+        """Спроецировать массив точек (N, 3) на дисплей (N, 2)"""
+
+    @abstractmethod
+    def visibleMask(self, normals: np.ndarray, points: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Маска граней, обращённых к камере
+        :param normals: Нормали граней (N, 3)
+        :param points: Точки граней (N, 3) - нужны камерам, у которых направление взгляда зависит от точки
+        """
+
+
+class OrthographicProjector(Projector):
+    """Ортографическая камера"""
+
+    def __init__(self, view: np.ndarray, scale: float = 1.0) -> None:
+        super().__init__(view)
+        self._screen = self.view[:2].T * scale
+
+    def projectMany(self, points: np.ndarray) -> np.ndarray:
+        return points @ self._screen
+
+    def visibleMask(self, normals: np.ndarray, points: Optional[np.ndarray] = None) -> np.ndarray:
+        return normals @ self.view[2] >= 0
+
+
+class IsometricProjector(OrthographicProjector):
+    """Изометрическая камера"""
+
+    _COS_30: ClassVar[float] = cos(radians(30))
+    _SIN_30: ClassVar[float] = sin(radians(30))
+
+    _VIEW: ClassVar[np.ndarray] = np.array((
+        (_COS_30, 0.0, -_COS_30),
+        (_SIN_30, 1.0, _SIN_30),
+        (-1.0, 1.0, -1.0),
+    ))
+
+    def __init__(self) -> None:
+        scale = sqrt(1.5)
+        super().__init__(self._VIEW / np.array((scale, scale, sqrt(3)))[:, None], scale)
+
+
+class PerspectiveProjector(Projector):
+    """Перспективная камера, направленная на начало координат"""
+
+    NEAR_PLANE: ClassVar[float] = 1e-3
+    """Ближняя плоскость отсечения относительно дистанции"""
+
+    def __init__(self, view: np.ndarray, distance: float) -> None:
+        """
+        :param view: Матрица вида
+        :param distance: Дистанция от камеры до начала координат (Масштаб проекции в начале координат равен 1)
+        """
+        super().__init__(view)
+        self._distance = distance
+        self._position = self.view[2] * distance
+
+    def projectMany(self, points: np.ndarray) -> np.ndarray:
+        camera_space = points @ self.view.T
+        factor = self._distance / np.maximum(self._distance - camera_space[:, 2], self.NEAR_PLANE * self._distance)
+        return camera_space[:, :2] * factor[:, None]
+
+    def visibleMask(self, normals: np.ndarray, points: Optional[np.ndarray] = None) -> np.ndarray:
+        return np.einsum("ij,ij->i", normals, self._position - points) >= 0
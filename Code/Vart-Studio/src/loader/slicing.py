@@ -0,0 +1,94 @@
+"""Сечение сетки параллельными плоскостями"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from loader.meshdata import MeshData
+from tools import raggedRange
+
+
+@dataclass(frozen=True)
+class MeshContours:
+    """Контуры сечений: узлы лежат на рёбрах сетки, отрезки соединяют узлы одного треугольника"""
+
+    points: np.ndarray
+    """Точки узлов (K, 3)"""
+
+    segments: np.ndarray
+    """Отрезки (S, 2) - индексы узлов"""
+
+    segment_faces: np.ndarray
+    """Грань, которой принадлежит каждый отрезок (S,)"""
+
+
+class MeshSlicer:
+    """
+    Сечение сетки
+    Треугольники и рёбра сетки подготавливаются один раз, сечения при любом повороте модели
+    вычисляются сразу для всех плоскостей
+    """
+
+    def __init__(self, data: MeshData) -> None:
+        faces = np.arange(data.faceCount())
+        welded = data.welded_indices
+
+        self._triangles = welded[data.fanTriangles(faces)]
+        self._triangle_faces = np.repeat(faces, np.maximum(data.faceSizes() - 2, 0))
+
+        # общие рёбра соседних треугольников имеют один номер
+        corners = self._triangles[:, ((0, 1), (1, 2), (2, 0))]
+        keys = corners.min(axis=2) * len(data.positions) + corners.max(axis=2)
+        unique_keys, edge_ids = np.unique(keys, return_inverse=True)
+
+        self._triangle_edges = edge_ids.reshape(-1, 3)
+        self._edges = np.stack(np.divmod(unique_keys, max(len(data.positions), 1)), axis=1)
+
+    def slice(self, positions: np.ndarray, axis: np.ndarray, count: int) -> MeshContours:
+        """
+        Рассечь сетку плоскостями, перпендикулярными оси
+        :param positions: Позиции вершин (N, 3) после трансформации модели
+        :param axis: Нормаль плоскостей
+        :param count: Количество плоскостей (Равномерно внутри высоты модели)
+        """
+        heights = positions @ axis
+        triangle_heights = heights[self._triangles]
+
+        if len(triangle_heights) == 0 or count < 1 or np.ptp(triangle_heights) <= 0:
+            return MeshContours(np.zeros((0, 3)), np.zeros((0, 2), dtype=np.int64), np.zeros(0, dtype=np.int64))
+
+        low = float(triangle_heights.min())
+        step = (float(triangle_heights.max()) - low) / count
+        first_level = low + step / 2
+
+        # пары (треугольник, плоскость) по диапазону высот треугольника
+        begin = np.ceil((triangle_heights.min(axis=1) - first_level) / step).astype(np.int64)
+        end = np.floor((triangle_heights.max(axis=1) - first_level) / step).astype(np.int64) + 1
+        begin = np.clip(begin, 0, count)
+        counts = np.maximum(np.clip(end, 0, count) - begin, 0)
+
+        pair_triangles = np.repeat(np.arange(len(triangle_heights)), counts)
+        pair_levels = np.repeat(begin, counts) + raggedRange(counts)
+        level_heights = first_level + pair_levels * step
+
+        # вершина на плоскости считается лежащей выше неё
+        above = triangle_heights[pair_triangles] >= level_heights[:, None]
+        crossed = above != np.roll(above, -1, axis=1)
+        cut = crossed.sum(axis=1) == 2
+
+        pair_triangles = pair_triangles[cut]
+        pair_levels = pair_levels[cut]
+        crossed = crossed[cut]
+
+        # узел - пересечение ребра сетки с плоскостью
+        pair_edges = self._triangle_edges[pair_triangles][crossed].reshape(-1, 2)
+        node_keys = pair_levels[:, None] * len(self._edges) + pair_edges
+        unique_nodes, segments = np.unique(node_keys, return_inverse=True)
+        node_levels, node_edges = np.divmod(unique_nodes, len(self._edges))
+
+        a, b = self._edges[node_edges].T
+        t = ((first_level + node_levels * step - heights[a]) / (heights[b] - heights[a]))[:, None]
+        points = positions[a] * (1 - t) + positions[b] * t
+
+        return MeshContours(points, segments.reshape(-1, 2), self._triangle_faces[pair_triangles])
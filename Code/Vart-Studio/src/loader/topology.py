@@ -0,0 +1,74 @@
+"""Смежность рёбер и граней сетки"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from loader.meshdata import MeshData
+
+
+@dataclass(frozen=True)
+class MeshTopology:
+    """Рёбра сетки с прилегающими гранями и двугранными углами (Не зависит от поворота модели)"""
+
+    edges: np.ndarray
+    """Рёбра (E, 2) по склеенным индексам вершин"""
+
+    edge_faces: np.ndarray
+    """Две прилегающие грани каждого ребра (E, 2), -1 для граничного ребра"""
+
+    dihedral_angles: np.ndarray
+    """Угол между нормалями прилегающих граней в градусах (E,), 0 для граничного ребра"""
+
+    @classmethod
+    def build(cls, data: MeshData) -> MeshTopology:
+        """Построить смежность по всем граням сетки"""
+        faces = np.arange(data.faceCount())
+        loops, offsets = data.faceLoops(faces)
+        loops = data.welded_indices[loops]
+
+        keep = np.ones(max(len(loops) - 1, 0), dtype=bool)
+        keep[offsets[1:-1] - 1] = False
+
+        corner_faces = np.repeat(faces, np.diff(offsets))[:-1][keep]
+        edges = np.stack((loops[:-1][keep], loops[1:][keep]), axis=1)
+        edges.sort(axis=1)
+
+        not_degenerate = edges[:, 0] != edges[:, 1]
+        edges = edges[not_degenerate]
+        corner_faces = corner_faces[not_degenerate]
+
+        if len(edges) == 0:
+            return cls(np.zeros((0, 2), dtype=np.int64), np.zeros((0, 2), dtype=np.int64), np.zeros(0))
+
+        unique_edges, first, inverse, counts = np.unique(edges, axis=0, return_index=True, return_inverse=True, return_counts=True)
+        inverse = inverse.ravel()
+
+        # вторая грань - любая другая грань с тем же ребром
+        order = np.argsort(inverse, kind="stable")
+        second = np.full(len(unique_edges), -1, dtype=np.int64)
+        shared = counts > 1
+        group_begin = np.concatenate(((0,), np.cumsum(counts)[:-1]))
+        second[shared] = corner_faces[order[group_begin[shared] + 1]]
+
+        edge_faces = np.stack((corner_faces[first], second), axis=1)
+
+        normals = cls.__faceNormals(data, loops, offsets)
+        cosines = np.einsum("ij,ij->i", normals[edge_faces[:, 0]], normals[edge_faces[:, 1]])
+        angles = np.where(shared, np.degrees(np.arccos(np.clip(cosines, -1, 1))), 0)
+
+        return cls(unique_edges, edge_faces, angles)
+
+    @staticmethod
+    def __faceNormals(data: MeshData, loops: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+        """Геометрические нормали граней (Метод Ньюэлла), сонаправленные нормалям файла"""
+        points = data.positions[loops].astype(np.float64)
+        cross = np.cross(points[:-1], points[1:])
+        cross[offsets[1:-1] - 1] = 0
+
+        normals = np.add.reduceat(cross, offsets[:-1], axis=0) if len(offsets) > 1 else np.zeros((0, 3))
+        normals[np.einsum("ij,ij->i", normals, data.face_normals) < 0] *= -1
+
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        return normals / np.where(lengths > 0, lengths, 1)
@@ -1,6 +1,9 @@
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Callable
-from typing import Sequence
+from typing import Hashable
+from typing import Optional
+
+import numpy as np
 
 
 @dataclass
@@ -21,25 +24,36 @@ class Range[T]:
         return min(self.max, max(self.min, value))
 
 
-def greedySort[T, F](original: Sequence[T], metric: Callable[[T, T], F]) -> list[T]:
-    n = len(original)
-    ret = [original[0]]
+class LruCache[K: Hashable, V]:
+    """Кэш с вытеснением давно не использованных записей"""
+
+    def __init__(self, capacity: int) -> None:
+        self._capacity = capacity
+        self._entries = OrderedDict()
+
+    def get(self, key: K) -> Optional[V]:
+        """Получить значение, отметив запись как недавно использованную"""
+        if key not in self._entries:
+            return None
+
+        self._entries.move_to_end(key)
+        return self._entries[key]
 
-    used = {0}
-    uses = 1
+    def put(self, key: K, value: V) -> None:
+        """Сохранить значение, вытеснив самую старую запись при переполнении"""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
 
-    while uses < n:
-        last = ret[-1]
+        while len(self._entries) > self._capacity:
+            self._entries.popitem(last=False)
 
-        nearest_index = min(
-            filter(lambda i: i not in used, range(n)),
-            key=lambda i: metric(last, original[i]),
-            default=None
-        )
+    def clear(self) -> None:
+        """Удалить все записи"""
+        self._entries.clear()
 
-        if nearest_index is not None:
-            ret.append(original[nearest_index])
-            used.add(nearest_index)
-            uses += 1
 
-    return ret
+def raggedRange(counts: np.ndarray) -> np.ndarray:
+    """Локальные индексы элементов внутри подряд идущих групп заданных размеров"""
+    counts = np.asarray(counts, dtype=np.int64)
+    starts = np.cumsum(counts) - counts
+    return np.arange(int(counts.sum())) - np.repeat(starts, counts)
@@ -76,13 +76,21 @@ class Text(VariableDPGItem[str], Placeable):
 
 class TextInput(VariableDPGItem[str], Placeable):
 
-    def __init__(self, placeholder: str = "Placeholder"):
+    def __init__(self, placeholder: str = "Placeholder", on_change: Callable[[str], None] = None, *, label: str = "", width: int = 100, default_value: str = ""):
         super().__init__()
         self.__placeholder = placeholder
+        self.__label = label
+        self.__width = width
+        self.__default_value = default_value
+        self.__callback = None if on_change is None else lambda: on_change(self.getValue())
 
     def placeRaw(self, parent_id: ItemID) -> None:
-        self.setItemID(dpg.add_input_text())
+        self.setItemID(dpg.add_input_text(parent=parent_id, label=self.__label, width=self.__width, default_value=self.__default_value, callback=self.__callback))
         del self.__placeholder
+        del self.__label
+        del self.__width
+        del self.__default_value
+        del self.__callback
 
 
 class SliderInt[T: (float, int)](Placeable, RangedDPGItem[T]):
@@ -296,3 +304,20 @@ class InputInt(RangedDPGItem[int], Placeable):
         del self.__step_fast
         del self.__step
         del self.__callback
+
+
+class MouseReleaseHandler(DPGItem):
+    """Обработчик отпускания левой кнопки мыши во всём окне"""
+
+    def __init__(self, on_release: Callable[[], None]) -> None:
+        super().__init__()
+
+        with dpg.handler_registry() as registry:
+            dpg.add_mouse_release_handler(button=dpg.mvMouseButton_Left, callback=lambda: on_release())
+
+        self.setItemID(registry)
+
+    @staticmethod
+    def isPressed() -> bool:
+        """Левая кнопка мыши удерживается (Идёт перетаскивание или удержание элемента управления)"""
+        return dpg.is_mouse_button_down(dpg.mvMouseButton_Left)
@@ -0,0 +1,45 @@
+import random
+import time
+
+from bytelang.core.handlers.errors import ErrorHandler
+from bytelang.core.parsers.impl.statement import StatementParser
+from bytelang.tools.string import FixedStringIO
+from gen.agents import TextAgent
+from gen.enums import MarkerTool
+
+LINES = 1_000_000
+REPEATS = 3
+
+random.seed(0)
+source = FixedStringIO()
+agent = TextAgent(source)
+agent.prelude()
+
+for step in range(LINES - 1):
+    kind = step % 10
+
+    if kind == 0:
+        agent.note(f"Progress: {step * 100 // LINES}")
+
+    elif kind == 1:
+        agent.set_active_tool(random.choice(tuple(MarkerTool)))
+
+    elif kind == 2:
+        agent.set_position(random.randint(-2000, 2000), random.randint(-2000, 2000))
+
+    else:
+        agent.set_position_speed(random.randint(-2000, 2000), random.randint(-2000, 2000), random.randint(0, 150))
+
+text = source.getvalue()
+line_count = text.count("\n")
+
+best = float("inf")
+
+for _ in range(REPEATS):
+    errors = ErrorHandler()
+    start = time.perf_counter()
+    statements = sum(1 for _ in StatementParser(errors).run(FixedStringIO(text)))
+    best = min(best, time.perf_counter() - start)
+    assert errors.isSuccess(), errors.getLog()
+
+print(f"StatementParser : {line_count} lines ({statements} statements) : {best:.2f} s : {line_count / best:,.0f} lines/s")
@@ -0,0 +1,27 @@
+from pathlib import Path
+
+import numpy as np
+
+from loader.edges import EdgeGraph
+from loader.hiddenline import HiddenLineRemover
+from loader.meshdata import MeshData
+from loader.projection import IsometricProjector
+
+# куб в изометрии без поворота, без отсечения граней: видны 9 рёбер, 3 задних ребра скрыты целиком
+# (Задние рёбра 2-3 и 2-6 проецируются точно на диагонали веера передних граней)
+with open(Path(__file__).parent.parent / "res/obj/cube.obj") as f:
+    (data,) = MeshData.loadObj(f)
+
+projector = IsometricProjector()
+faces = np.arange(data.faceCount())
+positions = data.positions.astype(np.float64)
+projected = projector.projectMany(positions)
+
+loops, offsets = data.faceLoops(faces)
+graph = EdgeGraph.fromLoops(data.welded_indices[loops], offsets)
+
+remover = HiddenLineRemover(projected, projector.depthMany(positions), data.welded_indices[data.fanTriangles(faces)])
+visible, segments = remover.run(graph.edges)
+
+print(f"Cube : {visible.sum()} visible edges, {len(segments)} partial segments of {len(graph.edges)} edges")
+assert visible.sum() == 9 and len(segments) == 0
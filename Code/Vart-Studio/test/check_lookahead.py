@@ -0,0 +1,50 @@
+import math
+import random
+
+import numpy as np
+
+from gen.lookahead import LookAheadPlanner
+from gen.lookahead import PlannerModel
+
+planner = LookAheadPlanner(junction_deviation=0.05)
+
+
+def check(name: str, x_positions: list[int], y_positions: list[int], speeds: list[float], accels: list[float]) -> None:
+    exit_speeds = planner.plan(x_positions, y_positions, speeds, accels)
+    limits = planner.junctionLimits(x_positions, y_positions, speeds, accels)
+    trace = PlannerModel.run(x_positions, y_positions, exit_speeds, speeds, accels)
+
+    assert exit_speeds[-1] == 0, name
+    assert np.all(np.asarray(exit_speeds) <= np.floor(limits) + 1e-9), name
+    assert trace.isValid(), f"{name} : speed excess {trace.speed_excess:.3f}, accel excess {trace.accel_excess:.3f}"
+
+
+# окружности разного радиуса: скорость на стыках ограничена углом, движение без превышений
+for radius in (5, 20, 100, 500):
+    count = max(8, int(2 * math.pi * radius / 4))
+    angles = np.linspace(0, 2 * math.pi, count + 1)
+    x_positions = np.round(radius * np.cos(angles)).astype(int).tolist()
+    y_positions = np.round(radius * np.sin(angles)).astype(int).tolist()
+    check(f"Circle {radius}", x_positions, y_positions, [150] * count, [75] * count)
+    print(f"Circle {radius} : {count} segments : ok")
+
+# случайные ломаные с разными длинами, поворотами, скоростями и ускорениями отрезков
+random.seed(0)
+
+for trial in range(100):
+    count = random.randint(1, 60)
+    heading = 0.0
+    x_positions = [0]
+    y_positions = [0]
+
+    for _ in range(count):
+        heading += random.uniform(-1, 1) * random.choice((0.1, 1, 3))
+        length = random.choice((1, 3, 10, 50))
+        x_positions.append(round(x_positions[-1] + length * math.cos(heading)))
+        y_positions.append(round(y_positions[-1] + length * math.sin(heading)))
+
+    speeds = [random.choice((50, 100, 150)) for _ in range(count)]
+    accels = [random.choice((25, 50, 75)) for _ in range(count)]
+    check(f"Random {trial}", x_positions, y_positions, speeds, accels)
+
+print("Random : 100 trajectories : ok")
@@ -0,0 +1,38 @@
+import random
+
+from gen.profileselector import ProfileSelector
+
+selector = ProfileSelector(long_line_length=100, micro_length=5)
+
+# одиночные длинные отрезки среди малых отрезков и кривых получают более медленный профиль соседа
+lengths = [150] + [2] * 6 + [150] + [2] * 6 + [20] * 4 + [150] * 2 + [20] * 4
+x_positions = [0]
+
+for length in lengths:
+    x_positions.append(x_positions[-1] + length)
+
+runs = selector.runs(x_positions, [0] * len(x_positions))
+print(f"Mixed : {runs}")
+assert runs == [(14, ProfileSelector.MICRO), (10, ProfileSelector.CURVE)]
+
+# короткий участок никогда не быстрее соседа
+random.seed(0)
+
+for _ in range(1000):
+    count = random.randint(2, 60)
+    x_positions = [0]
+    y_positions = [0]
+
+    for _ in range(count):
+        length = random.choice((1, 3, 8, 20, 60, 150))
+        x_positions.append(x_positions[-1] + length * random.choice((-1, 1)))
+        y_positions.append(y_positions[-1] + random.randint(-2, 2))
+
+    runs = selector.runs(x_positions, y_positions)
+    assert sum(c for c, _ in runs) == count, runs
+
+    for i, (c, index) in enumerate(runs):
+        neighbours = [runs[j][1] for j in (i - 1, i + 1) if 0 <= j < len(runs)]
+        assert c >= ProfileSelector.MIN_RUN or all(index < n for n in neighbours), runs
+
+print("Random : ok")